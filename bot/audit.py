@@ -0,0 +1,232 @@
+import asyncio
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from outbound import OutboundScheduler, PRIORITY_AUDIT, MAX_EMBEDS_PER_MESSAGE
+
+AUDIT_QUEUE_FILE = 'audit_queue.json'
+
+AUDIT_TITLES = {
+    'givekey': 'Key Issued',
+    'grantkeys': 'Keys Granted (Bulk)',
+    'suspendkey': 'Key Suspended',
+    'unsuspendkey': 'Key Unsuspended',
+    'deletekey': 'Key Deleted',
+    'clearkey': 'Key HWID Cleared',
+    'bulkkeys': 'Bulk Key Operation',
+    'modifykey': 'Key Modified',
+    'mergekeys': 'Keys Merged',
+    'bulkgenerate': 'Keys Generated (Bulk)',
+    'blacklist': 'Blacklist Updated',
+    'pruneexpired': 'Expired Keys Pruned',
+    'setsetting': 'Setting Changed',
+    'setloader': 'Loader Settings Changed',
+    'uploadscript': 'Script Uploaded',
+    'updatescript': 'Script Updated',
+    'removescript': 'Script Removed',
+    'releasescripts': 'Scripts Released',
+    'enable': 'Feature Enabled',
+    'disable': 'Feature Disabled',
+}
+
+DIGEST_LINE_LIMIT = 1900
+
+
+class AuditSink:
+    """Buffered publisher for each guild's audit channel.
+
+    Commands publish events (a command log entry plus its ``guild_id``, and
+    optionally an ``attachment`` of ``{'filename', 'content'}``) and return
+    immediately. Every ``flush_interval`` seconds pending events are posted as
+    multi-embed messages, or as a compact text digest once more than
+    ``digest_threshold`` are waiting. Unsent events are written to
+    ``AUDIT_QUEUE_FILE`` on each flush tick and reloaded on start, so a restart
+    loses at most one interval of audit records.
+
+    Events for a guild without an audit channel, or whose channel rejects the
+    bot (403/404), are dropped rather than retried. Other failures stay queued
+    and the flush interval doubles after each failed tick, up to ``max_backoff``.
+    """
+
+    def __init__(
+        self,
+        outbox: OutboundScheduler,
+        path: str = AUDIT_QUEUE_FILE,
+        flush_interval: float = 3.0,
+        digest_threshold: int = 30,
+        max_pending: int = 5000,
+        max_backoff: float = 120.0,
+        color: discord.Color = discord.Color.blurple(),
+        footer: str = ''
+    ):
+        self.outbox = outbox
+        self.path = path
+        self.flush_interval = flush_interval
+        self.digest_threshold = digest_threshold
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self.color = color
+        self.footer = footer
+        self.pending: List[Dict[str, Any]] = []
+        self._dirty = False
+        self._full = False
+        self.failures = 0
+        self._channel_getter: Optional[Callable[[Optional[int]], Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {'published': 0, 'messages': 0, 'digests': 0, 'dropped': 0}
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    self.pending = data[-self.max_pending:]
+                    if self.pending:
+                        print(f"[AUDIT] Restored {len(self.pending)} unsent audit event(s)")
+        except Exception as e:
+            print(f"Warning: Could not load audit queue: {e}")
+
+    def persist(self):
+        if not self._dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.pending, f, ensure_ascii=False)
+            self._dirty = False
+        except Exception as e:
+            print(f"Error saving audit queue: {e}")
+
+    def start(self, channel_getter: Callable[[Optional[int]], Any]):
+        self._channel_getter = channel_getter
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def publish(self, event: Dict[str, Any]):
+        self.pending.append(event)
+        self.metrics['published'] += 1
+        if len(self.pending) > self.max_pending:
+            del self.pending[0]
+            self.metrics['dropped'] += 1
+            if not self._full:
+                print(f"[WARN] Audit queue full ({self.max_pending}), dropping oldest events until it drains")
+            self._full = True
+        self._dirty = True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(min(self.flush_interval * (2 ** self.failures), self.max_backoff))
+            try:
+                failed = await self.flush()
+            except Exception as e:
+                print(f"[WARN] Audit flush failed: {e}")
+                failed = True
+            self.failures = min(self.failures + 1, 16) if failed else 0
+            self.persist()
+
+    def _drop(self, events: List[Dict[str, Any]]):
+        dropped = set(id(e) for e in events)
+        self.pending = [e for e in self.pending if id(e) not in dropped]
+        self.metrics['dropped'] += len(events)
+        self._dirty = True
+
+    async def flush(self) -> bool:
+        """Send what's pending; True if some sends failed and their events are still queued."""
+        if not self.pending or self._channel_getter is None:
+            return False
+        # Events queued before guilds were configured have no guild_id; the getter maps None to the primary guild.
+        batches: Dict[Optional[int], List[Dict[str, Any]]] = {}
+        for event in self.pending:
+            batches.setdefault(event.get('guild_id'), []).append(event)
+        sends = []
+        for guild_id, batch in batches.items():
+            channel = self._channel_getter(guild_id)
+            if channel is None:
+                print(f"[AUDIT] No audit channel for guild {guild_id}, dropped {len(batch)} event(s)")
+                self._drop(batch)
+            else:
+                sends.extend(self._sends(channel, batch))
+        if not sends:
+            return False
+        results = await asyncio.gather(*(future for future, _ in sends), return_exceptions=True)
+        # Only drop events once Discord has accepted them, or refused them for good; other failures stay queued.
+        done, rejected, reason = [], [], None
+        for result, (_, events) in zip(results, sends):
+            if isinstance(result, (discord.Forbidden, discord.NotFound)):
+                rejected.extend(events)
+                reason = result
+            elif not isinstance(result, BaseException):
+                done.extend(events)
+                self.metrics['messages'] += 1
+        if rejected:
+            print(f"[WARN] Audit channel rejected {len(rejected)} event(s), dropping them: {reason}")
+            self._drop(rejected)
+        if done:
+            delivered = set(id(e) for e in done)
+            self.pending = [e for e in self.pending if id(e) not in delivered]
+            self._dirty = True
+        if len(self.pending) < self.max_pending:
+            self._full = False
+        return len(done) + len(rejected) < sum(len(events) for _, events in sends)
+
+    def _sends(self, channel: Any, batch: List[Dict[str, Any]]) -> List[tuple]:
+        sends = []
+        # Events with a file go out one per message, outside the digest.
+        for event in batch:
+            if event.get('attachment'):
+                attachment = event['attachment']
+                file = discord.File(io.BytesIO(attachment['content'].encode('utf-8')), filename=attachment['filename'])
+                sends.append((self.outbox.send(channel, PRIORITY_AUDIT, embed=self._embed(event), file=file), [event]))
+        batch = [e for e in batch if not e.get('attachment')]
+        if not batch:
+            return sends
+        if len(batch) > self.digest_threshold:
+            digests = self._digest(batch)
+            for chunk, events in digests:
+                sends.append((self.outbox.send(channel, PRIORITY_AUDIT, content=chunk, allowed_mentions=discord.AllowedMentions.none()), events))
+            self.metrics['digests'] += len(digests)
+        else:
+            for i in range(0, len(batch), MAX_EMBEDS_PER_MESSAGE):
+                events = batch[i:i + MAX_EMBEDS_PER_MESSAGE]
+                sends.append((self.outbox.send(channel, PRIORITY_AUDIT, embeds=[self._embed(e) for e in events]), events))
+        return sends
+
+    def _embed(self, event: Dict[str, Any]) -> discord.Embed:
+        command = event.get('command', 'unknown')
+        embed = discord.Embed(
+            title=AUDIT_TITLES.get(command, f"/{command}"),
+            color=self.color,
+            timestamp=datetime.fromisoformat(event['timestamp']) if event.get('timestamp') else None
+        )
+        embed.add_field(name="By", value=f"<@{event.get('executor_id')}>", inline=True)
+        if event.get('target_user_id'):
+            embed.add_field(name="User", value=f"<@{event['target_user_id']}> ({event['target_user_id']})", inline=True)
+        for name, value in (event.get('details') or {}).items():
+            if value is not None and len(embed.fields) < 10:
+                embed.add_field(name=name, value=str(value)[:1024], inline=True)
+        if self.footer:
+            embed.set_footer(text=self.footer)
+        return embed
+
+    def _digest(self, batch: List[Dict[str, Any]]) -> List[tuple]:
+        chunks = []
+        header = f"**Audit digest** ({len(batch)} events)"
+        current, events = header, []
+        for event in batch:
+            details = ' '.join(f"{k}={v}" for k, v in (event.get('details') or {}).items() if v is not None)
+            target = f" → <@{event['target_user_id']}>" if event.get('target_user_id') else ""
+            line = f"`{event.get('timestamp', '')[11:19]}` /{event.get('command')} by <@{event.get('executor_id')}>{target} {details}".rstrip()[:DIGEST_LINE_LIMIT]
+            if events and len(current) + len(line) + 1 > DIGEST_LINE_LIMIT:
+                chunks.append((current, events))
+                current, events = line, []
+            else:
+                current = f"{current}\n{line}"
+            events.append(event)
+        chunks.append((current, events))
+        return chunks
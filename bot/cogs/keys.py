@@ -0,0 +1,823 @@
+"""License key commands: issuing, editing, bulk jobs, lookups and the key browser."""
+import asyncio
+import csv
+import io
+import re
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+from utils import format_duration, gather_bounded, iter_lines, retry_async
+from outbound import PRIORITY_DM, PRIORITY_INTERACTION
+import bot as core
+from bot import (
+    BOT_COLOR, BOT_NAME, BOT_THUMBNAIL, KEY_INVENTORY, MAX_USERKEYS_SHOWN, ProgressReporter,
+    USERKEYS_CONCURRENCY, audit_sink, build_log_entry, embeds, key_index,
+    members, outbox, permissions, pipeline, run_heavy, sync_key_inventory, token_expired
+)
+
+def build_key_dm_embed(issuer_name: str, key: str, duration_human: str, expiry: Optional[str]) -> discord.Embed:
+    embed = discord.Embed(
+        title="License Key Issued",
+        description=f"You have received a license key from {issuer_name}",
+        color=BOT_COLOR,
+        timestamp=datetime.now()
+    )
+    embed.add_field(name="Key", value=f"`{key}`", inline=False)
+    embed.add_field(name="Duration", value=duration_human, inline=True)
+    expires_text = f"<t:{int(datetime.fromisoformat(expiry).timestamp())}:R>" if expiry else "Unknown"
+    embed.add_field(name="Expires", value=expires_text, inline=True)
+    embed.add_field(
+        name="Instructions",
+        value="1. Visit https://unknownhub.vercel.app/\n2. Enter your key\n3. Follow the setup steps",
+        inline=False
+    )
+    embed.set_footer(text=f"{BOT_NAME} - Keep your key secure")
+    return embed
+
+def parse_duration(duration_str: str) -> Optional[tuple[int, str]]:
+    duration_map = {
+        '12H': (12 * 3600, '12 hours'),
+        '1D': (1 * 86400, '1 day'),
+        '7D': (7 * 86400, '7 days'),
+        '30D': (30 * 86400, '30 days'),
+        '365D': (365 * 86400, '1 year'),
+        'LIFE': (365 * 86400 * 5, '5 years'),
+    }
+    
+    return duration_map.get(duration_str.upper())
+
+def parse_blacklist_duration(duration_str: str) -> Optional[tuple[int, str]]:
+    duration_map = {
+        '15M': (15 * 60, '15 minutes'),
+        '1H': (1 * 3600, '1 hour'),
+        '6H': (6 * 3600, '6 hours'),
+        '1D': (1 * 86400, '1 day'),
+        '7D': (7 * 86400, '7 days'),
+    }
+    return duration_map.get(duration_str.upper())
+
+@app_commands.command(
+    name='givekey',
+    description='Give a license key to someone'
+)
+@app_commands.describe(
+    user='The user to give the key to',
+    duration='Duration: 12h, 1d, 7d, 30d, 365d, or LIFE'
+)
+@app_commands.choices(duration=[
+    app_commands.Choice(name='12 Hours', value='12h'),
+    app_commands.Choice(name='1 Day', value='1d'),
+    app_commands.Choice(name='7 Days', value='7d'),
+    app_commands.Choice(name='30 Days', value='30d'),
+    app_commands.Choice(name='1 Year', value='365d'),
+    app_commands.Choice(name='LIFE (5 Years)', value='LIFE'),
+])
+@pipeline.command('admin', log=lambda i, user, duration: {'target_user_id': user.id, 'target_user_name': user.name, 'details': {'duration': duration}}, audit=False)
+async def givekey(interaction: discord.Interaction, user: discord.User, duration: str):
+    print(f"[CMD] /givekey invoked by {interaction.user.name} for {user.name} | duration={duration}")
+    duration_str = str(duration).strip().upper()
+    duration_result = parse_duration(duration_str)
+    
+    if not duration_result:
+        print(f"[CMD] Invalid duration: {duration}")
+        await embeds.send_error(interaction, "Valid options: 12h, 1d, 7d, 30d, 365d, or LIFE", title="Invalid Duration")
+        return
+    
+    duration_seconds, duration_human = duration_result
+    print(f"[CMD] Duration: {duration_human} ({duration_seconds}s)")
+    
+    key_response = await core.api_client.create_key(
+        duration_seconds=duration_seconds,
+        discord_user_id=str(user.id)
+    )
+    
+    if not key_response or not key_response.get('key'):
+        print(f"[ERROR] Key creation failed for {user.name}")
+        await embeds.send_error(interaction, "Unable to create key. Check API connectivity.", title="Key Creation Failed")
+        return
+    
+    new_key = key_response['key']
+    expiry = key_response.get('expiry_timestamp')
+    print(f"[OK] Key created: {new_key[:20]}... for {user.name}")
+    
+    dm_status = "Sent"
+    try:
+        await outbox.send_dm(user, embed=build_key_dm_embed(interaction.user.name, new_key, duration_human, expiry))
+    except discord.Forbidden:
+        dm_status = "DMs Disabled"
+        print(f"[WARN] DMs disabled for {user.name}")
+    except Exception as e:
+        dm_status = f"Failed: {str(e)[:30]}"
+        print(f"[WARN] Error sending DM: {e}")
+    
+    embed = embeds("Key Created Successfully", color=discord.Color.green(), timestamp=True)
+    embed.add_field(name="User", value=f"{user.mention} ({user.id})", inline=False)
+    embed.add_field(name="Key", value=f"`{new_key}`", inline=False)
+    embed.add_field(name="Duration", value=duration_human, inline=True)
+    embed.add_field(name="Expires", value=f"<t:{int(datetime.fromisoformat(expiry).timestamp())}:R>" if expiry else "Unknown", inline=True)
+    embed.add_field(name="DM Status", value=dm_status, inline=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    audit_sink.publish({
+        **build_log_entry(
+            'givekey', interaction.user.id, interaction.user.name, user.id, user.name,
+            {'Duration': duration_human, 'Key (Masked)': f"`{new_key[:8]}...{new_key[-8:]}`"}
+        ),
+        'guild_id': interaction.guild_id
+    })
+
+@app_commands.command(name='suspendkey', description='Suspend a license key')
+@app_commands.describe(key='The license key to suspend')
+@pipeline.command('admin', log=lambda i, key: {'details': {'key': key[:8]}})
+async def suspendkey(interaction: discord.Interaction, key: str):
+    response = await core.api_client.suspend_key(key)
+    if response and response.get('success'):
+        await embeds.send(interaction, "Success", f"Key suspended: {key[:8]}...", color=discord.Color.orange())
+        print(f"[OK] Key suspended: {key[:8]}...")
+    else:
+        await embeds.send_error(interaction, "Could not suspend key", title="Failed")
+
+@app_commands.command(name='unsuspendkey', description='Unsuspend a license key')
+@app_commands.describe(key='The license key to unsuspend')
+@pipeline.command('admin', log=lambda i, key: {'details': {'key': key[:8]}})
+async def unsuspendkey(interaction: discord.Interaction, key: str):
+    response = await core.api_client.unsuspend_key(key)
+    if response and response.get('success'):
+        await embeds.send(interaction, "Success", f"Key unsuspended: {key[:8]}...", color=discord.Color.green())
+        print(f"[OK] Key unsuspended: {key[:8]}...")
+    else:
+        await embeds.send_error(interaction, "Could not unsuspend key", title="Failed")
+
+@app_commands.command(name='deletekey', description='Delete a license key')
+@app_commands.describe(key='The license key to delete')
+@pipeline.command('admin', log=lambda i, key: {'details': {'key': key[:8]}})
+async def deletekey(interaction: discord.Interaction, key: str):
+    response = await core.api_client.delete_key(key)
+    if response and response.get('success'):
+        await embeds.send(interaction, "Success", f"Key permanently deleted: {key[:8]}...", color=discord.Color.red())
+        print(f"[OK] Key deleted: {key[:8]}...")
+    else:
+        await embeds.send_error(interaction, "Could not delete key", title="Failed")
+
+@app_commands.command(name='clearkey', description='Reset HWID from a key')
+@app_commands.describe(key='The license key to reset')
+@pipeline.command('admin', log=lambda i, key: {'details': {'key': key[:8]}})
+async def clearkey(interaction: discord.Interaction, key: str):
+    response = await core.api_client.clear_key(key)
+    if response and response.get('success'):
+        await embeds.send(interaction, "Success", f"HWID cleared from {key[:8]}...\nKey can now be used on another device.", color=discord.Color.blue())
+        print(f"[OK] Key HWID cleared: {key[:8]}...")
+    else:
+        await embeds.send_error(interaction, "Could not reset key", title="Failed")
+
+MAX_BULK_KEYS = 5000
+BULK_KEY_CONCURRENCY = 6
+BULK_KEY_ACTIONS = {
+    'suspend': ('suspend_key', 'Suspended'),
+    'unsuspend': ('unsuspend_key', 'Unsuspended'),
+    'delete': ('delete_key', 'Deleted'),
+    'clear': ('clear_key', 'HWID Cleared'),
+}
+
+async def read_key_list(attachment: discord.Attachment, limit: int) -> tuple[list[str], bool]:
+    keys = {}
+    async for line in iter_lines(core.api_client.iter_download(attachment.url)):
+        if not line or line.startswith('#'):
+            continue
+        for key in re.split(r"[\s,;]+", line):
+            if key:
+                keys[key] = None
+                if len(keys) > limit:
+                    return list(keys)[:limit], True
+    return list(keys), False
+
+@app_commands.command(name='bulkkeys', description='Suspend, unsuspend, delete or reset keys listed in a text file')
+@app_commands.describe(action='Operation to run on every key', keys_file='Text file with one key per line')
+@app_commands.choices(action=[
+    app_commands.Choice(name='Suspend', value='suspend'),
+    app_commands.Choice(name='Unsuspend', value='unsuspend'),
+    app_commands.Choice(name='Delete', value='delete'),
+    app_commands.Choice(name='Clear HWID', value='clear'),
+])
+@pipeline.command('admin', log=lambda i, action, keys_file: {'details': {'action': action.value, 'file': keys_file.filename}})
+async def bulkkeys(interaction: discord.Interaction, action: app_commands.Choice[str], keys_file: discord.Attachment):
+    method_name, done_label = BULK_KEY_ACTIONS[action.value]
+    keys, truncated = await read_key_list(keys_file, MAX_BULK_KEYS)
+    if not keys:
+        await embeds.send(interaction, "No Keys", "The attached file contains no keys.", color=discord.Color.orange())
+        return
+
+    total = len(keys)
+    method = getattr(core.api_client, method_name)
+    counts = {'ok': 0, 'failed': 0}
+    results = {}
+    progress = ProgressReporter(interaction, f"Bulk {action.name}")
+
+    def progress_text() -> str:
+        done = counts['ok'] + counts['failed']
+        return f"Processed **{done}**/{total} • {done_label}: {counts['ok']} • Failed: {counts['failed']}"
+
+    await progress.start(progress_text())
+
+    async def run(key: str):
+        return await retry_async(lambda: method(key))
+
+    async def on_result(key: str, resp):
+        if isinstance(resp, dict) and resp.get('success'):
+            counts['ok'] += 1
+            results[key] = ('ok', '')
+        else:
+            counts['failed'] += 1
+            if isinstance(resp, Exception):
+                detail = str(resp)
+            elif isinstance(resp, dict):
+                detail = str(resp.get('error') or resp.get('text') or resp)
+            else:
+                detail = 'no response'
+            results[key] = ('failed', detail[:200])
+        await progress.update(progress_text())
+
+    await gather_bounded(keys, run, limit=BULK_KEY_CONCURRENCY, on_result=on_result)
+    await progress.update(progress_text(), force=True)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['key', 'result', 'detail'])
+    for key in keys:
+        writer.writerow([key, *results[key]])
+
+    desc = f"{done_label}: **{counts['ok']}**/{total}"
+    if counts['failed']:
+        desc += f"\nFailed: {counts['failed']}"
+    if truncated:
+        desc += f"\nOnly the first {MAX_BULK_KEYS} keys were processed."
+    embed = embeds(f"Bulk {action.name} Complete", desc, color=discord.Color.green() if not counts['failed'] else discord.Color.orange())
+    await send_result(interaction, embed, buffer.getvalue(), f"bulk_{action.value}_{total}.csv")
+    print(f"[OK] bulkkeys {action.value}: {counts['ok']}/{total}")
+    return {'details': {'keys': total, 'ok': counts['ok'], 'failed': counts['failed'], 'truncated': truncated or None}}
+
+@app_commands.command(name='blacklist', description='Manage redeem blacklist')
+@app_commands.describe(
+    action='add, remove, or list',
+    user='User to act on (required for add/remove)',
+    duration='Duration (15m, 1h, 6h, 1d, 7d) for add'
+)
+@app_commands.choices(action=[
+    app_commands.Choice(name='Add', value='add'),
+    app_commands.Choice(name='Remove', value='remove'),
+    app_commands.Choice(name='List', value='list'),
+])
+@app_commands.choices(duration=[
+    app_commands.Choice(name='15 minutes', value='15m'),
+    app_commands.Choice(name='1 hour', value='1h'),
+    app_commands.Choice(name='6 hours', value='6h'),
+    app_commands.Choice(name='1 day', value='1d'),
+    app_commands.Choice(name='7 days', value='7d'),
+])
+@pipeline.command('admin', log=lambda i, action, user=None, duration='1h': {'target_user_id': user.id if user else None, 'target_user_name': user.name if user else None, 'details': {'action': action.value}})
+async def blacklist(interaction: discord.Interaction, action: app_commands.Choice[str], user: discord.User = None, duration: str = '1h'):
+    action_val = action.value
+    if action_val == 'list':
+        resp = await core.api_client.manage_blacklist('list')
+        entries = resp.get("blacklist", []) if resp else []
+        embed = embeds("Active Blacklist")
+        if not entries:
+            embed.description = "No active blacklist entries."
+        else:
+            for entry in entries:
+                uid = entry.get("discord_user_id")
+                rem = int(entry.get("seconds_remaining", 0))
+                expires_at = entry.get("expires_at")
+                embed.add_field(
+                    name=f"User {uid}",
+                    value=f"Expires in {format_duration(rem)}",
+                    inline=False
+                )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+
+    if not user:
+        await embeds.send_error(interaction, "Specify a user for add/remove.", title="User Required")
+        return
+
+    if action_val == 'remove':
+        resp = await core.api_client.manage_blacklist('remove', str(user.id))
+        ok = resp and resp.get("success")
+        await embeds.send(
+            interaction,
+            "Blacklist Removed" if ok else "Remove Failed",
+            f"{user.mention} removed from blacklist" if ok else "Could not remove",
+            color=discord.Color.green() if ok else discord.Color.red()
+        )
+        return
+
+    # add
+    dur = parse_blacklist_duration(duration) or parse_blacklist_duration('1h')
+    dur_seconds, dur_human = dur
+    resp = await core.api_client.manage_blacklist('add', str(user.id), dur_seconds)
+    ok = resp and resp.get("success")
+    expires_at = resp.get("expires_at") if resp else None
+    expires_text = f"<t:{int(expires_at)}:R>" if expires_at else "unknown"
+    await embeds.send(
+        interaction,
+        "User Blacklisted" if ok else "Blacklist Failed",
+        f"{user.mention} blocked for {dur_human}\nExpires {expires_text}",
+        color=discord.Color.orange() if ok else discord.Color.red()
+    )
+
+@app_commands.command(name='modifykey', description='Modify key owner/status/duration')
+@app_commands.describe(
+    key='Key to modify',
+    new_owner='New Discord user to bind (optional)',
+    duration='New duration (optional)',
+    status='New status (optional)'
+)
+@app_commands.choices(duration=[
+    app_commands.Choice(name='12 Hours', value='12h'),
+    app_commands.Choice(name='1 Day', value='1d'),
+    app_commands.Choice(name='7 Days', value='7d'),
+    app_commands.Choice(name='30 Days', value='30d'),
+    app_commands.Choice(name='1 Year', value='365d'),
+    app_commands.Choice(name='LIFE (5 Years)', value='LIFE'),
+])
+@app_commands.choices(status=[
+    app_commands.Choice(name='Pre-activated', value='pre-activated'),
+    app_commands.Choice(name='Redeemed', value='redeemed'),
+    app_commands.Choice(name='Activated', value='activated'),
+    app_commands.Choice(name='Suspended', value='suspended'),
+])
+@pipeline.command('admin', log=lambda i, key, new_owner=None, duration=None, status=None: {'details': {'key': key[:8], 'new_owner': new_owner.id if new_owner else None, 'duration': duration, 'status': status.value if status else None}})
+async def modifykey(interaction: discord.Interaction, key: str, new_owner: discord.User = None, duration: str = None, status: app_commands.Choice[str] = None):
+    payload = {}
+    if new_owner:
+        payload['discord_user_id'] = str(new_owner.id)
+    if duration:
+        parsed = parse_duration(duration)
+        if not parsed:
+            await embeds.send_error(interaction, "Choose a supported duration.", title="Invalid Duration")
+            return
+        payload['duration_seconds'] = parsed[0]
+    if status:
+        payload['status'] = status.value
+
+    if not payload:
+        await embeds.send(interaction, "No Changes", "Provide at least one field to modify.", color=discord.Color.orange())
+        return
+
+    resp = await core.api_client.modify_key(key, payload)
+    if resp and resp.get("success"):
+        embed = embeds("Key Updated", color=discord.Color.green(), timestamp=True)
+        embed.add_field(name="Key", value=key[:8] + "...", inline=False)
+        if new_owner:
+            embed.add_field(name="New Owner", value=f"{new_owner.mention} ({new_owner.id})", inline=False)
+        if duration:
+            embed.add_field(name="Duration", value=parse_duration(duration)[1], inline=True)
+        if status:
+            embed.add_field(name="Status", value=status.value, inline=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await embeds.send_error(interaction, str(resp), title="Modify Failed")
+
+@app_commands.command(name='mergekeys', description='Merge duration from source key into target key')
+@app_commands.describe(source_key='Key to consume', target_key='Key to extend')
+@pipeline.command('admin', log=lambda i, source_key, target_key: {'details': {'source': source_key[:8], 'target': target_key[:8]}})
+async def mergekeys(interaction: discord.Interaction, source_key: str, target_key: str):
+    resp = await core.api_client.merge_keys(source_key, target_key)
+    if resp and resp.get("success"):
+        embed = embeds("Keys Merged", timestamp=True)
+        embed.add_field(name="Source", value=source_key[:8] + "...", inline=True)
+        embed.add_field(name="Target", value=target_key[:8] + "...", inline=True)
+        embed.add_field(name="New Duration", value=str(resp.get("target_duration_seconds")), inline=False)
+        embed.add_field(name="New Expiry", value=str(resp.get("target_expiry_timestamp")), inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await embeds.send_error(interaction, str(resp), title="Merge Failed")
+
+@app_commands.command(name='bulkgenerate', description='Generate multiple keys of a duration (no owner)')
+@app_commands.describe(
+    duration='Duration: 12h, 1d, 7d, 30d, 365d, LIFE',
+    count='How many keys to generate (max 200)'
+)
+@app_commands.choices(duration=[
+    app_commands.Choice(name='12 Hours', value='12h'),
+    app_commands.Choice(name='1 Day', value='1d'),
+    app_commands.Choice(name='7 Days', value='7d'),
+    app_commands.Choice(name='30 Days', value='30d'),
+    app_commands.Choice(name='1 Year', value='365d'),
+    app_commands.Choice(name='LIFE (5 Years)', value='LIFE'),
+])
+@pipeline.command('admin', log=lambda i, duration, count=10: {'details': {'duration': duration, 'count': count}})
+async def bulkgenerate(interaction: discord.Interaction, duration: str, count: int = 10):
+    parsed = parse_duration(duration)
+    if not parsed:
+        await embeds.send_error(interaction, "Use 12h, 1d, 7d, 30d, 365d, or LIFE.", title="Invalid Duration")
+        return
+    duration_seconds, duration_human = parsed
+    count = max(1, min(count, 200))
+    progress = ProgressReporter(interaction, "Generating Keys")
+    await progress.start(f"Creating {count} key(s)...")
+    result = await run_heavy('bulk_generate', {'duration_seconds': duration_seconds, 'count': count}, progress)
+    keys = []
+    for resp in result['created']:
+        key_index.add_response(resp['key'], {'discord_user_id': None, **resp})
+        keys.append(resp['key'])
+    failures = result['failures']
+    if not keys:
+        await embeds.send_error(interaction, "No keys were created. Check API connectivity.", title="Generation Failed")
+        return
+    file_content = "\n".join(keys)
+    file = discord.File(fp=io.BytesIO(file_content.encode('utf-8')), filename=f"keys_{duration.lower()}_{len(keys)}.txt")
+    desc = f"Generated **{len(keys)}** key(s) for {duration_human}."
+    if failures:
+        desc += f" Failed: {failures}"
+    embed = embeds("Bulk Keys Generated", desc)
+    await interaction.followup.send(embed=embed, file=file, ephemeral=True)
+
+MAX_GRANT_RECIPIENTS = 5000
+GRANT_CONCURRENCY = 8
+
+async def send_result(interaction: discord.Interaction, embed: discord.Embed, content: str, filename: str):
+    """Send a long command's result with its file as an ephemeral followup while the interaction token lasts.
+
+    Past that, DM it to the invoker instead; if DMs are closed, post the embed (without the
+    file, which may hold keys) in the command's channel.
+    """
+    def file() -> discord.File:
+        return discord.File(fp=io.BytesIO(content.encode('utf-8')), filename=filename)
+
+    if not token_expired(interaction):
+        try:
+            await interaction.followup.send(embed=embed, file=file(), ephemeral=True)
+            return
+        except discord.HTTPException as e:
+            print(f"[WARN] Result followup failed, falling back to DM: {e}")
+    try:
+        await outbox.send_dm(interaction.user, embed=embed, file=file())
+        return
+    except discord.HTTPException as e:
+        print(f"[WARN] Could not DM result to {interaction.user.name}: {e}")
+    if interaction.channel is not None:
+        await outbox.send(
+            interaction.channel, PRIORITY_INTERACTION,
+            content=f"{interaction.user.mention} your command finished after its reply window closed.",
+            embed=embed, allowed_mentions=discord.AllowedMentions(users=True)
+        )
+
+def parse_user_ids(text: str) -> list[int]:
+    seen = set()
+    ids = []
+    for raw in re.findall(r"\d{15,21}", text):
+        uid = int(raw)
+        if uid not in seen:
+            seen.add(uid)
+            ids.append(uid)
+    return ids
+
+@app_commands.command(name='grantkeys', description='Give keys to every member of a role or a list of user IDs')
+@app_commands.describe(
+    duration='Duration: 12h, 1d, 7d, 30d, 365d, LIFE',
+    role='Role whose members receive a key',
+    users_file='Text file of user IDs or mentions (used if no role is given)'
+)
+@app_commands.choices(duration=[
+    app_commands.Choice(name='12 Hours', value='12h'),
+    app_commands.Choice(name='1 Day', value='1d'),
+    app_commands.Choice(name='7 Days', value='7d'),
+    app_commands.Choice(name='30 Days', value='30d'),
+    app_commands.Choice(name='1 Year', value='365d'),
+    app_commands.Choice(name='LIFE (5 Years)', value='LIFE'),
+])
+@pipeline.command('admin', log=lambda i, duration, role=None, users_file=None: {'details': {'duration': duration}})
+async def grantkeys(interaction: discord.Interaction, duration: str, role: discord.Role = None, users_file: discord.Attachment = None):
+    parsed = parse_duration(duration)
+    if not parsed:
+        await embeds.send_error(interaction, "Use 12h, 1d, 7d, 30d, 365d, or LIFE.", title="Invalid Duration")
+        return
+    duration_seconds, duration_human = parsed
+
+    if role:
+        source = f"role:{role.name}"
+        recipients = [(m.id, m.name) for m in await members.fetch_with_role(interaction.guild, role) if not m.bot]
+    elif users_file:
+        source = f"file:{users_file.filename}"
+        text = (await users_file.read()).decode('utf-8', errors='ignore')
+        recipients = []
+        for uid in parse_user_ids(text):
+            cached = interaction.guild.get_member(uid) or interaction.client.get_user(uid)
+            recipients.append((uid, cached.name if cached else str(uid)))
+    else:
+        await embeds.send_error(interaction, "Provide a role or a file of user IDs.", title="No Recipients")
+        return
+
+    if not recipients:
+        await embeds.send(interaction, "No Recipients", "No users found to grant keys to.", color=discord.Color.orange())
+        return
+    if len(recipients) > MAX_GRANT_RECIPIENTS:
+        await embeds.send_error(interaction, f"Limit is {MAX_GRANT_RECIPIENTS} users per run (got {len(recipients)}).", title="Too Many Recipients")
+        return
+
+    total = len(recipients)
+    progress = ProgressReporter(interaction, "Granting Keys")
+    counts = {'created': 0, 'failed': 0, 'dm_sent': 0, 'dm_failed': 0}
+    rows = {}
+    dm_futures = []
+
+    def progress_text() -> str:
+        dms_pending = counts['created'] - counts['dm_sent'] - counts['dm_failed']
+        return (
+            f"Recipients: **{total}** ({duration_human})\n"
+            f"Keys created: **{counts['created']}**/{total} • Failed: {counts['failed']}\n"
+            f"DMs sent: **{counts['dm_sent']}** • Failed: {counts['dm_failed']} • Queued: {dms_pending}"
+        )
+
+    await progress.start(progress_text())
+
+    async def send_dm(uid: int, key: str, expiry: Optional[str]):
+        user = interaction.client.get_user(uid) or await interaction.client.fetch_user(uid)
+        await user.send(embed=build_key_dm_embed(interaction.user.name, key, duration_human, expiry))
+
+    def on_dm_done(uid: int, future: asyncio.Future):
+        error = future.exception() if not future.cancelled() else None
+        if future.cancelled() or error:
+            counts['dm_failed'] += 1
+            rows[uid]['dm_status'] = "DMs Disabled" if isinstance(error, discord.Forbidden) else "Failed"
+        else:
+            counts['dm_sent'] += 1
+            rows[uid]['dm_status'] = "Sent"
+
+    async def create(recipient):
+        uid, _ = recipient
+        return await core.api_client.create_key(duration_seconds=duration_seconds, discord_user_id=str(uid))
+
+    async def on_created(recipient, resp):
+        uid, name = recipient
+        row = {'user_id': uid, 'user_name': name, 'key': '', 'expires': '', 'status': 'failed', 'dm_status': 'Skipped'}
+        rows[uid] = row
+        if isinstance(resp, dict) and resp.get('key'):
+            counts['created'] += 1
+            row.update(key=resp['key'], expires=resp.get('expiry_timestamp') or '', status='created', dm_status='Queued')
+            future = outbox.submit(lambda: send_dm(uid, resp['key'], resp.get('expiry_timestamp')), PRIORITY_DM, 'dm')
+            future.add_done_callback(lambda f, uid=uid: on_dm_done(uid, f))
+            dm_futures.append(future)
+        else:
+            counts['failed'] += 1
+        await progress.update(progress_text())
+
+    await gather_bounded(recipients, create, limit=GRANT_CONCURRENCY, on_result=on_created)
+    await progress.update(progress_text(), force=True)
+
+    def build_csv(mask: bool) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['user_id', 'user_name', 'key', 'expires', 'status', 'dm_status'])
+        for uid, _ in recipients:
+            row = rows[uid]
+            key = row['key']
+            if mask and key:
+                key = f"{key[:8]}...{key[-8:]}"
+            writer.writerow([row['user_id'], row['user_name'], key, row['expires'], row['status'], row['dm_status']])
+        return buffer.getvalue()
+
+    filename = f"grantkeys_{duration.lower()}_{total}.csv"
+    # The keys exist now: deliver them while the interaction token is fresh. DMs drain through the
+    # rate-limited 'dm' lane and can take longer than the token lives, so they're reported separately.
+    embed = embeds("Keys Granted", color=discord.Color.green() if not counts['failed'] else discord.Color.orange(), timestamp=True)
+    embed.add_field(name="Source", value=source, inline=False)
+    embed.add_field(name="Duration", value=duration_human, inline=True)
+    embed.add_field(name="Created", value=f"{counts['created']}/{total}", inline=True)
+    embed.add_field(name="DMs", value=f"{counts['dm_sent']} sent, {len(dm_futures) - counts['dm_sent'] - counts['dm_failed']} queued", inline=True)
+    if not all(f.done() for f in dm_futures):
+        embed.add_field(name="Note", value="DM delivery continues in the progress message above; the final DM report goes to the audit channel.", inline=False)
+    await send_result(interaction, embed, build_csv(mask=False), filename)
+
+    while not all(f.done() for f in dm_futures):
+        await asyncio.wait(dm_futures, timeout=progress.min_interval)
+        await progress.update(progress_text())
+    await progress.update(progress_text(), force=True)
+
+    print(f"[OK] grantkeys: {counts['created']}/{total} keys, {counts['dm_sent']} DMs")
+    # Logged by the pipeline once every DM has settled: one audit event with the counts plus the masked CSV.
+    return {'details': {
+        'source': source, 'requested': total,
+        'created': counts['created'], 'failed': counts['failed'],
+        'dm_sent': counts['dm_sent'], 'dm_failed': counts['dm_failed']
+    }, 'attachment': {'filename': filename, 'content': build_csv(mask=True)}}
+
+@app_commands.command(name='pruneexpired', description='Delete expired keys only')
+@pipeline.command('admin', log=lambda i: {})
+async def pruneexpired(interaction: discord.Interaction):
+    response = await core.api_client.prune_expired_keys()
+    if response and response.get('success'):
+        scanned = response.get('accounts_scanned', 0)
+        deleted = response.get('keys_deleted', 0)
+        await embeds.send(
+            interaction,
+            "Expired Keys Pruned",
+            f"Accounts scanned: **{scanned}**\nKeys deleted: **{deleted}**",
+            color=discord.Color.green()
+        )
+        print(f"[OK] Pruned expired keys: {deleted} deleted")
+    else:
+        await embeds.send_error(interaction, "Could not prune expired keys.", title="Failed")
+
+@app_commands.command(name='keyinfo', description='View info about a specific key')
+@app_commands.describe(key='The license key to look up')
+@pipeline.command('admin', log=lambda i, key: {'details': {'key': key[:8]}}, audit=False)
+async def keyinfo(interaction: discord.Interaction, key: str):
+    info = await core.api_client.key_info(key)
+    if not info or info.get('error'):
+        await embeds.send_error(interaction, (info or {}).get('error', 'Unable to retrieve key info'), title="Key Not Found")
+        return
+    
+    embed = embeds("Key Information", f"Key: {key[:8]}...{key[-8:]}", timestamp=True)
+    embed.add_field(name="Status", value=info.get("status", "Unknown"), inline=True)
+    embed.add_field(name="HWID Set", value="Yes" if info.get("hwid_set") else "No", inline=True)
+    embed.add_field(name="Reset Count", value=str(info.get("reset_count", 0)), inline=True)
+    created_at = info.get("created_at")
+    expires_at = info.get("activation_expires_at") or info.get("expiry_timestamp")
+    created_text = f"<t:{int(datetime.fromisoformat(created_at).timestamp())}:f>" if created_at else "Unknown"
+    expires_text = f"<t:{int(datetime.fromisoformat(expires_at).timestamp())}:R>" if expires_at else "Unknown"
+    embed.add_field(name="Created", value=created_text, inline=False)
+    embed.add_field(name="Expires", value=expires_text, inline=False)
+    if info.get("discord_user_id"):
+        embed.add_field(name="Discord User ID", value=info.get("discord_user_id"), inline=True)
+    if info.get("email"):
+        embed.add_field(name="Email", value=info.get("email"), inline=True)
+    if info.get("location"):
+        loc = info["location"]
+        location_text = f"{loc.get('city', 'Unknown')}, {loc.get('region', 'Unknown')}, {loc.get('country', 'Unknown')}"
+        embed.add_field(name="Location", value=location_text, inline=False)
+    embed.add_field(
+        name="Signature History",
+        value=str(info.get("signature_history_count", 0)),
+        inline=True
+    )
+    embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='userkeys', description='List the keys owned by a Discord user')
+@app_commands.describe(user='Key owner', refresh='Re-scan the key inventory before looking up')
+@pipeline.command('admin', log=lambda i, user, refresh=False: {'target_user_id': user.id, 'target_user_name': user.name}, audit=False)
+async def userkeys(interaction: discord.Interaction, user: discord.User, refresh: bool = False):
+    if refresh or KEY_INVENTORY['synced_at'] is None:
+        progress = ProgressReporter(interaction, "Scanning Key Inventory")
+        await progress.start("Listing keys...")
+        await sync_key_inventory(progress)
+
+    keys = key_index.keys_for(user.id)
+    if not keys:
+        synced = KEY_INVENTORY['synced_at']
+        note = f" (inventory scanned <t:{int(synced.timestamp())}:R>)" if synced else ""
+        await embeds.send(interaction, "No Keys", f"No keys found for {user.mention}{note}.", color=discord.Color.orange())
+        return
+
+    shown = keys[:MAX_USERKEYS_SHOWN]
+    infos = await gather_bounded(shown, core.api_client.key_info, limit=USERKEYS_CONCURRENCY)
+
+    embed = embeds("User Keys", f"{user.mention} ({user.id}) • {len(keys)} key(s)", timestamp=True)
+    for key, info in zip(shown, infos):
+        if isinstance(info, BaseException) or not info or info.get('error'):
+            embed.add_field(name=f"{key[:8]}...{key[-8:]}", value="Status unavailable", inline=False)
+            continue
+        expires_at = info.get('activation_expires_at') or info.get('expiry_timestamp')
+        expires_text = f"<t:{int(datetime.fromisoformat(expires_at).timestamp())}:R>" if expires_at else "Unknown"
+        embed.add_field(
+            name=f"{key[:8]}...{key[-8:]}",
+            value=f"Status: {info.get('status', 'Unknown')} • Expires: {expires_text} • HWID: {'Set' if info.get('hwid_set') else 'Not set'}",
+            inline=False
+        )
+    if len(keys) > len(shown):
+        embed.add_field(name="More", value=f"{len(keys) - len(shown)} more key(s) not shown", inline=False)
+    if KEY_INVENTORY['partial']:
+        embed.add_field(name="Note", value="The inventory is larger than the local index; some keys may be missing.", inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def key_autocomplete(interaction: discord.Interaction, current: str) -> list:
+    # Answered from the local index only, never the API, to stay well inside the autocomplete deadline.
+    if not permissions.has(interaction.user, 'admin', interaction.guild_id):
+        return []
+    return [app_commands.Choice(name=key, value=key) for key in key_index.search(current.strip())]
+
+for _command, _params in (
+    (suspendkey, ('key',)),
+    (unsuspendkey, ('key',)),
+    (deletekey, ('key',)),
+    (clearkey, ('key',)),
+    (modifykey, ('key',)),
+    (mergekeys, ('source_key', 'target_key')),
+    (keyinfo, ('key',)),
+):
+    for _param in _params:
+        _command.autocomplete(_param)(key_autocomplete)
+
+@app_commands.command(name='keystats', description='View key statistics')
+@pipeline.command('dev', audit=False)
+async def keystats(interaction: discord.Interaction):
+    stats = await core.api_client.key_stats()
+    if not stats or stats.get('error'):
+        await embeds.send_error(interaction, (stats or {}).get('error', 'Unable to retrieve stats'), title="Stats Unavailable")
+        return
+    embed = embeds("Key Statistics", timestamp=True)
+    embed.add_field(name="Total Keys", value=str(stats.get("total_keys", 0)), inline=True)
+    embed.add_field(name="Latest Modified", value=stats.get("latest_modified", "Unknown"), inline=True)
+    embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='viewkeys', description='View keys from storage (paginated)')
+@pipeline.command('dev', audit=False)
+async def viewkeys(interaction: discord.Interaction):
+    page_size = 50
+    cache_pages = []
+    tokens = []
+
+    async def fetch_page(token: str = None):
+        resp = await core.api_client.list_keys(page_size=page_size, continuation_token=token)
+        return resp or {}
+
+    first = await fetch_page()
+    if not first.get("keys"):
+        await embeds.send(interaction, "Keys", "No keys found in storage.")
+        return
+    cache_pages.append(first)
+    tokens.append(first.get("next_continuation_token"))
+
+    def build_embed(idx: int) -> discord.Embed:
+        page = cache_pages[idx]
+        keys = page.get("keys", [])
+        total_known = sum(len(p.get("keys", [])) for p in cache_pages)
+        desc = f"Page {idx+1} • Showing {len(keys)} • Cached total seen: {total_known}"
+        embed = embeds("Keys in Storage", desc)
+        for k in keys:
+            name = k.get("key")
+            lm = k.get("last_modified")
+            size = k.get("size")
+            lm_txt = f"<t:{int(datetime.fromisoformat(lm).timestamp())}:R>" if lm else "unknown"
+            embed.add_field(name=name, value=f"Size: {size} bytes\nUpdated: {lm_txt}", inline=False)
+        return embed
+
+    class R2KeyPager(discord.ui.View):
+        def __init__(self):
+            super().__init__(timeout=120)
+            self.idx = 0
+
+        async def update(self, interaction: discord.Interaction):
+            await interaction.response.edit_message(embed=build_embed(self.idx), view=self)
+
+        @discord.ui.button(label="◀️ Prev", style=discord.ButtonStyle.secondary)
+        async def prev(self, interaction: discord.Interaction, button: discord.ui.Button):
+            if self.idx > 0:
+                self.idx -= 1
+            await self.update(interaction)
+
+        @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.secondary)
+        async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+            # fetch next page if needed
+            if self.idx == len(cache_pages) - 1:
+                next_token = tokens[self.idx] if self.idx < len(tokens) else None
+                if next_token:
+                    page = await fetch_page(next_token)
+                    cache_pages.append(page)
+                    tokens.append(page.get("next_continuation_token"))
+                    # if empty, don't advance
+                    if not page.get("keys"):
+                        await self.update(interaction)
+                        return
+            if self.idx < len(cache_pages) - 1:
+                self.idx += 1
+            await self.update(interaction)
+
+        @discord.ui.button(label="⏭️ Last", style=discord.ButtonStyle.secondary)
+        async def last(self, interaction: discord.Interaction, button: discord.ui.Button):
+            # fetch until no continuation or limit of 20 pages to avoid spam
+            while tokens and tokens[-1] and len(cache_pages) < 20:
+                page = await fetch_page(tokens[-1])
+                cache_pages.append(page)
+                tokens.append(page.get("next_continuation_token"))
+                if not page.get("keys"):
+                    break
+                if not page.get("next_continuation_token"):
+                    break
+            self.idx = len(cache_pages) - 1
+            await self.update(interaction)
+
+        @discord.ui.button(label="⏮️ First", style=discord.ButtonStyle.secondary)
+        async def first(self, interaction: discord.Interaction, button: discord.ui.Button):
+            self.idx = 0
+            await self.update(interaction)
+
+    view = R2KeyPager()
+    await interaction.followup.send(embed=build_embed(0), view=view, ephemeral=True)
+
+COMMANDS = (
+    givekey, suspendkey, unsuspendkey, deletekey, clearkey, bulkkeys, blacklist, modifykey,
+    mergekeys, bulkgenerate, grantkeys, pruneexpired, keyinfo, userkeys, keystats, viewkeys
+)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
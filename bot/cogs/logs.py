@@ -0,0 +1,57 @@
+"""Command log viewer."""
+
+import discord
+from discord import app_commands
+
+import bot as core
+from bot import BOT_NAME, embeds, guild_state, pipeline
+
+class LogPaginator:
+    def __init__(self, items, page_size=5):
+        self.items = items
+        self.page_size = page_size
+        self.total_pages = (len(items) + page_size - 1) // page_size
+    
+    def get_page(self, page_num):
+        if page_num < 0 or page_num >= self.total_pages:
+            return None
+        start = page_num * self.page_size
+        return self.items[start:start + self.page_size]
+
+@app_commands.command(name='modlogs', description='View all command logs')
+@app_commands.describe(page='Page number')
+@pipeline.command('owner', audit=False)
+async def modlogs(interaction: discord.Interaction, page: int = 1):
+    command_logs = guild_state(interaction.guild_id).command_logs
+    if not command_logs:
+        await embeds.send(interaction, "Command Logs", "No commands executed yet", color=discord.Color.greyple())
+        return
+    
+    reversed_logs = list(reversed(command_logs))
+    paginator = LogPaginator(reversed_logs, page_size=5)
+    
+    if page < 1 or page > paginator.total_pages:
+        await embeds.send_error(interaction, f"Pages: 1-{paginator.total_pages}", title="Invalid Page")
+        return
+    
+    page_logs = paginator.get_page(page - 1)
+    embed = embeds("Command Logs", f"Page {page}/{paginator.total_pages} | Total: {len(command_logs)}")
+    
+    for log in page_logs:
+        timestamp = log['timestamp'][:16]
+        executor = log['executor_name']
+        target = log['target_user_name'] or 'N/A'
+        details_str = ' '.join(f"{k}={v}" for k, v in log['details'].items()) if log['details'] else 'N/A'
+        embed.add_field(name=f"{log['command']} at {timestamp}", value=f"By: {executor}\nTarget: {target}\nDetails: {details_str}", inline=False)
+    
+    embed.set_footer(text=f"{BOT_NAME} | Page {page}/{paginator.total_pages}")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    print(f"[OK] Mod logs viewed by {interaction.user.name} - page {page}")
+
+COMMANDS = (modlogs,)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
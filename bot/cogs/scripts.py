@@ -0,0 +1,311 @@
+"""Script storage commands: upload, update, remove, release and list."""
+import asyncio
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+from utils import gather_bounded, iter_zip_member
+import bot as core
+from bot import BOT_THUMBNAIL, ProgressReporter, embeds, permissions, pipeline
+
+def describe_script_change(changed: dict) -> str:
+    if not changed or changed.get('new'):
+        return "New file"
+    delta = changed.get('size_delta', 0)
+    sign = '+' if delta >= 0 else ''
+    if changed.get('bytes_changed') is None:
+        return f"{sign}{delta} bytes"
+    return f"~{changed['bytes_changed']} bytes ({changed['blocks_changed']}/{changed['blocks_total']} blocks), {sign}{delta} bytes"
+
+async def send_script_result(interaction: discord.Interaction, title: str, filename: str, response: dict):
+    if response.get('unchanged'):
+        embed = embeds("Script Unchanged", f"`{filename}` already matches the uploaded file, nothing was sent.", color=discord.Color.greyple())
+        embed.add_field(name="SHA-256", value=f"`{response.get('sha256', '')[:16]}`", inline=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+    embed = embeds(title, color=discord.Color.green(), timestamp=True)
+    embed.add_field(name="File", value=filename, inline=True)
+    embed.add_field(name="Size", value=f"{response.get('size', 0)} bytes", inline=True)
+    embed.add_field(name="SHA-256", value=f"`{response.get('sha256', '')[:16]}`", inline=True)
+    embed.add_field(name="Changed", value=describe_script_change(response.get('changed')), inline=False)
+    embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='uploadscript', description='Upload obfuscated script to API')
+@app_commands.describe(attachment='Lua file to upload')
+@pipeline.command('owner', log=lambda i, attachment: {'details': {'file': attachment.filename, 'bytes': attachment.size}})
+async def uploadscript(interaction: discord.Interaction, attachment: discord.Attachment):
+    if not attachment:
+        await embeds.send_error(interaction, "Attach a .lua file.", title="Missing File")
+        return
+    allowed_ext = ('.lua', '.luau', '.txt')
+    if not attachment.filename.lower().endswith(allowed_ext):
+        await embeds.send_error(interaction, "Only .lua, .luau, or .txt files are allowed.", title="Invalid File")
+        return
+    response = await core.api_client.upload_script_file(core.api_client.iter_download(attachment.url), attachment.filename)
+    if response and response.get('success'):
+        await send_script_result(interaction, "Script Uploaded", attachment.filename, response)
+    else:
+        await embeds.send_error(interaction, str(response), title="Upload Failed")
+
+@app_commands.command(name='updatescript', description='Update/overwrite a script in API storage')
+@app_commands.describe(
+    attachment='Lua file to upload',
+    filename='Filename to save (optional, defaults to attachment name)',
+    force='Upload even if the file matches the stored version'
+)
+@pipeline.command('owner', log=lambda i, attachment, filename=None, force=False: {'details': {'file': filename or attachment.filename, 'bytes': attachment.size, 'force': force or None}})
+async def updatescript(interaction: discord.Interaction, attachment: discord.Attachment, filename: str = None, force: bool = False):
+    if not attachment:
+        await embeds.send_error(interaction, "Attach a .lua file.", title="Missing File")
+        return
+    target_name = filename.strip() if filename else attachment.filename
+    allowed_ext = ('.lua', '.luau', '.txt')
+    if not target_name.lower().endswith(allowed_ext):
+        await embeds.send_error(interaction, "Only .lua, .luau, or .txt files are allowed.", title="Invalid File")
+        return
+    response = await core.api_client.upload_script_file(core.api_client.iter_download(attachment.url), target_name, force=force)
+    if response and response.get('success'):
+        await send_script_result(interaction, "Script Updated", target_name, response)
+    else:
+        await embeds.send_error(interaction, str(response), title="Update Failed")
+
+@app_commands.command(name='removescript', description='Remove a script from API storage')
+@app_commands.describe(filename='Filename to delete (e.g., main.lua)')
+@pipeline.command('owner', log=lambda i, filename: {'details': {'file': filename}})
+async def removescript(interaction: discord.Interaction, filename: str):
+    resp = await core.api_client.delete_script(filename)
+    if resp and resp.get("success"):
+        embed = embeds("Script Removed", color=discord.Color.orange(), timestamp=True)
+        embed.add_field(name="File", value=filename, inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await embeds.send_error(interaction, str(resp), title="Remove Failed")
+
+# The event loop only keeps weak references to tasks, so the background refresh is held here.
+manifest_refresh: Optional[asyncio.Task] = None
+
+@updatescript.autocomplete('filename')
+@removescript.autocomplete('filename')
+async def script_name_autocomplete(interaction: discord.Interaction, current: str) -> list:
+    # Served from the local manifest only; a stale manifest is refreshed in the background.
+    global manifest_refresh
+    if core.api_client is None or not permissions.has(interaction.user, 'owner', interaction.guild_id):
+        return []
+    if not core.api_client.manifest_fresh and (manifest_refresh is None or manifest_refresh.done()):
+        manifest_refresh = asyncio.create_task(core.api_client.refresh_manifest())
+    needle = current.lower()
+    matches = [name for name in core.api_client.script_names() if needle in name.lower()]
+    return [app_commands.Choice(name=name, value=name) for name in matches[:25]]
+
+MAX_RELEASE_FILES = 50
+MAX_RELEASE_BYTES = 50 * 1024 * 1024
+RELEASE_CONCURRENCY = 4
+SCRIPT_EXTENSIONS = ('.lua', '.luau', '.txt')
+
+async def read_release_archive(attachment: discord.Attachment):
+    """Spool a zip attachment to a temp file and return (archive, members by script name) or an error string."""
+    spool = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    async for chunk in core.api_client.iter_download(attachment.url):
+        spool.write(chunk)
+    try:
+        archive = zipfile.ZipFile(spool)
+    except zipfile.BadZipFile:
+        spool.close()
+        return None, "The attachment is not a valid zip archive."
+    members = {}
+    total = 0
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        name = os.path.basename(info.filename)
+        if not name or name.startswith('.') or '__MACOSX' in info.filename:
+            continue
+        if not name.lower().endswith(SCRIPT_EXTENSIONS):
+            error = f"`{info.filename}` is not a .lua, .luau or .txt file."
+        elif name in members:
+            error = f"`{name}` appears more than once in the archive."
+        else:
+            error = None
+        if error:
+            archive.close()
+            return None, error
+        members[name] = info
+        total += info.file_size
+    if not members:
+        archive.close()
+        return None, "The archive contains no scripts."
+    if len(members) > MAX_RELEASE_FILES or total > MAX_RELEASE_BYTES:
+        archive.close()
+        return None, f"Releases are limited to {MAX_RELEASE_FILES} files and {MAX_RELEASE_BYTES // (1024 * 1024)} MB uncompressed."
+    return archive, members
+
+@app_commands.command(name='releasescripts', description='Upload a zip of scripts as one release, rolling back on failure')
+@app_commands.describe(
+    archive='Zip file containing the scripts to release',
+    force='Release even if some current versions have no local copy to roll back to'
+)
+@pipeline.command('owner', log=lambda i, archive, force=False: {'details': {'archive': archive.filename, 'force': force or None}})
+async def releasescripts(interaction: discord.Interaction, archive: discord.Attachment, force: bool = False):
+    if not archive.filename.lower().endswith('.zip'):
+        await embeds.send_error(interaction, "Attach a .zip file.", title="Invalid File")
+        return
+    zf, members = await read_release_archive(archive)
+    if zf is None:
+        await embeds.send_error(interaction, members, title="Invalid Release")
+        return
+
+    with zf:
+        await core.api_client.cached_scripts()
+        previous = {name: dict(core.api_client.script_manifest[name]) for name in members if name in core.api_client.script_manifest}
+        unrestorable = [name for name, entry in previous.items() if not core.api_client.has_script_blob(entry.get('sha256'))]
+        if unrestorable and not force:
+            listed = ", ".join(f"`{n}`" for n in unrestorable[:10])
+            await embeds.send_error(
+                interaction,
+                f"No local copy to roll back to for {listed}{' …' if len(unrestorable) > 10 else ''}. Re-run with `force` to release anyway.",
+                title="Rollback Unavailable"
+            )
+            return
+
+        names = sorted(members)
+        core.api_client.pinned_blobs.update(entry['sha256'] for entry in previous.values() if entry.get('sha256'))
+        progress = ProgressReporter(interaction, "Releasing Scripts")
+        await progress.start(f"Uploading {len(names)} file(s)...")
+        counts = {'done': 0}
+
+        async def upload(name: str):
+            member = members[name]
+            response = await core.api_client.upload_script_file(iter_zip_member(zf, member), name)
+            if not response or not response.get('success'):
+                raise RuntimeError(str(response)[:100])
+            # Checked only against what the API reports; None means it reported neither sha256 nor size.
+            if response.get('content_verified') is False:
+                raise RuntimeError(f"API stored different content (size {response.get('size')}, sent {member.file_size})")
+            return response
+
+        async def on_uploaded(name, result):
+            counts['done'] += 1
+            await progress.update(f"Uploaded {counts['done']}/{len(names)}")
+
+        try:
+            results = dict(zip(names, await gather_bounded(names, upload, limit=RELEASE_CONCURRENCY, on_result=on_uploaded)))
+            failed = {name: r for name, r in results.items() if isinstance(r, BaseException)}
+            written = [name for name, r in results.items() if not isinstance(r, BaseException) and not r.get('unchanged')]
+
+            # A failed upload may still have replaced the file (content mismatch, timeout after the
+            # write), so failed files with a stored previous version are restored too.
+            rollback_names = written + [
+                name for name in failed
+                if name in previous and core.api_client.has_script_blob(previous[name].get('sha256'))
+            ] if failed else []
+            rollback_failed = []
+            if rollback_names:
+                await progress.update(f"{len(failed)} upload(s) failed, rolling back {len(rollback_names)} file(s)...", force=True)
+
+                async def rollback(name: str):
+                    if name in previous:
+                        resp = await core.api_client.restore_script(name, previous[name])
+                    else:
+                        resp = await core.api_client.delete_script(name)
+                    if not resp or not resp.get('success'):
+                        raise RuntimeError(str(resp)[:100])
+
+                rolled = await gather_bounded(rollback_names, rollback, limit=RELEASE_CONCURRENCY)
+                rollback_failed = [name for name, r in zip(rollback_names, rolled) if isinstance(r, BaseException)]
+        finally:
+            core.api_client.pinned_blobs.difference_update(entry.get('sha256') for entry in previous.values())
+
+    unchanged = sum(1 for r in results.values() if not isinstance(r, BaseException) and r.get('unchanged'))
+    if failed:
+        embed = embeds("Release Failed", color=discord.Color.red(), timestamp=True)
+        failures = "\n".join(f"`{name}`: {err}" for name, err in list(failed.items())[:10])
+        embed.add_field(name=f"Failed ({len(failed)})", value=failures[:1024], inline=False)
+        if rollback_failed:
+            embed.add_field(name="Rollback Incomplete", value=", ".join(f"`{n}`" for n in rollback_failed)[:1024], inline=False)
+        else:
+            embed.add_field(name="Rolled Back", value=f"{len(rollback_names)} file(s) restored to their previous version", inline=False)
+    else:
+        embed = embeds("Release Complete", color=discord.Color.green(), timestamp=True)
+        embed.add_field(name="Updated", value=str(len(written)), inline=True)
+        embed.add_field(name="Unchanged", value=str(unchanged), inline=True)
+        embed.add_field(name="Files", value=", ".join(f"`{n}`" for n in names)[:1024], inline=False)
+        embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await progress.update("Done", force=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    return {'details': {
+        'files': len(names),
+        'updated': len(written),
+        'failed': len(failed),
+        'rolled_back': len(rollback_names) - len(rollback_failed),
+    }}
+
+@app_commands.command(name='listscripts', description='List stored scripts')
+@app_commands.describe(refresh='Re-list from the API instead of using the cached manifest')
+@pipeline.command('owner', audit=False)
+async def listscripts(interaction: discord.Interaction, refresh: bool = False):
+    scripts = await core.api_client.cached_scripts(refresh=refresh) or []
+    if not scripts:
+        await embeds.send(interaction, "Scripts", "No scripts found.")
+        return
+
+    page_size = 10
+    total_pages = (len(scripts) + page_size - 1) // page_size
+
+    def build_embed(pg: int) -> discord.Embed:
+        start = pg * page_size
+        chunk = scripts[start:start + page_size]
+        embed = embeds("Scripts", f"Page {pg+1}/{total_pages} • Total: {len(scripts)}")
+        for s in chunk:
+            name = s.get("name")
+            size = s.get("size", 0)
+            lm = s.get("last_modified")
+            lm_text = f"<t:{int(datetime.fromisoformat(lm).timestamp())}:R>" if lm else "unknown"
+            embed.add_field(name=name, value=f"Size: {size} bytes\nUpdated: {lm_text}", inline=False)
+        return embed
+
+    class ScriptPager(discord.ui.View):
+        def __init__(self):
+            super().__init__(timeout=60)
+            self.pg = 0
+
+        async def update(self, interaction: discord.Interaction):
+            await interaction.response.edit_message(embed=build_embed(self.pg), view=self)
+
+        @discord.ui.button(label="⏮️ First", style=discord.ButtonStyle.secondary)
+        async def first(self, interaction: discord.Interaction, button: discord.ui.Button):
+            self.pg = 0
+            await self.update(interaction)
+
+        @discord.ui.button(label="◀️ Prev", style=discord.ButtonStyle.secondary)
+        async def prev(self, interaction: discord.Interaction, button: discord.ui.Button):
+            if self.pg > 0:
+                self.pg -= 1
+            await self.update(interaction)
+
+        @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.secondary)
+        async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+            if self.pg < total_pages - 1:
+                self.pg += 1
+            await self.update(interaction)
+
+        @discord.ui.button(label="⏭️ Last", style=discord.ButtonStyle.secondary)
+        async def last(self, interaction: discord.Interaction, button: discord.ui.Button):
+            self.pg = total_pages - 1
+            await self.update(interaction)
+
+    view = ScriptPager()
+    await interaction.followup.send(embed=build_embed(0), view=view, ephemeral=True)
+
+COMMANDS = (uploadscript, updatescript, removescript, releasescripts, listscripts)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
@@ -0,0 +1,131 @@
+"""API settings and feature flag commands."""
+import time
+
+import discord
+from discord import app_commands
+
+import bot as core
+from bot import BOT_THUMBNAIL, embeds, pipeline
+
+SETTING_LABELS = {
+    'session_tokens_enabled': "Session Tokens",
+    'script_cache_enabled': "Script Cache",
+    'script_cache_ttl_seconds': "Script Cache TTL",
+    'max_active_keys_per_account': "Max Active Keys",
+    'hwid_reset_cooldown_hours': "HWID Reset Cooldown",
+    'enforce_roblox_ua': "Enforce Roblox UA",
+    'allow_shitty_unchwid': "Allow Un-HWID",
+}
+
+def format_setting(name: str, value) -> str:
+    if isinstance(value, bool):
+        return "Enabled" if value else "Disabled"
+    if name == 'script_cache_ttl_seconds':
+        return f"{value}s"
+    if name == 'hwid_reset_cooldown_hours':
+        return f"{value}h"
+    return str(value)
+
+@app_commands.command(name='apisettings', description='View API settings')
+@app_commands.describe(refresh='Re-read settings from the API instead of the cached snapshot')
+@pipeline.command('dev', audit=False)
+async def apisettings(interaction: discord.Interaction, refresh: bool = False):
+    settings = await core.api_client.get_settings(refresh=refresh)
+    if settings is None:
+        await embeds.send_error(interaction, "Unable to retrieve settings.", title="Settings Unavailable")
+        return
+    embed = embeds("API Settings", timestamp=True)
+    for name in list(SETTING_LABELS) + sorted(k for k in settings if k not in SETTING_LABELS):
+        if name in settings:
+            embed.add_field(name=SETTING_LABELS.get(name, name), value=format_setting(name, settings[name]), inline=True)
+    age = int(time.monotonic() - core.api_client.settings_fetched_at)
+    embed.add_field(name="Snapshot", value=f"{age}s old (refreshes every {core.api_client.settings_ttl}s)", inline=False)
+    embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='setsetting', description='Enable or disable a setting')
+@app_commands.describe(
+    setting='Setting to update',
+    enabled='Enable or disable'
+)
+@app_commands.choices(setting=[
+    app_commands.Choice(name='session_tokens_enabled', value='session_tokens_enabled'),
+    app_commands.Choice(name='allow_shitty_unchwid', value='allow_shitty_unchwid'),
+    app_commands.Choice(name='script_cache_enabled', value='script_cache_enabled'),
+    app_commands.Choice(name='enforce_roblox_ua', value='enforce_roblox_ua'),
+])
+@pipeline.command('admin', log=lambda i, setting, enabled: {'details': {'setting': setting.value, 'enabled': enabled}})
+async def setsetting(interaction: discord.Interaction, setting: app_commands.Choice[str], enabled: bool):
+    payload = {setting.value: enabled}
+    response = await core.api_client.update_settings(payload)
+    if response and response.get('unchanged'):
+        await embeds.send(interaction, "No Changes", f"`{setting.value}` is already **{enabled}**", color=discord.Color.greyple())
+    elif response and response.get('success'):
+        await embeds.send(interaction, "Setting Updated", f"`{setting.value}` set to **{enabled}**", color=discord.Color.green())
+    else:
+        await embeds.send_error(interaction, "Could not update settings.", title="Failed")
+
+@app_commands.command(name='setloader', description='Update loader-related settings')
+@app_commands.describe(
+    script_cache_ttl_seconds='30-3600 seconds',
+    max_active_keys_per_account='1-50',
+    hwid_reset_cooldown_hours='1-168 hours'
+)
+@pipeline.command('admin')
+async def setloader(interaction: discord.Interaction, script_cache_ttl_seconds: int = None, max_active_keys_per_account: int = None, hwid_reset_cooldown_hours: float = None):
+    payload = {}
+    if script_cache_ttl_seconds is not None:
+        payload["script_cache_ttl_seconds"] = script_cache_ttl_seconds
+    if max_active_keys_per_account is not None:
+        payload["max_active_keys_per_account"] = max_active_keys_per_account
+    if hwid_reset_cooldown_hours is not None:
+        payload["hwid_reset_cooldown_hours"] = hwid_reset_cooldown_hours
+    if not payload:
+        await embeds.send(interaction, "No Changes", "Provide at least one setting to update.", color=discord.Color.orange())
+        return
+    resp = await core.api_client.update_settings(payload)
+    if resp and resp.get("unchanged"):
+        await embeds.send(interaction, "No Changes", "All provided values already match the current settings.", color=discord.Color.greyple())
+    elif resp and resp.get("success"):
+        changed = resp.get("changed", {})
+        pretty = "\n".join(f"**{k}: {v}**" if k in changed else f"{k}: {v}" for k, v in resp.get("settings", {}).items())
+        await embeds.send(interaction, "Loader Settings Updated", pretty, color=discord.Color.green())
+        return {'details': dict(changed or payload)}
+    else:
+        await embeds.send_error(interaction, str(resp), title="Update Failed")
+
+@app_commands.command(name='enable', description='Enable a feature flag')
+@app_commands.describe(feature='Feature name (session-tokens)')
+@pipeline.command('owner', log=lambda i, feature: {'details': {'feature': feature}})
+async def enable_feature(interaction: discord.Interaction, feature: str):
+    if feature.lower() != 'session-tokens':
+        await embeds.send_error(interaction, "Supported: session-tokens", title="Unknown Feature")
+        return
+    response = await core.api_client.set_session_tokens(True)
+    if response and response.get('success'):
+        embed = embeds("Session Tokens Enabled", color=discord.Color.green(), timestamp=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await embeds.send_error(interaction, str(response), title="Enable Failed")
+
+@app_commands.command(name='disable', description='Disable a feature flag')
+@app_commands.describe(feature='Feature name (session-tokens)')
+@pipeline.command('owner', log=lambda i, feature: {'details': {'feature': feature}})
+async def disable_feature(interaction: discord.Interaction, feature: str):
+    if feature.lower() != 'session-tokens':
+        await embeds.send_error(interaction, "Supported: session-tokens", title="Unknown Feature")
+        return
+    response = await core.api_client.set_session_tokens(False)
+    if response and response.get('success'):
+        embed = embeds("Session Tokens Disabled", color=discord.Color.orange(), timestamp=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await embeds.send_error(interaction, str(response), title="Disable Failed")
+
+COMMANDS = (apisettings, setsetting, setloader, enable_feature, disable_feature)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
@@ -0,0 +1,178 @@
+"""Bot and API status commands."""
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+import bot as core
+from bot import (
+    BOT_START_TIME, BOT_THUMBNAIL, GUILD_STATE, MAX_LOGS, audit_sink, config, embeds,
+    expiry_scheduler, guild_state, health_monitor, jobs, key_index, members, outbox,
+    pipeline, worker
+)
+
+@app_commands.command(name='apistatus', description='Check API status')
+@app_commands.describe(refresh='Probe the API now instead of using the last background check')
+@pipeline.command('dev', audit=False)
+async def apistatus(interaction: discord.Interaction, refresh: bool = False):
+    if refresh or health_monitor.last_checked is None:
+        await health_monitor.probe()
+    status_text = health_monitor.last_status or "unknown"
+    color = discord.Color.green() if status_text == "ok" else discord.Color.red()
+    embed = embeds("API Status", color=color, timestamp=True)
+    embed.add_field(name="Status", value=status_text, inline=True)
+    embed.add_field(name="Checked", value=f"<t:{int(health_monitor.last_checked)}:R>", inline=True)
+    uptime = health_monitor.uptime_pct
+    if uptime is not None:
+        embed.add_field(name=f"Uptime (last {len(health_monitor.samples)})", value=f"{uptime:.1f}% • Errors: {100 - uptime:.1f}%", inline=True)
+    latency = health_monitor.latency_stats()
+    if latency:
+        embed.add_field(
+            name="Latency",
+            value=f"Last {latency['last']:.0f}ms • p50 {latency['p50']:.0f}ms • p95 {latency['p95']:.0f}ms • Max {latency['max']:.0f}ms",
+            inline=False
+        )
+    spark = health_monitor.sparkline()
+    if spark:
+        embed.add_field(name="History", value=f"`{spark}`", inline=False)
+    embed.add_field(name="API Base", value=config.API_BASE, inline=False)
+    embed.set_thumbnail(url=BOT_THUMBNAIL)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='getbotuptime', description='View bot uptime and status')
+@pipeline.command('dev', audit=False)
+async def getbotuptime(interaction: discord.Interaction):
+    uptime = datetime.now() - BOT_START_TIME
+    days = uptime.days
+    hours, remainder = divmod(uptime.seconds, 3600)
+    minutes = remainder // 60
+    
+    embed = embeds("Bot Status", color=discord.Color.green())
+    embed.add_field(name="Status", value="Online", inline=True)
+    embed.add_field(name="Uptime", value=f"{days}d {hours}h {minutes}m", inline=True)
+    embed.add_field(name="Guilds", value=len(interaction.client.guilds), inline=True)
+    embed.add_field(name="Users", value=len(interaction.client.users), inline=True)
+    embed.add_field(name="Logged Commands", value=len(guild_state(interaction.guild_id).command_logs), inline=True)
+    embed.add_field(name="Started", value=f"<t:{int(BOT_START_TIME.timestamp())}:f>", inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    print(f"[OK] Bot status viewed by {interaction.user.name}")
+
+@app_commands.command(name='botstats', description='View bot stats and health')
+@pipeline.command('dev', audit=False)
+async def botstats(interaction: discord.Interaction):
+    uptime = datetime.now() - BOT_START_TIME
+    days = uptime.days
+    hours, remainder = divmod(uptime.seconds, 3600)
+    minutes = remainder // 60
+    state = guild_state(interaction.guild_id)
+    log_full = len(state.command_logs) >= MAX_LOGS
+    log_note = "MAX LOGS REACHED (auto-pruning)" if log_full else f"{len(state.command_logs)}/{MAX_LOGS}"
+
+    embed = embeds("Bot Stats", timestamp=True)
+    embed.add_field(name="Status", value="Online", inline=True)
+    embed.add_field(name="Uptime", value=f"{days}d {hours}h {minutes}m", inline=True)
+    embed.add_field(name="Guilds", value=len(interaction.client.guilds), inline=True)
+    embed.add_field(name="Users", value=len(interaction.client.users), inline=True)
+    embed.add_field(name="Command Logs", value=log_note, inline=False)
+    embed.add_field(name="Vouch Targets", value=str(len(state.vouches)), inline=True)
+    if len(GUILD_STATE) > 1:
+        embed.add_field(
+            name="Configured Guilds",
+            value=f"{len(GUILD_STATE)} • Shards: {interaction.client.shard_count or 1} • Logs: {sum(len(st.command_logs) for st in GUILD_STATE.values())} • Vouch targets: {sum(len(st.vouches) for st in GUILD_STATE.values())}",
+            inline=False
+        )
+    next_prune = f"<t:{int(expiry_scheduler.next_run)}:R> ({expiry_scheduler.next_reason})" if expiry_scheduler.next_run else "Not scheduled"
+    embed.add_field(
+        name="Expiry Scheduler",
+        value=f"Next run: {next_prune}\nTracked: {len(expiry_scheduler)} • Reminders queued: {expiry_scheduler.reminders_pending} • Prunes: {expiry_scheduler.metrics['prunes']} • Reminders sent: {expiry_scheduler.metrics['reminders']}",
+        inline=False
+    )
+    embed.add_field(name="Indexed Keys", value=f"{len(key_index)}/{key_index.capacity} • Owners: {key_index.owner_count}", inline=True)
+    embed.add_field(name="Audit Queue", value=f"Pending: {len(audit_sink.pending)} • Messages: {audit_sink.metrics['messages']} • Digests: {audit_sink.metrics['digests']}", inline=False)
+    out = outbox.stats()
+    depth = " • ".join(f"{name}: {n}" for name, n in out['depth'].items())
+    embed.add_field(
+        name="Outbound Queue",
+        value=f"{depth}\nSent: {out['sent']} • Failed: {out['failed']} • 429s: {out['rate_limited']} • Coalesced: {out['coalesced']} • Peak: {out['max_depth']}",
+        inline=False
+    )
+    if core.api_client:
+        reads = core.api_client.coalesce_stats
+        shared_pct = 100 * reads['coalesced'] / reads['reads'] if reads['reads'] else 0
+        top = sorted(core.api_client.coalesced_by_endpoint.items(), key=lambda kv: kv[1], reverse=True)[:3]
+        value = f"Reads: {reads['reads']} • Coalesced: {reads['coalesced']} ({shared_pct:.0f}%) • In flight: {core.api_client.inflight_reads}"
+        if top:
+            value += "\n" + " • ".join(f"`{endpoint}`: {n}" for endpoint, n in top)
+        embed.add_field(name="API Read Coalescing", value=value, inline=False)
+    cache = members.stats(interaction.client.guilds)
+    ready = f"{core.READY_AFTER:.1f}s" if core.READY_AFTER is not None else "n/a"
+    value = f"Policy: {members.policy} • Cached: {cache['cached']}/{cache['total']} • Ready after: {ready}"
+    if members.enabled:
+        m = members.metrics
+        value += (f"\nPinned: {cache['pinned']} • Hits: {m['hits']} • Fetches: {m['fetches']} • "
+                  f"Est. saved: {cache['saved_bytes'] / (1024 * 1024):.1f} MiB, {cache['total'] - cache['cached']} members not chunked at startup")
+    embed.add_field(name="Member Cache", value=value, inline=False)
+    if worker:
+        status = f"PID {worker.process.pid}" if worker.running else "Stopped (starts on next job)"
+        w = worker.metrics
+        embed.add_field(
+            name="Worker Process",
+            value=f"{status} • In flight: {worker.in_flight} • Done: {w['completed']} • Failed: {w['failed']} • Restarts: {w['restarts']}",
+            inline=False
+        )
+    busiest = sorted(pipeline.stats.items(), key=lambda kv: kv[1].count, reverse=True)[:5]
+    if busiest and busiest[0][1].count:
+        lines = [
+            f"/{name}: {s.count} runs • avg {s.avg_ms:.0f}ms • max {s.max_ms:.0f}ms • guard {s.avg_overhead_us:.0f}µs"
+            for name, s in busiest if s.count
+        ]
+        embed.add_field(name="Command Timings", value="\n".join(lines), inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+def _ago(ts: Optional[float]) -> str:
+    return f"<t:{int(ts)}:R>" if ts else "never"
+
+@app_commands.command(name='jobs', description='View background jobs')
+@app_commands.describe(run='Job to run now')
+@pipeline.command('dev', log=lambda i, run=None: {'details': {'run': run} if run else {}}, audit=False)
+async def jobs_command(interaction: discord.Interaction, run: Optional[str] = None):
+    note = None
+    if run:
+        if run not in jobs.jobs:
+            await embeds.send_error(interaction, f"Known jobs: {', '.join(sorted(jobs.jobs))}", title="Unknown Job")
+            return
+        note = f"`{run}` triggered." if jobs.trigger(run) else f"`{run}` is already running, skipped."
+
+    embed = embeds("Background Jobs", note, timestamp=True)
+    for job in jobs.status():
+        if job.running:
+            state = "🔄 Running"
+        elif job.last_error:
+            state = f"⚠️ Failing ({job.failures}x): {job.last_error[:80]}"
+        else:
+            state = "✅ OK" if job.runs else "⏳ Waiting"
+        duration = f"{job.last_duration * 1000:.0f}ms" if job.last_duration is not None else "-"
+        embed.add_field(
+            name=job.name,
+            value=f"{state}\nLast: {_ago(job.last_start)} ({duration}) • Next: {_ago(job.next_run)}\nRuns: {job.runs} • Skipped: {job.skipped}",
+            inline=False
+        )
+    embed.add_field(
+        name="prune (expiry-driven)",
+        value=f"Next: {_ago(expiry_scheduler.next_run)} ({expiry_scheduler.next_reason}) • Last: {_ago(expiry_scheduler.last_prune if expiry_scheduler.metrics['prunes'] else None)}\nPrunes: {expiry_scheduler.metrics['prunes']}",
+        inline=False
+    )
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@jobs_command.autocomplete('run')
+async def job_name_autocomplete(interaction: discord.Interaction, current: str) -> list:
+    return [app_commands.Choice(name=name, value=name) for name in sorted(jobs.jobs) if current.lower() in name][:25]
+
+COMMANDS = (apistatus, getbotuptime, botstats, jobs_command)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
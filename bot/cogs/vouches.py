@@ -0,0 +1,41 @@
+"""Vouch lookup commands. Counting vouches happens in bot.py's message events."""
+
+import discord
+from discord import app_commands
+
+import bot as core
+from bot import embeds, get_vouch_count, guild_state, pipeline
+
+@app_commands.command(name='vouchstats', description='View vouch stats for a user')
+@app_commands.describe(user='User to check')
+@pipeline.command('dev', audit=False)
+async def vouchstats(interaction: discord.Interaction, user: discord.User):
+    count = get_vouch_count(user.id, interaction.guild_id)
+    embed = embeds("Vouch Stats", timestamp=True)
+    embed.add_field(name="User", value=f"{user.mention} ({user.id})", inline=False)
+    embed.add_field(name="Vouches", value=str(count), inline=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@app_commands.command(name='topvouches', description='Leaderboard for vouches')
+@pipeline.command('dev', audit=False)
+async def topvouches(interaction: discord.Interaction):
+    sorted_vouches = sorted(guild_state(interaction.guild_id).vouches.items(), key=lambda item: item[1].get("count", 0), reverse=True)
+    top = sorted_vouches[:10]
+    if not top:
+        await embeds.send(interaction, "Top Vouches", "No vouches yet.")
+        return
+    embed = embeds("Top Vouches", timestamp=True)
+    for idx, (user_id, record) in enumerate(top, start=1):
+        count = record.get("count", 0)
+        member = interaction.guild.get_member(int(user_id))
+        name = member.mention if member else f"<@{user_id}>"
+        embed.add_field(name=f"#{idx} {name}", value=f"{count} vouches", inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+COMMANDS = (vouchstats, topvouches)
+
+async def setup(bot):
+    core.add_commands(COMMANDS)
+
+async def teardown(bot):
+    core.remove_commands(COMMANDS)
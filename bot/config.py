@@ -7,6 +7,23 @@ class Config:
     AUDIT_CHANNEL_ID = int(os.getenv("AUDIT_CHANNEL_ID", "0"))
     API_BASE = os.getenv("API_BASE", "").strip()
     BOT_SECRET = os.getenv("BOT_SECRET", "").strip()
+    PRUNE_MAX_INTERVAL_HOURS = float(os.getenv("PRUNE_MAX_INTERVAL_HOURS", "6"))
+    # Owner DMs before a key expires are opt-in.
+    EXPIRY_REMINDERS = os.getenv("EXPIRY_REMINDERS", "").strip().lower() in ("1", "true", "yes")
+    EXPIRY_REMINDER_HOURS = float(os.getenv("EXPIRY_REMINDER_HOURS", "24"))
+    GATEWAY_RECORD_FILE = os.getenv("GATEWAY_RECORD_FILE", "").strip()
+    GUILDS_FILE = os.getenv("GUILDS_FILE", "guilds.json").strip()
+    SHARDED = os.getenv("SHARDED", "").strip().lower() in ("1", "true", "yes")
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+    WORKER_PROCESS = os.getenv("WORKER_PROCESS", "").strip().lower() in ("1", "true", "yes")
+    # "relevant" turns off discord.py's member cache, so on_member_update stops firing for uncached
+    # members: role changes made outside the bot are only seen when a member is fetched again.
+    MEMBER_CACHE = os.getenv("MEMBER_CACHE", "full").strip().lower()
+    MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "500"))
+    # Vouch deletes use raw events, so discord.py's message cache isn't needed (0 disables it).
+    MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "0"))
+    # Command extensions to load at startup (comma-separated, e.g. "keys,status"); empty loads all.
+    EXTENSIONS = [name.strip() for name in os.getenv("EXTENSIONS", "").split(",") if name.strip()]
 
     @classmethod
     def validate(cls):
@@ -16,6 +33,8 @@ class Config:
             raise ValueError("API_BASE environment variable must be set")
         if not cls.BOT_SECRET:
             raise ValueError("BOT_SECRET environment variable must be set")
-        if not cls.GUILD_ID or not cls.ADMIN_ROLE_ID:
-            raise ValueError("GUILD_ID and ADMIN_ROLE_ID environment variables must be set")
+        if (not cls.GUILD_ID or not cls.ADMIN_ROLE_ID) and not os.path.exists(cls.GUILDS_FILE):
+            raise ValueError(f"GUILD_ID and ADMIN_ROLE_ID environment variables must be set, or guilds listed in {cls.GUILDS_FILE}")
+        if cls.MEMBER_CACHE not in ("full", "relevant"):
+            raise ValueError("MEMBER_CACHE must be 'full' or 'relevant'")
         return True
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+PRUNE_GRACE = 60               # wait for more keys to expire before pruning
+MIN_PRUNE_INTERVAL = 300       # never prune more often than this, however many keys expire
+MAX_TRACKED_EXPIRIES = 100000
+
+
+def parse_expiry(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+class ExpiryScheduler:
+    """Runs ``prune_expired_keys`` when known keys have actually expired, instead of on a fixed clock.
+
+    Expiry times learned from API responses go into a min-heap. The loop sleeps
+    until the earliest of: the first pending expiry (plus ``PRUNE_GRACE`` so
+    neighbouring expiries share one prune), the next owner reminder, or
+    ``max_interval`` since the last prune. The fallback interval still catches
+    keys the bot has never seen. Heap entries are invalidated lazily, by
+    comparing against ``_expiry`` when popped.
+
+    Reminders are off unless ``remind`` is given. They go out ``reminder_lead``
+    seconds before expiry, only for keys that cross that threshold while the
+    scheduler is running: the reminder time must be after both the moment the
+    key was tracked and ``started_at``. A deploy or restart therefore never
+    DMs owners whose keys were already inside the window, including keys
+    tracked before ``start()``.
+    """
+
+    def __init__(
+        self,
+        prune: Callable[[], Awaitable[Optional[int]]],
+        remind: Optional[Callable[[str, str, float], Awaitable[Any]]] = None,
+        max_interval: float = 6 * 3600,
+        reminder_lead: float = 24 * 3600
+    ):
+        self.prune = prune
+        self.remind = remind
+        self.max_interval = max_interval
+        self.reminder_lead = reminder_lead
+        self._expiry: Dict[str, float] = {}
+        self._owners: Dict[str, str] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._reminders: List[Tuple[float, str]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.last_prune: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.next_run: Optional[float] = None
+        self.next_reason = 'interval'
+        self.metrics = {'prunes': 0, 'pruned_keys': 0, 'reminders': 0}
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    @property
+    def reminders_pending(self) -> int:
+        return len(self._reminders)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self.last_prune = time.time()
+            if self.started_at is None:
+                self.started_at = self.last_prune
+            self._task = asyncio.create_task(self._run())
+
+    def track(self, key: str, expires_at: Any, owner: Optional[str] = None):
+        expires = parse_expiry(expires_at)
+        if expires is None:
+            return
+        if owner:
+            self._owners[key] = owner
+        if self._expiry.get(key) == expires:
+            return
+        if key not in self._expiry and len(self._expiry) >= MAX_TRACKED_EXPIRIES:
+            return
+        self._expiry[key] = expires
+        heapq.heappush(self._heap, (expires, key))
+        remind_at = expires - self.reminder_lead
+        if self.remind and self.reminder_lead > 0 and remind_at > max(time.time(), self.started_at or 0):
+            heapq.heappush(self._reminders, (remind_at, key))
+        if self.next_run is None or expires + PRUNE_GRACE < self.next_run or remind_at < self.next_run:
+            self._wake.set()
+
+    def forget(self, key: str):
+        self._expiry.pop(key, None)
+        self._owners.pop(key, None)
+
+    def _peek(self, heap: List[Tuple[float, str]], offset: float = 0.0) -> Optional[float]:
+        while heap:
+            at, key = heap[0]
+            expires = self._expiry.get(key)
+            if expires is not None and expires - offset == at:
+                return at
+            heapq.heappop(heap)
+        return None
+
+    def _schedule(self) -> float:
+        candidates = [(self.last_prune + self.max_interval, 'interval')]
+        first_expiry = self._peek(self._heap)
+        if first_expiry is not None:
+            candidates.append((max(first_expiry + PRUNE_GRACE, self.last_prune + MIN_PRUNE_INTERVAL), 'expired keys'))
+        first_reminder = self._peek(self._reminders, self.reminder_lead)
+        if first_reminder is not None:
+            candidates.append((first_reminder, 'reminder'))
+        self.next_run, self.next_reason = min(candidates)
+        return self.next_run
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            delay = self._schedule() - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self._tick()
+            except Exception as e:
+                print(f"[ERROR] Expiry scheduler tick failed: {e}")
+                await asyncio.sleep(30)
+
+    async def _tick(self):
+        now = time.time()
+        await self._send_reminders(now)
+        expired = []
+        while self._peek(self._heap) is not None and self._heap[0][0] <= now:
+            _, key = heapq.heappop(self._heap)
+            expired.append(key)
+        due = now >= self.last_prune + self.max_interval
+        if expired and now < self.last_prune + MIN_PRUNE_INTERVAL and not due:
+            # Too soon after the last prune; put them back and let _schedule pick the allowed time.
+            for key in expired:
+                heapq.heappush(self._heap, (self._expiry[key], key))
+            return
+        if not expired and not due:
+            return
+        print(f"[TASK] Pruning expired keys ({len(expired)} known expired, {'interval' if due else 'expiry'} trigger)")
+        deleted = await self.prune()
+        self.last_prune = time.time()
+        self.metrics['prunes'] += 1
+        if deleted is None:
+            # The API call failed; keep the keys queued so the next attempt covers them.
+            for key in expired:
+                heapq.heappush(self._heap, (self._expiry[key], key))
+            return
+        self.metrics['pruned_keys'] += deleted
+        for key in expired:
+            self.forget(key)
+
+    async def _send_reminders(self, now: float):
+        while self._peek(self._reminders, self.reminder_lead) is not None and self._reminders[0][0] <= now:
+            remind_at, key = heapq.heappop(self._reminders)
+            owner = self._owners.get(key)
+            expires = self._expiry.get(key)
+            if not owner or expires is None or expires <= now:
+                continue
+            if self.started_at is None or remind_at <= self.started_at:
+                # Crossed before the scheduler started (e.g. tracked during startup).
+                continue
+            try:
+                await self.remind(key, owner, expires)
+                self.metrics['reminders'] += 1
+            except Exception as e:
+                print(f"[WARN] Expiry reminder failed: {e}")
@@ -0,0 +1,178 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Set
+
+
+class GuildConfig:
+    __slots__ = (
+        'guild_id', 'name', 'admin_role_id', 'developer_role_id', 'owner_role_id',
+        'audit_channel_id', 'vouch_channel_id', 'trusted_role_id', 'staff_role_ids'
+    )
+
+    def __init__(
+        self,
+        guild_id: int,
+        admin_role_id: int,
+        developer_role_id: int,
+        owner_role_id: int,
+        audit_channel_id: int = 0,
+        vouch_channel_id: int = 0,
+        trusted_role_id: int = 0,
+        staff_role_ids: Iterable[int] = (),
+        name: str = ''
+    ):
+        self.guild_id = guild_id
+        self.name = name or str(guild_id)
+        self.admin_role_id = admin_role_id
+        self.developer_role_id = developer_role_id
+        self.owner_role_id = owner_role_id
+        self.audit_channel_id = audit_channel_id
+        self.vouch_channel_id = vouch_channel_id
+        self.trusted_role_id = trusted_role_id
+        self.staff_role_ids = frozenset(staff_role_ids)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], defaults: 'GuildConfig') -> 'GuildConfig':
+        """Build a guild entry from ``guilds.json``; fields it leaves out come from ``defaults``."""
+        def field(name: str) -> int:
+            return int(data.get(name, getattr(defaults, name)) or 0)
+
+        return cls(
+            guild_id=int(data['guild_id']),
+            name=str(data.get('name', '')),
+            admin_role_id=field('admin_role_id'),
+            developer_role_id=field('developer_role_id'),
+            owner_role_id=field('owner_role_id'),
+            audit_channel_id=field('audit_channel_id'),
+            vouch_channel_id=field('vouch_channel_id'),
+            trusted_role_id=field('trusted_role_id'),
+            staff_role_ids=[int(r) for r in data.get('staff_role_ids', defaults.staff_role_ids)],
+        )
+
+    def tiers(self) -> Dict[str, List[int]]:
+        return {
+            'admin': [self.admin_role_id],
+            'dev': [self.developer_role_id],
+            'owner': [self.owner_role_id],
+            'staff': sorted(self.staff_role_ids),
+        }
+
+
+def load_guild_configs(path: str, defaults: GuildConfig) -> List[GuildConfig]:
+    """Guilds from ``path`` (``{"guilds": [{"guild_id": ..., ...}]}``), or just ``defaults`` without one.
+
+    The first guild is the primary one: it keeps the original state file names.
+    """
+    if not os.path.exists(path):
+        return [defaults]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('guilds', []) if isinstance(data, dict) else data
+    guilds = [GuildConfig.from_dict(entry, defaults) for entry in entries]
+    if not guilds:
+        raise ValueError(f"{path} does not list any guilds")
+    if len({g.guild_id for g in guilds}) != len(guilds):
+        raise ValueError(f"{path} lists a guild more than once")
+    return guilds
+
+
+class GuildState:
+    """One guild's vouches, vouch message index and command log, each saved to its own file.
+
+    ``max_logs`` and ``max_vouch_logs`` cap every guild separately, so memory
+    grows with the number of guilds served and not with the busiest one.
+    """
+
+    def __init__(self, config: GuildConfig, logs_file: str, vouches_file: str, max_logs: int, max_vouch_logs: int):
+        self.config = config
+        self.logs_file = logs_file
+        self.vouches_file = vouches_file
+        self.max_logs = max_logs
+        self.max_vouch_logs = max_vouch_logs
+        self.command_logs: List[Dict[str, Any]] = []
+        self.vouches: Dict[str, Dict[str, Any]] = {}
+        self.vouch_index: Dict[str, int] = {}
+        self.dirty = {'logs': False, 'vouches': False}
+        # Trusted-role holders the last reconcile verified; see reconcile_trusted_roles.
+        self.trusted_checked: Set[int] = set()
+
+    @property
+    def guild_id(self) -> int:
+        return self.config.guild_id
+
+    def load_logs(self):
+        try:
+            if os.path.exists(self.logs_file):
+                with open(self.logs_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    self.command_logs = data[-self.max_logs:]
+        except Exception as e:
+            print(f"Warning: Could not load command logs for guild {self.guild_id}: {e}")
+
+    def load_vouches(self):
+        try:
+            if os.path.exists(self.vouches_file):
+                with open(self.vouches_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.vouches = data
+            self.vouch_index.clear()
+            for user_id, record in self.vouches.items():
+                for entry in record.get("entries", []):
+                    msg_id = entry.get("message_id")
+                    if msg_id:
+                        self.vouch_index[str(msg_id)] = int(user_id)
+        except Exception as e:
+            print(f"Warning: Could not load vouches for guild {self.guild_id}: {e}")
+
+    def save_logs(self):
+        try:
+            with open(self.logs_file, 'w', encoding='utf-8') as f:
+                json.dump(self.command_logs[-self.max_logs:], f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving logs: {e}")
+
+    def save_vouches(self):
+        try:
+            with open(self.vouches_file, 'w', encoding='utf-8') as f:
+                json.dump(self.vouches, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving vouches: {e}")
+
+    def flush(self):
+        if self.dirty['logs']:
+            self.dirty['logs'] = False
+            self.save_logs()
+        if self.dirty['vouches']:
+            self.dirty['vouches'] = False
+            self.save_vouches()
+
+    def append_log(self, entry: Dict[str, Any]):
+        self.command_logs.append(entry)
+        if len(self.command_logs) > self.max_logs:
+            self.command_logs.pop(0)
+        self.dirty['logs'] = True
+
+    def vouch_count(self, user_id: int) -> int:
+        return int(self.vouches.get(str(user_id), {}).get("count", 0))
+
+
+def state_file(base: str, guild_id: int, primary: bool) -> str:
+    if primary:
+        return base
+    stem, ext = os.path.splitext(base)
+    return f"{stem}_{guild_id}{ext}"
+
+
+def build_states(guilds: List[GuildConfig], logs_file: str, vouches_file: str, max_logs: int, max_vouch_logs: int) -> Dict[int, GuildState]:
+    return {
+        g.guild_id: GuildState(
+            g,
+            state_file(logs_file, g.guild_id, i == 0),
+            state_file(vouches_file, g.guild_id, i == 0),
+            max_logs,
+            max_vouch_logs
+        )
+        for i, g in enumerate(guilds)
+    }
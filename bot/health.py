@@ -0,0 +1,78 @@
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+HEALTH_HISTORY = 120
+
+
+class HealthMonitor:
+    """Keeps the results of periodic ``GET /health`` probes in a fixed-size ring buffer.
+
+    ``/apistatus`` reads from here instead of probing inline. ``available`` goes
+    false after ``failure_threshold`` consecutive failed probes, so callers can
+    skip API work while it is down.
+    """
+
+    def __init__(self, probe: Callable[[], Awaitable[Optional[Dict[str, Any]]]], size: int = HEALTH_HISTORY, failure_threshold: int = 3):
+        self._probe = probe
+        self.samples: Deque[Tuple[float, bool, float]] = deque(maxlen=size)
+        self.failure_threshold = failure_threshold
+        self.consecutive_failures = 0
+        self.last_status: Optional[str] = None
+        self.last_checked: Optional[float] = None
+        self.total_probes = 0
+        self.total_failures = 0
+
+    async def probe(self) -> bool:
+        started = time.perf_counter()
+        try:
+            health = await self._probe()
+        except Exception:
+            health = None
+        latency_ms = (time.perf_counter() - started) * 1000
+        status = health.get("status", "unknown") if health else "unreachable"
+        ok = status == "ok"
+        self.samples.append((time.time(), ok, latency_ms))
+        self.last_status = status
+        self.last_checked = time.time()
+        self.total_probes += 1
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+        return ok
+
+    @property
+    def available(self) -> bool:
+        return self.consecutive_failures < self.failure_threshold
+
+    @property
+    def uptime_pct(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        return 100.0 * sum(1 for _, ok, _ in self.samples if ok) / len(self.samples)
+
+    def latency_stats(self) -> Optional[Dict[str, float]]:
+        latencies = sorted(ms for _, ok, ms in self.samples if ok)
+        if not latencies:
+            return None
+        return {
+            'last': next((ms for _, ok, ms in reversed(self.samples) if ok), latencies[-1]),
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max': latencies[-1],
+        }
+
+    def sparkline(self, width: int = 30) -> str:
+        recent = list(self.samples)[-width:]
+        latencies = [ms for _, ok, ms in recent if ok]
+        if not recent:
+            return ""
+        low, high = (min(latencies), max(latencies)) if latencies else (0.0, 0.0)
+        span = (high - low) or 1.0
+        return "".join(
+            SPARK_BLOCKS[int((ms - low) / span * (len(SPARK_BLOCKS) - 1))] if ok else "✖"
+            for _, ok, ms in recent
+        )
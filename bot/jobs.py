@@ -0,0 +1,140 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class Job:
+    __slots__ = (
+        'name', 'func', 'interval', 'jitter', 'timeout', 'max_backoff',
+        'running', 'runs', 'failures', 'skipped', 'last_start', 'last_duration',
+        'last_error', 'last_success', 'next_run', 'wake'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        jitter: float,
+        timeout: Optional[float],
+        max_backoff: float,
+        initial_delay: float
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_start: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[float] = None
+        self.next_run = time.time() + initial_delay
+        self.wake = asyncio.Event()
+
+    def _delay(self) -> float:
+        if self.failures:
+            delay = min(self.interval * (2 ** self.failures), self.max_backoff)
+        else:
+            delay = self.interval
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class JobScheduler:
+    """Periodic background jobs with jitter, timeouts, overlap protection and backoff.
+
+    Each job runs in its own loop: it sleeps until ``next_run`` (interval plus or
+    minus ``jitter``), runs under ``timeout``, then schedules itself again. A
+    failing or timed-out job waits ``interval * 2**failures`` (capped at
+    ``max_backoff``) instead, so a broken dependency isn't hammered. A job is
+    never run twice at once; ``trigger`` on a running job is counted as skipped.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        jitter: float = 0.1,
+        timeout: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        initial_delay: Optional[float] = None
+    ) -> Job:
+        job = Job(
+            name, func, interval, jitter, timeout,
+            max_backoff if max_backoff is not None else interval * 8,
+            initial_delay if initial_delay is not None else interval
+        )
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        for name, job in self.jobs.items():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                self._tasks[name] = asyncio.create_task(self._loop(job))
+
+    async def close(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def trigger(self, name: str) -> bool:
+        job = self.jobs[name]
+        if job.running:
+            job.skipped += 1
+            return False
+        job.next_run = time.time()
+        job.wake.set()
+        return True
+
+    async def _loop(self, job: Job):
+        while True:
+            job.wake.clear()
+            delay = job.next_run - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(job.wake.wait(), timeout=delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            await self._run(job)
+            job.next_run = time.time() + job._delay()
+
+    async def _run(self, job: Job):
+        job.running = True
+        job.last_start = time.time()
+        started = time.perf_counter()
+        try:
+            if job.timeout:
+                await asyncio.wait_for(job.func(), timeout=job.timeout)
+            else:
+                await job.func()
+            job.failures = 0
+            job.last_error = None
+            job.last_success = time.time()
+        except asyncio.TimeoutError:
+            job.failures += 1
+            job.last_error = f"timed out after {job.timeout:.0f}s"
+            print(f"[WARN] Job {job.name} {job.last_error}")
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)[:200]
+            print(f"[ERROR] Job {job.name} failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration = time.perf_counter() - started
+            job.running = False
+
+    def status(self) -> List[Job]:
+        return sorted(self.jobs.values(), key=lambda job: job.next_run)
@@ -0,0 +1,145 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+MAX_INDEXED_KEYS = 20000
+
+
+def storage_key_name(name: str) -> str:
+    # Inventory listings return storage object names, which may carry a folder prefix and extension.
+    name = name.rsplit('/', 1)[-1]
+    return name[:-5] if name.endswith('.json') else name
+
+
+class KeyRecord:
+    # resolved: the key's own API record (key_info or its create response) has been seen,
+    # so an owner of None means the key has none, not that it is unknown.
+    __slots__ = ('owner', 'expires_at', 'status', 'resolved')
+
+    def __init__(self, owner: Optional[str] = None, expires_at: Optional[str] = None, status: Optional[str] = None):
+        self.owner = owner
+        self.expires_at = expires_at
+        self.status = status
+        self.resolved = False
+
+
+class KeyIndex:
+    """In-memory index of recently seen license keys for autocomplete.
+
+    Keys live in a sorted list so a prefix lookup is one bisect plus a short
+    scan, and in an OrderedDict that tracks recency. Once ``capacity`` keys are
+    held, the least recently seen one is evicted from both. Keys with a known
+    owner are also grouped per Discord user id.
+    """
+
+    def __init__(self, capacity: int = MAX_INDEXED_KEYS):
+        self.capacity = capacity
+        self._sorted: List[str] = []
+        self._records: 'OrderedDict[str, KeyRecord]' = OrderedDict()
+        self._by_owner: Dict[str, Set[str]] = {}
+        # Called with (key, record) when a key's owner or expiry changes, and (key, None) when it is deleted.
+        self.on_change: Optional[Callable[[str, Optional[KeyRecord]], Any]] = None
+
+    @property
+    def owner_count(self) -> int:
+        return len(self._by_owner)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def get(self, key: str) -> Optional[KeyRecord]:
+        return self._records.get(key)
+
+    def export(self) -> List[list]:
+        """``[key, owner, expires_at, status, resolved]`` rows, least recently seen first, for ``add(*row)`` elsewhere."""
+        return [[key, r.owner, r.expires_at, r.status, r.resolved] for key, r in self._records.items()]
+
+    def unowned(self) -> List[str]:
+        """Keys whose API record has been seen and has no owner."""
+        return [key for key, r in self._records.items() if r.resolved and r.owner is None]
+
+    def add(
+        self,
+        key: str,
+        owner: Any = None,
+        expires_at: Optional[str] = None,
+        status: Optional[str] = None,
+        resolved: bool = False
+    ) -> KeyRecord:
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = KeyRecord()
+            insort(self._sorted, key)
+            while len(self._records) > self.capacity:
+                self.discard(next(iter(self._records)), evicted=True)
+        else:
+            self._records.move_to_end(key)
+        changed = False
+        if owner is not None and str(owner) != record.owner:
+            self._unlink_owner(key, record.owner)
+            record.owner = str(owner)
+            self._by_owner.setdefault(record.owner, set()).add(key)
+            changed = True
+        if expires_at is not None and expires_at != record.expires_at:
+            record.expires_at = expires_at
+            changed = True
+        if status is not None:
+            record.status = status
+        if resolved:
+            record.resolved = True
+        if changed and self.on_change is not None:
+            self.on_change(key, record)
+        return record
+
+    def add_response(self, key: str, info: Optional[Dict[str, Any]]):
+        """Index a key together with whatever an API response says about it."""
+        if not key or not info or info.get('error'):
+            return
+        self.add(
+            key,
+            owner=info.get('discord_user_id'),
+            expires_at=info.get('activation_expires_at') or info.get('expiry_timestamp'),
+            status=info.get('status'),
+            resolved=True
+        )
+
+    def _unlink_owner(self, key: str, owner: Optional[str]):
+        keys = self._by_owner.get(owner) if owner is not None else None
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_owner[owner]
+
+    def keys_for(self, owner: Any) -> List[str]:
+        return sorted(self._by_owner.get(str(owner), ()))
+
+    def discard(self, key: str, evicted: bool = False):
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+        self._unlink_owner(key, record.owner)
+        if not evicted and self.on_change is not None:
+            self.on_change(key, None)
+        i = bisect_left(self._sorted, key)
+        if i < len(self._sorted) and self._sorted[i] == key:
+            del self._sorted[i]
+
+    def search(self, prefix: str, limit: int = 25) -> List[str]:
+        """Keys starting with ``prefix`` (most recently seen first when ``prefix`` is empty)."""
+        if not prefix:
+            return [key for key, _ in zip(reversed(self._records), range(limit))]
+        matches = self._prefix(prefix, limit)
+        if not matches and prefix != prefix.upper():
+            matches = self._prefix(prefix.upper(), limit)
+        return matches
+
+    def _prefix(self, prefix: str, limit: int) -> List[str]:
+        matches = []
+        i = bisect_left(self._sorted, prefix)
+        while i < len(self._sorted) and len(matches) < limit and self._sorted[i].startswith(prefix):
+            matches.append(self._sorted[i])
+            i += 1
+        return matches
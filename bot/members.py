@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+MEMBER_CACHE_FULL = 'full'
+MEMBER_CACHE_RELEVANT = 'relevant'
+# Measured for a discord.py Member plus its User with a couple of roles (tracemalloc, 20k members).
+MEMBER_BYTES_ESTIMATE = 800
+
+MISSING = object()
+
+
+class MemberCache:
+    """Member lookups under the configured member-cache policy.
+
+    With the ``full`` policy discord.py chunks every guild at startup and this
+    is a thin wrapper around ``guild.get_member``. With ``relevant`` the bot is
+    built with ``client_options()``: no chunking and no member cache, so the
+    bot only keeps the members it cares about here. Members holding one of a
+    guild's ``relevant_roles`` (staff and the trusted role) are pinned; anyone
+    else lands in a small LRU. Entries older than ``ttl`` are fetched again,
+    since discord.py drops member updates for members it doesn't cache.
+    """
+
+    def __init__(self, policy: str = MEMBER_CACHE_FULL, lru_size: int = 500, ttl: float = 600.0):
+        if policy not in (MEMBER_CACHE_FULL, MEMBER_CACHE_RELEVANT):
+            raise ValueError(f"unknown member cache policy {policy!r}")
+        self.policy = policy
+        self.lru_size = lru_size
+        self.ttl = ttl
+        self.relevant_roles: Dict[int, frozenset] = {}
+        self._pinned: Dict[Tuple[int, int], Tuple[discord.Member, float]] = {}
+        self._lru: 'OrderedDict[Tuple[int, int], Tuple[Optional[discord.Member], float]]' = OrderedDict()
+        self.metrics = {'hits': 0, 'fetches': 0, 'not_found': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy == MEMBER_CACHE_RELEVANT
+
+    def client_options(self) -> dict:
+        """Extra ``commands.Bot`` keyword arguments for this policy."""
+        if not self.enabled:
+            return {}
+        return {'chunk_guilds_at_startup': False, 'member_cache_flags': discord.MemberCacheFlags.none()}
+
+    def set_relevant_roles(self, guild_id: int, role_ids: Iterable[int]):
+        self.relevant_roles[guild_id] = frozenset(r for r in role_ids if r)
+
+    def _relevant(self, member: discord.Member) -> bool:
+        roles = self.relevant_roles.get(member.guild.id, frozenset())
+        return any(role.id in roles for role in member.roles)
+
+    def __len__(self) -> int:
+        return len(self._pinned) + sum(1 for member, _ in self._lru.values() if member is not None)
+
+    @property
+    def pinned_count(self) -> int:
+        return len(self._pinned)
+
+    def observe(self, member: Optional[discord.Member]):
+        """Store a member seen in an event (message author, interaction user) or fetched."""
+        if not self.enabled or not isinstance(member, discord.Member):
+            return
+        key = (member.guild.id, member.id)
+        if self._relevant(member):
+            self._lru.pop(key, None)
+            self._pinned[key] = (member, time.monotonic())
+        else:
+            self._pinned.pop(key, None)
+            self._remember(key, member)
+
+    def _remember(self, key: Tuple[int, int], member: Optional[discord.Member]):
+        self._lru[key] = (member, time.monotonic())
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def forget(self, guild_id: int, user_id: int):
+        self._pinned.pop((guild_id, user_id), None)
+        self._lru.pop((guild_id, user_id), None)
+
+    def cached(self, guild: discord.Guild, user_id: int):
+        """The cached member, None if known not to be in the guild, or ``MISSING``."""
+        if not self.enabled:
+            return guild.get_member(user_id)
+        key = (guild.id, user_id)
+        entry = self._pinned.get(key) or self._lru.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return guild.get_member(user_id) or MISSING
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        return entry[0]
+
+    async def get(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        member = self.cached(guild, user_id)
+        if member is not MISSING:
+            self.metrics['hits'] += 1
+            return member
+        self.metrics['fetches'] += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            self.metrics['not_found'] += 1
+            self._remember((guild.id, user_id), None)
+            return None
+        except discord.HTTPException as e:
+            print(f"[WARN] Could not fetch member {user_id}: {e}")
+            return None
+        self.observe(member)
+        return member
+
+    def with_role(self, role: discord.Role) -> List[discord.Member]:
+        """Cached holders of ``role``: every holder under ``full``, only those seen so far under ``relevant``."""
+        if not self.enabled:
+            return list(role.members)
+        entries = list(self._pinned.values()) + list(self._lru.values())
+        return [
+            member for member, _ in entries
+            if member is not None and member.guild.id == role.guild.id and member.get_role(role.id) is not None
+        ]
+
+    async def fetch_with_role(self, guild: discord.Guild, role: discord.Role) -> List[discord.Member]:
+        """Every holder of ``role``; pages through the member list when members aren't cached."""
+        if not self.enabled:
+            return list(role.members)
+        members = []
+        async for member in guild.fetch_members(limit=None):
+            if member.get_role(role.id) is not None:
+                members.append(member)
+                self.observe(member)
+        return members
+
+    def stats(self, guilds: Iterable[discord.Guild]) -> Dict[str, int]:
+        guilds = list(guilds)
+        total = sum(g.member_count or 0 for g in guilds)
+        cached = sum(len(g.members) for g in guilds) + len(self)
+        return {
+            'total': total,
+            'cached': cached,
+            'pinned': self.pinned_count,
+            'saved_bytes': max(0, total - cached) * MEMBER_BYTES_ESTIMATE,
+        }
@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+PRIORITY_INTERACTION = 0
+PRIORITY_DM = 1
+PRIORITY_AUDIT = 2
+PRIORITY_REACTION = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTION: 'interaction',
+    PRIORITY_DM: 'dm',
+    PRIORITY_AUDIT: 'audit',
+    PRIORITY_REACTION: 'reaction',
+}
+
+# (tokens per second, burst capacity) per lane prefix, kept under Discord's per-route limits
+BUCKET_LIMITS = {
+    'channel': (1.0, 5),       # 5 messages / 5 s per channel
+    'reaction': (4.0, 1),      # 1 reaction / 250 ms per channel
+    'dm': (5.0, 5),            # shared across all DMs to stay clear of spam heuristics
+    'interaction': (2.5, 5),   # 5 / 2 s per interaction webhook
+}
+GLOBAL_RATE = 40.0             # Discord's global limit is 50 req/s per bot
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_IDLE_BUCKETS = 512
+
+
+def _retry_after(error: discord.HTTPException) -> float:
+    try:
+        return max(float(error.response.headers.get('Retry-After', 1)), 0.5)
+    except Exception:
+        return 1.0
+
+
+def _is_global(error: discord.HTTPException) -> bool:
+    try:
+        return str(error.response.headers.get('X-RateLimit-Global', '')).lower() == 'true'
+    except Exception:
+        return False
+
+
+def _mark_retrieved(future: asyncio.Future):
+    # Fire-and-forget callers never await their future; retrieve the error so asyncio doesn't warn.
+    if not future.cancelled():
+        future.exception()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'lane', 'factory', 'futures', 'channel', 'embeds', 'attempts')
+
+    def __init__(self, priority: int, seq: int, lane: str, factory, future: asyncio.Future, channel=None, embeds=None):
+        self.priority = priority
+        self.seq = seq
+        self.lane = lane
+        self.factory = factory
+        self.futures = [future]
+        self.channel = channel
+        self.embeds = embeds
+        self.attempts = 0
+
+    def __lt__(self, other: '_Job') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    @property
+    def cancelled(self) -> bool:
+        return all(f.done() for f in self.futures)
+
+
+class OutboundScheduler:
+    """Central queue for everything the bot sends to Discord outside a command's own response.
+
+    Jobs wait in per-lane queues (one lane per channel, DM pool or interaction webhook),
+    each guarded by a token bucket, plus a global bucket for the whole bot. The dispatcher
+    always runs the highest-priority ready job, so a backlog of audit posts or reactions
+    never delays a DM or an interaction edit. Embed-only posts queued for the same channel
+    are merged into multi-embed messages while they wait.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, max_in_flight: int = 4, max_retries: int = 3):
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self._lanes: Dict[str, List[_Job]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self.depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self.metrics = {'submitted': 0, 'sent': 0, 'failed': 0, 'rate_limited': 0, 'coalesced': 0, 'max_depth': 0}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.metrics)
+        stats['depth'] = {PRIORITY_NAMES[p]: n for p, n in self.depth.items()}
+        stats['lanes'] = sum(1 for lane in self._lanes.values() if lane)
+        return stats
+
+    def _bucket(self, lane: str) -> TokenBucket:
+        bucket = self._buckets.get(lane)
+        if bucket is None:
+            rate, capacity = BUCKET_LIMITS.get(lane.split(':', 1)[0], (1.0, 1))
+            bucket = self._buckets[lane] = TokenBucket(rate, capacity)
+        return bucket
+
+    def _push(self, job: _Job):
+        heapq.heappush(self._lanes.setdefault(job.lane, []), job)
+        self.depth[job.priority] += 1
+        total = sum(self.depth.values())
+        if total > self.metrics['max_depth']:
+            self.metrics['max_depth'] = total
+        self._wake.set()
+
+    def submit(
+        self,
+        factory: Optional[Callable[[], Awaitable[Any]]],
+        priority: int,
+        lane: str,
+        channel=None,
+        embeds: Optional[List[discord.Embed]] = None
+    ) -> asyncio.Future:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_mark_retrieved)
+        self.metrics['submitted'] += 1
+        self._push(_Job(priority, next(self._seq), lane, factory, future, channel, embeds))
+        return future
+
+    def send(self, channel, priority: int = PRIORITY_AUDIT, **kwargs) -> asyncio.Future:
+        lane = f"channel:{channel.id}"
+        if set(kwargs) <= {'embed', 'embeds'} and kwargs:
+            embeds = list(kwargs.get('embeds') or []) + ([kwargs['embed']] if kwargs.get('embed') else [])
+            return self.submit(None, priority, lane, channel=channel, embeds=embeds)
+        return self.submit(lambda: channel.send(**kwargs), priority, lane)
+
+    def send_dm(self, user, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: user.send(**kwargs), PRIORITY_DM, 'dm')
+
+    def reply(self, message: discord.Message, content: str = None, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: message.reply(content, **kwargs), PRIORITY_INTERACTION, f"channel:{message.channel.id}")
+
+    def add_reaction(self, message: discord.Message, emoji: str) -> asyncio.Future:
+        return self.submit(lambda: message.add_reaction(emoji), PRIORITY_REACTION, f"reaction:{message.channel.id}")
+
+    def edit(self, interaction: discord.Interaction, message, **kwargs) -> asyncio.Future:
+        return self.submit(lambda: message.edit(**kwargs), PRIORITY_INTERACTION, f"interaction:{interaction.id}")
+
+    def _coalesce(self, job: _Job, lane: List[_Job]):
+        while lane and len(job.embeds) < MAX_EMBEDS_PER_MESSAGE:
+            nxt = lane[0]
+            if nxt.embeds is None or nxt.channel is not job.channel or len(job.embeds) + len(nxt.embeds) > MAX_EMBEDS_PER_MESSAGE:
+                break
+            heapq.heappop(lane)
+            self.depth[nxt.priority] -= 1
+            if nxt.cancelled:
+                continue
+            job.embeds = job.embeds + nxt.embeds
+            job.futures.extend(nxt.futures)
+            self.metrics['coalesced'] += 1
+
+    def _next_ready(self):
+        now = time.monotonic()
+        wait = self.global_bucket.delay(now)
+        if wait > 0:
+            return None, wait
+        best = None
+        wait = None
+        for key, lane in self._lanes.items():
+            while lane and lane[0].cancelled:
+                self.depth[heapq.heappop(lane).priority] -= 1
+            if not lane:
+                continue
+            delay = self._bucket(key).delay(now)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+            elif best is None or lane[0] < best[0]:
+                best = (lane[0], lane)
+        if best is None:
+            self._prune(now)
+            return None, wait
+        job, lane = best
+        heapq.heappop(lane)
+        self.depth[job.priority] -= 1
+        self._bucket(job.lane).consume()
+        self.global_bucket.consume()
+        if job.embeds is not None:
+            self._coalesce(job, lane)
+        return job, None
+
+    def _prune(self, now: float):
+        if len(self._buckets) <= MAX_IDLE_BUCKETS:
+            return
+        for key in [k for k, b in self._buckets.items() if not self._lanes.get(k) and b.idle(now)]:
+            self._buckets.pop(key, None)
+            self._lanes.pop(key, None)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            await self._slots.acquire()
+            job, wait = self._next_ready()
+            if job is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: _Job):
+        try:
+            if job.embeds is not None:
+                result = await job.channel.send(embeds=job.embeds)
+            else:
+                result = await job.factory()
+        except discord.HTTPException as e:
+            if e.status == 429 and job.attempts < self.max_retries:
+                job.attempts += 1
+                self.metrics['rate_limited'] += 1
+                bucket = self.global_bucket if _is_global(e) else self._bucket(job.lane)
+                bucket.block(_retry_after(e), time.monotonic())
+                self._push(job)
+                return
+            self._fail(job, e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            self.metrics['sent'] += 1
+            for future in job.futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+            self._wake.set()
+
+    def _fail(self, job: _Job, error: Exception):
+        self.metrics['failed'] += 1
+        if not isinstance(error, discord.Forbidden):
+            print(f"[WARN] Outbound {PRIORITY_NAMES[job.priority]} send failed: {error}")
+        for future in job.futures:
+            if not future.done():
+                future.set_exception(error)
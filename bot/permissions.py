@@ -0,0 +1,41 @@
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+
+class PermissionResolver:
+    """Resolves which permission tiers (owner/dev/admin/staff) a member holds in a guild.
+
+    Each guild's tiers are built once as frozensets of role ids, so a lookup is
+    one pass over the member's public ``roles`` and a few set checks. Nothing
+    is cached per member: a cache would have to be validated against the
+    member's roles on every hit, which costs as much as computing the tiers,
+    and under ``MEMBER_CACHE=relevant`` the member updates that could
+    invalidate it don't arrive.
+    """
+
+    def __init__(self, guild_tiers: Dict[int, Dict[str, Iterable[int]]]):
+        self.guild_tiers: Dict[int, Dict[str, FrozenSet[int]]] = {
+            guild_id: {name: frozenset(roles) for name, roles in tiers.items()}
+            for guild_id, tiers in guild_tiers.items()
+        }
+        self.tier_names = frozenset(name for tiers in self.guild_tiers.values() for name in tiers)
+
+    def __contains__(self, guild_id: Optional[int]) -> bool:
+        return guild_id in self.guild_tiers
+
+    def _guild_tiers(self, member: Any, guild_id: Optional[int]) -> Optional[Dict[str, FrozenSet[int]]]:
+        if member is None:
+            return None
+        if guild_id is None:
+            guild_id = getattr(getattr(member, 'guild', None), 'id', None)
+        return self.guild_tiers.get(guild_id)
+
+    def tiers(self, member: Any, guild_id: Optional[int] = None) -> FrozenSet[str]:
+        tiers = self._guild_tiers(member, guild_id)
+        if tiers is None:
+            return frozenset()
+        held = frozenset(role.id for role in getattr(member, 'roles', ()))
+        return frozenset(name for name, tier_roles in tiers.items() if not tier_roles.isdisjoint(held))
+
+    def has(self, member: Any, tier: str, guild_id: Optional[int] = None) -> bool:
+        tier_roles = (self._guild_tiers(member, guild_id) or {}).get(tier)
+        return bool(tier_roles) and any(role.id in tier_roles for role in getattr(member, 'roles', ()))
@@ -0,0 +1,176 @@
+import functools
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import discord
+
+from permissions import PermissionResolver
+
+
+class EmbedFactory:
+    """Builds the bot's standard embeds so every reply carries the same footer and colours."""
+
+    def __init__(self, footer: str, color: discord.Color):
+        self.footer = footer
+        self.color = color
+
+    def __call__(self, title: str, description: Optional[str] = None, color: Optional[discord.Color] = None, timestamp: bool = False) -> discord.Embed:
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=color or self.color,
+            timestamp=datetime.now() if timestamp else None
+        )
+        embed.set_footer(text=self.footer)
+        return embed
+
+    def error(self, description: Optional[str], title: str = "Error") -> discord.Embed:
+        return self(title, description, color=discord.Color.red())
+
+    async def send(self, interaction: discord.Interaction, title: str, description: Optional[str] = None, color: Optional[discord.Color] = None, **kwargs):
+        await interaction.followup.send(embed=self(title, description, color=color), ephemeral=True, **kwargs)
+
+    async def send_error(self, interaction: discord.Interaction, description: Optional[str], title: str = "Error"):
+        await interaction.followup.send(embed=self.error(description, title), ephemeral=True)
+
+
+class CommandStats:
+    __slots__ = ('count', 'errors', 'denied', 'total_ms', 'max_ms', 'overhead_us')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.denied = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.overhead_us = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    @property
+    def avg_overhead_us(self) -> float:
+        return self.overhead_us / self.count if self.count else 0.0
+
+
+BeforeHook = Callable[[str, discord.Interaction, Dict[str, Any]], Awaitable[bool]]
+AfterHook = Callable[[str, discord.Interaction, float, Optional[BaseException]], Any]
+
+
+class CommandPipeline:
+    """Shared guard/defer/log/error handling for slash commands.
+
+    ``@pipeline.command(tier)`` wraps a command callback so that it:
+
+    1. rejects unconfigured guilds and members without the tier in the interaction's
+       guild, as resolved by the ``PermissionResolver``,
+    2. defers the response ephemerally,
+    3. runs ``before`` hooks, any of which may answer the interaction itself
+       (e.g. from a cache) by returning True,
+    4. runs the callback, turning uncaught exceptions into the standard error embed,
+    5. records a command log entry once the command finishes, and
+    6. records timings and calls ``after`` hooks.
+
+    Every command that passes the guard is logged unless it opts out with
+    ``log=False``. A ``log`` callable builds the entry from the command's
+    arguments (returning None skips it); a command that only knows its
+    outcome at the end returns a dict, whose ``details`` are merged into the
+    entry and whose other keys (e.g. ``attachment``) override it. Read-only
+    commands pass ``audit=False`` to keep the entry out of the audit channel.
+    """
+
+    def __init__(
+        self,
+        permissions: PermissionResolver,
+        embeds: EmbedFactory,
+        logger: Callable[..., Any]
+    ):
+        self.permissions = permissions
+        self.embeds = embeds
+        self.logger = logger
+        self.before: List[BeforeHook] = []
+        self.after: List[AfterHook] = []
+        self.stats: Dict[str, CommandStats] = {}
+
+    async def _deny(self, interaction: discord.Interaction, title: str, description: str):
+        await interaction.response.send_message(embed=self.embeds.error(description, title), ephemeral=True)
+
+    def command(
+        self,
+        tier: str,
+        log: Union[bool, Callable[..., Optional[Dict[str, Any]]]] = True,
+        audit: bool = True,
+        defer: bool = True
+    ):
+        if tier not in self.permissions.tier_names:
+            raise ValueError(f"Unknown permission tier: {tier}")
+
+        def decorator(func):
+            name = func.__name__
+            stats = self.stats.setdefault(name, CommandStats())
+
+            @functools.wraps(func)
+            async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+                started = time.perf_counter()
+                if interaction.guild_id not in self.permissions:
+                    stats.denied += 1
+                    await self._deny(interaction, "Invalid Guild", "This command only works in the configured server.")
+                    return
+                if not self.permissions.has(interaction.user, tier, interaction.guild_id):
+                    stats.denied += 1
+                    await self._deny(interaction, "Insufficient Permissions", f"This command requires {tier} role.")
+                    return
+                stats.overhead_us += (time.perf_counter() - started) * 1_000_000
+                if defer:
+                    await interaction.response.defer(ephemeral=True)
+                error: Optional[BaseException] = None
+                entry = None
+                try:
+                    if log is True:
+                        entry = {}
+                    elif log:
+                        entry = log(interaction, *args, **kwargs)
+                    for hook in self.before:
+                        if await hook(name, interaction, kwargs):
+                            return
+                    result = await func(interaction, *args, **kwargs)
+                    if entry is not None and isinstance(result, dict):
+                        entry = {**entry, **result, 'details': {**(entry.get('details') or {}), **(result.get('details') or {})}}
+                except Exception as e:
+                    error = e
+                    stats.errors += 1
+                    print(f"[ERROR] {name} failed: {e}")
+                    try:
+                        await self.embeds.send_error(interaction, str(e)[:100])
+                    except Exception:
+                        pass
+                finally:
+                    if entry is not None:
+                        self._log(name, interaction, entry, audit, error)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    stats.count += 1
+                    stats.total_ms += elapsed_ms
+                    stats.max_ms = max(stats.max_ms, elapsed_ms)
+                    for hook in self.after:
+                        try:
+                            hook(name, interaction, elapsed_ms, error)
+                        except Exception as e:
+                            print(f"[WARN] Pipeline hook failed: {e}")
+
+            return wrapper
+
+        return decorator
+
+    def _log(self, name: str, interaction: discord.Interaction, entry: Dict[str, Any], audit: bool, error: Optional[BaseException]):
+        if error is not None:
+            entry = {**entry, 'details': {**(entry.get('details') or {}), 'error': str(error)[:100]}}
+        if not audit:
+            entry = {'audit': False, **entry}
+        if not entry.get('details'):
+            entry.pop('details', None)
+        try:
+            self.logger(name, interaction.user.id, interaction.user.name, guild_id=interaction.guild_id, **entry)
+        except Exception as e:
+            print(f"[WARN] Logging {name} failed: {e}")
@@ -0,0 +1,129 @@
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import discord
+
+SCRUBBED = "[scrubbed]"
+SECRET_PATTERNS = [
+    re.compile(r"[\w-]{23,28}\.[\w-]{6,7}\.[\w-]{27,38}"),                       # Discord tokens
+    re.compile(r"\b[A-Z0-9]{32}\b"),                                              # license keys
+    re.compile(r"(?i)\b(secret|token|password|api[_-]?key)(\s*[:=]\s*)\S+"),
+    re.compile(r"https://(?:\w+\.)?discord(?:app)?\.com/api/webhooks/\S+"),
+]
+
+
+def scrub(text: Optional[str], literals: Iterable[str] = ()) -> Optional[str]:
+    if not text:
+        return text
+    for literal in literals:
+        if literal:
+            text = text.replace(literal, SCRUBBED)
+    for pattern in SECRET_PATTERNS:
+        if pattern.groups == 2:
+            text = pattern.sub(lambda m: f"{m.group(1)}{m.group(2)}{SCRUBBED}", text)
+        else:
+            text = pattern.sub(SCRUBBED, text)
+    return text
+
+
+def member_record(member: Any) -> Dict[str, Any]:
+    return {
+        'id': member.id,
+        'name': str(getattr(member, 'name', '')),
+        'bot': bool(getattr(member, 'bot', False)),
+        'roles': [role.id for role in getattr(member, 'roles', [])],
+    }
+
+
+class EventRecorder:
+    """Appends the gateway events the bot reacts to as NDJSON, one event per line.
+
+    Each line carries ``t`` (seconds since recording started, monotonic) so
+    ``tools/replay.py`` can reproduce the original pacing. Message content is
+    only kept for ``content_channels`` and every string passes through
+    ``scrub`` first; ``literals`` (the bot token and API secret) are always
+    removed verbatim.
+    """
+
+    def __init__(self, path: str, content_channels: Iterable[int] = (), literals: Iterable[str] = ()):
+        self.path = path
+        self.content_channels = set(content_channels)
+        self.literals = [literal for literal in literals if literal]
+        self.started = time.monotonic()
+        self.recorded = 0
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, kind: str, data: Dict[str, Any]):
+        data = {'t': round(time.monotonic() - self.started, 4), 'type': kind, **data}
+        try:
+            self._file.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self.recorded += 1
+        except Exception as e:
+            print(f"[WARN] Failed to record {kind}: {e}")
+
+    def message_create(self, message: discord.Message):
+        keep_content = message.channel.id in self.content_channels
+        self._write('message_create', {
+            'id': message.id,
+            'guild_id': message.guild.id if message.guild else None,
+            'channel_id': message.channel.id,
+            'author': member_record(message.author),
+            'mentions': [member_record(m) for m in message.mentions],
+            'content': scrub(message.content, self.literals) if keep_content else None,
+        })
+
+    def message_delete(self, guild_id: int, channel_id: int, message_id: int):
+        self._write('message_delete', {
+            'id': message_id,
+            'guild_id': guild_id,
+            'channel_id': channel_id,
+        })
+
+    def member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles == after.roles:
+            return
+        self._write('member_update', {'guild_id': after.guild.id, 'member': member_record(after)})
+
+    def interaction(self, interaction: discord.Interaction):
+        if interaction.type != discord.InteractionType.application_command:
+            return
+        data = interaction.data or {}
+        self._write('interaction', {
+            'id': interaction.id,
+            'guild_id': interaction.guild_id,
+            'channel_id': interaction.channel_id,
+            'user': member_record(interaction.user),
+            'command': data.get('name'),
+            'options': self._scrub_options(data.get('options', [])),
+        })
+
+    def _scrub_options(self, options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        scrubbed = []
+        for option in options:
+            option = dict(option)
+            if isinstance(option.get('value'), str):
+                option['value'] = scrub(option['value'], self.literals)
+            if option.get('options'):
+                option['options'] = self._scrub_options(option['options'])
+            scrubbed.append(option)
+        return scrubbed
+
+    def flush(self):
+        try:
+            self._file.flush()
+        except Exception as e:
+            print(f"[WARN] Failed to flush event recording: {e}")
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -1,23 +1,182 @@
 import aiohttp
+import codecs
+import gzip
 import hmac
 import hashlib
 import json
 import io
+import os
+import shutil
 import sys
-from typing import Optional, Dict, Any
+import tempfile
+import time
+import zipfile
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, List, Tuple
 from datetime import datetime
 
+from keyindex import KeyIndex, storage_key_name
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 class APIClient:
     
-    def __init__(self, base_url: str, secret_key: str, timeout: int = 10):
+    def __init__(
+        self,
+        base_url: str,
+        secret_key: str,
+        timeout: int = 10,
+        manifest_path: Optional[str] = None,
+        blob_dir: Optional[str] = None,
+        key_index: Optional[KeyIndex] = None
+    ):
         self.base_url = base_url.rstrip('/')
         self.secret_key = secret_key
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.session: Optional[aiohttp.ClientSession] = None
+        self.manifest_path = manifest_path
+        self.blob_dir = blob_dir
+        self.pinned_blobs: set = set()
+        self.key_index = key_index if key_index is not None else KeyIndex()
+        self.script_manifest: Dict[str, Dict[str, Any]] = {}
+        self.manifest_ttl = SCRIPT_MANIFEST_TTL
+        self._manifest_synced = 0.0
+        self._manifest_sorted: Optional[List[str]] = None
+        self._manifest_refresh: Optional[asyncio.Task] = None
+        self.settings_ttl = SETTINGS_TTL
+        self.settings_snapshot: Optional[Dict[str, Any]] = None
+        self.settings_fetched_at = 0.0
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.coalesce_stats = {'reads': 0, 'coalesced': 0}
+        self.coalesced_by_endpoint: Dict[str, int] = {}
+        self._load_manifest()
     
+    def _load_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.script_manifest = data
+        except Exception as e:
+            print(f"Warning: Could not load script manifest: {e}")
+
+    def save_manifest(self):
+        self._manifest_sorted = None
+        if not self.manifest_path:
+            return
+        try:
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(self.script_manifest, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving script manifest: {e}")
+
+    def _remember_script(self, filename: str, spooled: 'SpooledScript', response: Dict[str, Any]):
+        self.script_manifest[filename] = {
+            'sha256': spooled.sha256,
+            'size': spooled.size,
+            'etag': response.get('etag'),
+            'blocks': spooled.blocks,
+            'last_modified': response.get('last_modified') or datetime.now().isoformat(),
+        }
+        if self.blob_dir:
+            spooled.save_blob(self.blob_dir)
+            self.prune_blobs()
+        self.save_manifest()
+
+    def _blob_path(self, sha256: str) -> Optional[str]:
+        return os.path.join(self.blob_dir, f"{sha256}.gz") if self.blob_dir and sha256 else None
+
+    def has_script_blob(self, sha256: Optional[str]) -> bool:
+        path = self._blob_path(sha256)
+        return bool(path and os.path.exists(path))
+
+    async def iter_script_blob(self, sha256: str, chunk_size: int = None) -> AsyncIterator[bytes]:
+        with gzip.open(self._blob_path(sha256), 'rb') as gz:
+            while True:
+                chunk = gz.read(chunk_size or SCRIPT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+                await asyncio.sleep(0)
+
+    def prune_blobs(self, keep: int = None):
+        """Drop stored script copies that are neither referenced nor pinned, keeping the newest ``keep``."""
+        if not self.blob_dir or not os.path.isdir(self.blob_dir):
+            return
+        referenced = {f"{sha}.gz" for sha in self.pinned_blobs}
+        referenced.update(f"{entry.get('sha256')}.gz" for entry in self.script_manifest.values())
+        stale = [
+            os.path.join(self.blob_dir, name)
+            for name in os.listdir(self.blob_dir)
+            if name.endswith('.gz') and name not in referenced
+        ]
+        stale.sort(key=os.path.getmtime, reverse=True)
+        for path in stale[keep if keep is not None else SCRIPT_BLOB_HISTORY:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def restore_script(self, filename: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Re-upload the stored copy of a previous manifest entry."""
+        if not self.has_script_blob(entry.get('sha256')):
+            return {'success': False, 'error': 'No local copy of the previous version'}
+        return await self.upload_script_file(self.iter_script_blob(entry['sha256']), filename, force=True)
+
+    def _sync_manifest(self, scripts: List[Dict[str, Any]]):
+        """Reconcile the manifest with a script listing from the API.
+
+        Entries whose size or etag no longer match were changed outside the bot,
+        so their hashes are dropped rather than trusted.
+        """
+        listed = {}
+        for script in scripts:
+            name = script.get('name')
+            if not name:
+                continue
+            entry = self.script_manifest.get(name, {})
+            size_moved = script.get('size') is not None and entry.get('size') != script['size']
+            etag_moved = script.get('etag') and entry.get('etag') and entry['etag'] != script['etag']
+            if entry and (size_moved or etag_moved):
+                entry = {}
+            if script.get('sha256'):
+                if entry.get('sha256') != script['sha256']:
+                    entry = {'sha256': script['sha256']}
+            entry.update({k: script[k] for k in ('size', 'etag', 'last_modified') if script.get(k) is not None})
+            listed[name] = entry
+        if listed != self.script_manifest:
+            self.script_manifest = listed
+            self.save_manifest()
+
+    @property
+    def manifest_fresh(self) -> bool:
+        return time.monotonic() - self._manifest_synced < self.manifest_ttl
+
+    def script_names(self) -> List[str]:
+        if self._manifest_sorted is None:
+            self._manifest_sorted = sorted(self.script_manifest)
+        return self._manifest_sorted
+
+    async def refresh_manifest(self) -> bool:
+        # Concurrent callers share one in-flight listing instead of each hitting the API.
+        if self._manifest_refresh is None or self._manifest_refresh.done():
+            self._manifest_refresh = asyncio.create_task(self.list_scripts())
+        response = await asyncio.shield(self._manifest_refresh)
+        return bool(response and isinstance(response.get('scripts'), list))
+
+    async def cached_scripts(self, refresh: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Scripts from the manifest, sorted by name, re-listed from the API only once the TTL lapses.
+
+        Uploads and deletes made through this client update the manifest directly,
+        so the TTL only bounds how long changes made elsewhere stay invisible.
+        """
+        if refresh or not self.manifest_fresh:
+            if not await self.refresh_manifest() and not self.script_manifest:
+                return None
+        return [{'name': name, **self.script_manifest[name]} for name in self.script_names()]
+
     async def _ensure_session(self):
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession(timeout=self.timeout)
@@ -26,6 +185,16 @@ class APIClient:
         if self.session and not self.session.closed:
             await self.session.close()
     
+    async def iter_download(self, url: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Stream a remote file (e.g. a Discord attachment URL) in chunks without buffering it whole."""
+        await self._ensure_session()
+        # Not the API's short request timeout: a large attachment may take minutes, as long as bytes keep coming.
+        timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT, sock_read=DOWNLOAD_READ_TIMEOUT)
+        async with self.session.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
     def _generate_signature(self, data: str) -> str:
         return hmac.new(
             self.secret_key.encode(),
@@ -38,7 +207,44 @@ class APIClient:
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        require_auth: bool = True
+        require_auth: bool = True,
+        coalesce: Optional[bool] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Send a request, sharing one in-flight call between identical concurrent reads.
+
+        Reads (``READ_ONLY_ENDPOINTS``, or ``coalesce=True`` for routes that
+        are only reads for some payloads) with the same method, endpoint and
+        payload await a single request; every caller after the first gets a
+        shallow copy of its response. The shared request is shielded, so a
+        caller that is cancelled doesn't cancel it for the others.
+        """
+        if coalesce is None:
+            coalesce = endpoint in READ_ONLY_ENDPOINTS
+        if not coalesce:
+            return await self._send(method, endpoint, data, require_auth)
+        self.coalesce_stats['reads'] += 1
+        flight_key = (method, endpoint, json.dumps(data, sort_keys=True))
+        task = self._inflight.get(flight_key)
+        if task is not None:
+            self.coalesce_stats['coalesced'] += 1
+            self.coalesced_by_endpoint[endpoint] = self.coalesced_by_endpoint.get(endpoint, 0) + 1
+            response = await asyncio.shield(task)
+            return dict(response) if isinstance(response, dict) else response
+        task = asyncio.ensure_future(self._send(method, endpoint, data, require_auth))
+        self._inflight[flight_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        return await asyncio.shield(task)
+
+    @property
+    def inflight_reads(self) -> int:
+        return len(self._inflight)
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        require_auth: bool
     ) -> Optional[Dict[str, Any]]:
         await self._ensure_session()
         
@@ -87,6 +293,7 @@ class APIClient:
         
         if response and response.get('key'):
             print(f"[API] Key created: {response['key'][:20]}... for user {discord_user_id}")
+            self.key_index.add_response(response['key'], {'discord_user_id': discord_user_id, **response})
         
         return response
     
@@ -100,7 +307,10 @@ class APIClient:
     
     async def delete_key(self, key: str) -> Optional[Dict[str, Any]]:
         data = {'key': key}
-        return await self._request('POST', '/admin/delete-key', data, require_auth=True)
+        response = await self._request('POST', '/admin/delete-key', data, require_auth=True)
+        if response and response.get('success'):
+            self.key_index.discard(key)
+        return response
     
     async def clear_key(self, key: str) -> Optional[Dict[str, Any]]:
         data = {'key': key}
@@ -108,12 +318,22 @@ class APIClient:
 
     async def key_info(self, key: str) -> Optional[Dict[str, Any]]:
         data = {'key': key}
-        return await self._request('POST', '/admin/key-info', data, require_auth=True)
+        response = await self._request('POST', '/admin/key-info', data, require_auth=True)
+        self.key_index.add_response(key, response)
+        return response
 
     async def modify_key(self, key: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         data = {'key': key}
         data.update(payload or {})
-        return await self._request('POST', '/admin/modify-key', data, require_auth=True)
+        response = await self._request('POST', '/admin/modify-key', data, require_auth=True)
+        if response and response.get('success'):
+            self.key_index.add(
+                key,
+                owner=data.get('discord_user_id'),
+                expires_at=response.get('expiry_timestamp'),
+                status=data.get('status')
+            )
+        return response
 
     async def merge_keys(self, source_key: str, target_key: str) -> Optional[Dict[str, Any]]:
         data = {'source_key': source_key, 'target_key': target_key}
@@ -138,33 +358,424 @@ class APIClient:
         data = {'script': script_text, 'filename': filename}
         return await self._request('POST', '/admin/script/upload', data, require_auth=True)
 
+    async def _script_upload_body(self, spooled: 'SpooledScript', filename: str) -> AsyncIterator[bytes]:
+        # Byte for byte what upload_script sends: json.dumps({'script': text, 'filename': filename}).
+        yield b'{"script": '
+        async for piece in spooled.iter_json_string():
+            yield piece
+        yield f', "filename": {json.dumps(filename)}}}'.encode('ascii')
+
+    async def upload_script_stream(self, spooled: 'SpooledScript', filename: str) -> Optional[Dict[str, Any]]:
+        """Upload a spooled script to ``/admin/script/upload`` without decoding it into one string.
+
+        The JSON body ``upload_script`` would send is generated from the spool
+        in chunks twice: once to sign and measure it, then again as the request
+        body. The API sees the same signed body either way, but only a chunk of
+        the script is in memory at a time.
+        """
+        mac = hmac.new(self.secret_key.encode(), digestmod=hashlib.sha256)
+        length = 0
+        async for piece in self._script_upload_body(spooled, filename):
+            mac.update(piece)
+            length += len(piece)
+        headers = {
+            'Content-Type': 'application/json',
+            'Content-Length': str(length),
+            'X-Signature': mac.hexdigest(),
+        }
+        endpoint = '/admin/script/upload'
+        await self._ensure_session()
+        try:
+            async with self.session.post(
+                f"{self.base_url}{endpoint}",
+                data=self._script_upload_body(spooled, filename),
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=SCRIPT_UPLOAD_TIMEOUT)
+            ) as response:
+                try:
+                    response_data = await response.json()
+                except:
+                    response_data = {'text': await response.text()}
+                if response.status >= 400:
+                    print(f"[API] Error {response.status} on POST {endpoint}")
+                return response_data
+        except asyncio.TimeoutError:
+            print(f"[API] Timeout: POST {endpoint}")
+            return None
+        except Exception as e:
+            print(f"[API] Error POST {endpoint}: {e}")
+            return None
+
+    async def upload_script_file(self, chunks: AsyncIterator[bytes], filename: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Spool, compress and hash ``chunks``, then stream them to the API from the spool.
+
+        If the manifest already has this filename with the same sha256 and size,
+        nothing is sent and ``{'unchanged': True}`` is returned unless ``force``.
+        Otherwise the response gains a ``changed`` summary against the previous
+        version, and ``content_verified``: whether the sha256 (or, without one,
+        the size) the API reports matches what was sent, or None if it reports
+        neither.
+        """
+        with await SpooledScript.build(chunks) as spooled:
+            previous = self.script_manifest.get(filename)
+            if not force and previous and previous.get('sha256') == spooled.sha256 and previous.get('size') == spooled.size:
+                return {'success': True, 'unchanged': True, 'size': spooled.size, 'sha256': spooled.sha256}
+            changed = spooled.diff(previous)
+            response = await self.upload_script_stream(spooled, filename)
+            if response is not None:
+                if response.get('sha256'):
+                    response['content_verified'] = response['sha256'] == spooled.sha256
+                elif response.get('size') is not None:
+                    response['content_verified'] = response['size'] == spooled.size
+                else:
+                    response['content_verified'] = None
+                response.setdefault('size', spooled.size)
+                response.setdefault('sha256', spooled.sha256)
+                response['compressed_size'] = spooled.compressed_size
+                response['changed'] = changed
+                if response.get('success'):
+                    self._remember_script(filename, spooled, response)
+            return response
+
     async def delete_script(self, filename: str) -> Optional[Dict[str, Any]]:
         data = {'filename': filename}
-        return await self._request('POST', '/admin/script/delete', data, require_auth=True)
+        response = await self._request('POST', '/admin/script/delete', data, require_auth=True)
+        if response and response.get('success') and self.script_manifest.pop(filename, None) is not None:
+            self.save_manifest()
+        return response
 
     async def list_scripts(self) -> Optional[Dict[str, Any]]:
-        return await self._request('POST', '/admin/script/list', {}, require_auth=True)
+        response = await self._request('POST', '/admin/script/list', {}, require_auth=True)
+        if response and isinstance(response.get('scripts'), list):
+            self._sync_manifest(response['scripts'])
+            self._manifest_synced = time.monotonic()
+        return response
 
     async def list_keys(self, page_size: int = 100, continuation_token: str = None) -> Optional[Dict[str, Any]]:
         data: Dict[str, Any] = {"page_size": page_size}
         if continuation_token:
             data["continuation_token"] = continuation_token
-        return await self._request('POST', '/admin/list-keys', data, require_auth=True)
+        response = await self._request('POST', '/admin/list-keys', data, require_auth=True)
+        for item in (response or {}).get('keys') or []:
+            if item.get('key'):
+                metadata = item.get('metadata') or {}
+                self.key_index.add(
+                    storage_key_name(item['key']),
+                    owner=item.get('discord_user_id') or metadata.get('discord_user_id'),
+                    expires_at=item.get('expiry_timestamp') or metadata.get('expiry_timestamp')
+                )
+        return response
+
+    async def iter_keys(self, page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the key inventory page by page, following continuation tokens."""
+        token = None
+        while True:
+            response = await self.list_keys(page_size=page_size, continuation_token=token)
+            if not response:
+                return
+            for item in response.get('keys') or []:
+                yield item
+            token = response.get('next_continuation_token')
+            if not token:
+                return
 
     async def set_session_tokens(self, enabled: bool) -> Optional[Dict[str, Any]]:
         data = {'enabled': enabled}
-        return await self._request('POST', '/admin/session-tokens', data, require_auth=True)
+        response = await self._request('POST', '/admin/session-tokens', data, require_auth=True)
+        if response and response.get('success') and self.settings_snapshot is not None:
+            self.settings_snapshot['session_tokens_enabled'] = enabled
+        return response
 
     async def get_session_tokens(self) -> Optional[Dict[str, Any]]:
         data = {}
-        return await self._request('POST', '/admin/session-tokens', data, require_auth=True)
+        return await self._request('POST', '/admin/session-tokens', data, require_auth=True, coalesce=True)
 
     async def prune_expired_keys(self) -> Optional[Dict[str, Any]]:
         data = {}
         return await self._request('POST', '/admin/prune-expired-keys', data, require_auth=True)
 
+    @property
+    def settings_fresh(self) -> bool:
+        return self.settings_snapshot is not None and time.monotonic() - self.settings_fetched_at < self.settings_ttl
+
+    async def get_settings(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """All API settings from a local snapshot, re-read from the API once ``settings_ttl`` lapses.
+
+        An empty POST to /admin/settings reads the settings without changing
+        them, like get_session_tokens does for its route. Session-token state
+        is merged in from its own route if the settings response lacks it, and
+        is all the snapshot holds if the API doesn't return settings there.
+        """
+        if not refresh and self.settings_fresh:
+            return dict(self.settings_snapshot)
+        response = await self._request('POST', '/admin/settings', {}, require_auth=True, coalesce=True)
+        if response and isinstance(response.get('settings'), dict):
+            snapshot = dict(response['settings'])
+        else:
+            snapshot = {}
+        if 'session_tokens_enabled' not in snapshot:
+            tokens = await self.get_session_tokens()
+            if tokens and 'session_tokens_enabled' in tokens:
+                snapshot['session_tokens_enabled'] = tokens['session_tokens_enabled']
+        if not snapshot:
+            return dict(self.settings_snapshot) if self.settings_snapshot is not None else None
+        self.settings_snapshot = snapshot
+        self.settings_fetched_at = time.monotonic()
+        return dict(snapshot)
+
     async def update_settings(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        return await self._request('POST', '/admin/settings', payload, require_auth=True)
+        """Send only the fields that differ from the current snapshot.
+
+        Returns ``{'success': True, 'unchanged': True}`` without a write only
+        when nothing differs from a snapshot read from the API for this call,
+        since a cached one can miss changes made elsewhere. The snapshot is
+        updated from the response.
+        """
+        fetched_at = self.settings_fetched_at
+        current = await self.get_settings() or {}
+        changed = {k: v for k, v in payload.items() if k not in current or current[k] != v}
+        if not changed and self.settings_fetched_at == fetched_at:
+            current = await self.get_settings(refresh=True) or {}
+            if self.settings_fetched_at == fetched_at:
+                # Couldn't re-read the settings; write rather than trust the cached snapshot.
+                changed = dict(payload)
+            else:
+                changed = {k: v for k, v in payload.items() if k not in current or current[k] != v}
+        if not changed:
+            return {'success': True, 'unchanged': True, 'settings': current, 'changed': {}}
+        response = await self._request('POST', '/admin/settings', changed, require_auth=True)
+        if response and response.get('success'):
+            if isinstance(response.get('settings'), dict):
+                merged = dict(current)
+                merged.update(response['settings'])
+            else:
+                merged = dict(current, **changed)
+            self.settings_snapshot = merged
+            self.settings_fetched_at = time.monotonic()
+            response['changed'] = changed
+            response.setdefault('settings', merged)
+        return response
+
+async def gather_bounded(
+    items: Iterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    limit: int = 8,
+    on_result: Optional[Callable[[Any, Any], Any]] = None
+) -> List[Any]:
+    """Run ``worker`` over ``items`` with at most ``limit`` calls in flight.
+
+    Results are returned in input order; a worker exception is returned in
+    place of its result instead of cancelling the rest of the batch.
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, item: Any):
+        async with semaphore:
+            try:
+                result = await worker(item)
+            except Exception as e:
+                result = e
+        results[index] = result
+        if on_result:
+            outcome = on_result(item, result)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+
+    await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+    return results
+
+async def retry_async(
+    call: Callable[[], Awaitable[Any]],
+    attempts: int = 3,
+    base_delay: float = 0.5,
+    should_retry: Callable[[Any], bool] = lambda result: result is None
+) -> Any:
+    """Call ``call`` until it returns a non-retryable result, backing off exponentially.
+
+    APIClient methods return ``None`` on timeouts and connection errors, which is
+    the default retry condition; exceptions are retried the same way.
+    """
+    result = None
+    for attempt in range(attempts):
+        try:
+            result = await call()
+        except Exception as e:
+            result = e
+        if not isinstance(result, Exception) and not should_retry(result):
+            return result
+        if attempt < attempts - 1:
+            await asyncio.sleep(base_delay * (2 ** attempt))
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = 4096) -> AsyncIterator[str]:
+    """Split a byte-chunk stream into decoded text lines, holding at most one partial line."""
+    pending = b''
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line[:max_line].decode('utf-8', errors='ignore').strip()
+        if len(pending) > max_line:
+            pending = pending[:max_line]
+    if pending:
+        yield pending.decode('utf-8', errors='ignore').strip()
+
+SCRIPT_CHUNK_SIZE = 64 * 1024
+SCRIPT_BLOCK_SIZE = 16 * 1024
+SCRIPT_SPOOL_MEMORY = 1024 * 1024
+SCRIPT_UPLOAD_TIMEOUT = 120
+DOWNLOAD_TIMEOUT = 300
+DOWNLOAD_READ_TIMEOUT = 30
+SCRIPT_MANIFEST_TTL = 300
+SCRIPT_BLOB_HISTORY = 20
+SETTINGS_TTL = 300
+READ_ONLY_ENDPOINTS = frozenset({
+    '/health',
+    '/admin/key-info',
+    '/admin/key-stats',
+    '/admin/list-keys',
+    '/admin/script/list',
+})
+
+
+class SpooledScript:
+    """A script gzip-compressed into a temp file as it streams in, with its sha256 and sizes.
+
+    Only ``SCRIPT_SPOOL_MEMORY`` bytes of compressed data are kept in memory
+    before the spool rolls over to disk, so a multi-MB upload never holds more
+    than about one chunk of raw bytes at a time. Short hashes of each
+    ``SCRIPT_BLOCK_SIZE`` block are kept too, to estimate how much of a script
+    changed between uploads.
+    """
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=SCRIPT_SPOOL_MEMORY)
+        self.size = 0
+        self.compressed_size = 0
+        self.sha256 = ''
+        self.blocks: List[str] = []
+
+    @classmethod
+    async def build(cls, chunks: AsyncIterator[bytes]) -> 'SpooledScript':
+        spooled = cls()
+        digest = hashlib.sha256()
+        block = bytearray()
+        try:
+            with gzip.GzipFile(fileobj=spooled.file, mode='wb', compresslevel=6, mtime=0) as gz:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    gz.write(chunk)
+                    spooled.size += len(chunk)
+                    block += chunk
+                    while len(block) >= SCRIPT_BLOCK_SIZE:
+                        spooled.blocks.append(hashlib.sha256(block[:SCRIPT_BLOCK_SIZE]).hexdigest()[:16])
+                        del block[:SCRIPT_BLOCK_SIZE]
+                if block:
+                    spooled.blocks.append(hashlib.sha256(block).hexdigest()[:16])
+        except BaseException:
+            spooled.close()
+            raise
+        spooled.sha256 = digest.hexdigest()
+        spooled.compressed_size = spooled.file.tell()
+        return spooled
+
+    async def iter_chunks(self, chunk_size: int = SCRIPT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        self.file.seek(0)
+        while True:
+            chunk = self.file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def diff(self, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Estimate bytes changed against a manifest entry by comparing block hashes.
+
+        Fixed-size blocks mean an insertion near the start counts every later
+        block as changed, so this is an upper bound, not an exact delta.
+        """
+        if not previous:
+            return {'new': True, 'bytes_changed': self.size, 'blocks_changed': len(self.blocks), 'blocks_total': len(self.blocks)}
+        old_blocks = previous.get('blocks')
+        if not old_blocks:
+            return {'new': False, 'bytes_changed': None, 'size_delta': self.size - previous.get('size', 0)}
+        changed = 0
+        changed_bytes = 0
+        for i, block in enumerate(self.blocks):
+            if i >= len(old_blocks) or old_blocks[i] != block:
+                changed += 1
+                changed_bytes += min(SCRIPT_BLOCK_SIZE, self.size - i * SCRIPT_BLOCK_SIZE)
+        return {
+            'new': False,
+            'bytes_changed': changed_bytes,
+            'blocks_changed': changed,
+            'blocks_total': len(self.blocks),
+            'size_delta': self.size - previous.get('size', 0),
+        }
+
+    def save_blob(self, directory: str):
+        """Keep the compressed script under its sha256 so it can be restored later."""
+        path = os.path.join(directory, f"{self.sha256}.gz")
+        if os.path.exists(path):
+            os.utime(path)
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.file.seek(0)
+            with open(f"{path}.tmp", 'wb') as f:
+                shutil.copyfileobj(self.file, f, SCRIPT_CHUNK_SIZE)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            print(f"Error saving script copy: {e}")
+
+    def read_text(self) -> str:
+        self.file.seek(0)
+        with gzip.GzipFile(fileobj=self.file, mode='rb') as gz:
+            return gz.read().decode('utf-8', errors='ignore')
+
+    async def iter_json_string(self, chunk_size: int = SCRIPT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """The script as a JSON string literal, ``json.dumps(self.read_text())``, in pieces.
+
+        Decompresses and decodes one chunk at a time; a UTF-8 sequence split
+        across chunks is carried over by the incremental decoder.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        yield b'"'
+        self.file.seek(0)
+        with gzip.GzipFile(fileobj=self.file, mode='rb') as gz:
+            while True:
+                chunk = gz.read(chunk_size)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    yield json.dumps(text)[1:-1].encode('ascii')
+                if not chunk:
+                    break
+                await asyncio.sleep(0)
+        yield b'"'
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> 'SpooledScript':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def iter_zip_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, chunk_size: int = SCRIPT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Decompress one archive member in chunks, yielding to the event loop between them."""
+    with archive.open(member) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+            await asyncio.sleep(0)
+
 
 def format_duration(seconds: int) -> str:
     if seconds < 60:
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils import APIClient, gather_bounded
+from keyindex import storage_key_name
+
+WORKER_MAX_MESSAGE = 64 * 1024 * 1024
+WORKER_START_TIMEOUT = 15
+PROGRESS_INTERVAL = 0.5
+
+ProgressFn = Callable[[str], Awaitable[Any]]
+
+
+# -- tasks ---------------------------------------------------------------------
+# Each task takes (client, args, progress) and returns a JSON-serialisable dict.
+# The same functions run in the worker process or, without one, on the bot's loop.
+
+async def bulk_generate(client: APIClient, args: Dict[str, Any], progress: Optional[ProgressFn]) -> Dict[str, Any]:
+    count = args['count']
+    created = []
+    failures = 0
+    for n in range(count):
+        resp = await client.create_key(duration_seconds=args['duration_seconds'], discord_user_id=None)
+        if resp and resp.get('key'):
+            created.append(resp)
+        else:
+            failures += 1
+        if progress:
+            await progress(f"Created {len(created)}/{count} key(s)...")
+    return {'created': created, 'failures': failures}
+
+
+async def key_inventory(client: APIClient, args: Dict[str, Any], progress: Optional[ProgressFn]) -> Dict[str, Any]:
+    # list_keys indexes every key it returns; owners the listing doesn't carry are resolved with key_info,
+    # once: keys already resolved without an owner (e.g. from /bulkgenerate) are skipped on later runs.
+    # args['unowned'] carries those keys from the bot's index, which a worker process doesn't share.
+    resolve_limit = args['resolve_limit']
+    unowned = set(args.get('unowned') or ())
+    unresolved = []
+    scanned = 0
+    async for item in client.iter_keys(page_size=args.get('page_size', 100)):
+        scanned += 1
+        key = storage_key_name(item.get('key') or '')
+        record = client.key_index.get(key)
+        if (record is not None and record.owner is None and not record.resolved and key not in unowned
+                and len(unresolved) < resolve_limit):
+            unresolved.append(key)
+        if progress and scanned % 500 == 0:
+            await progress(f"Scanned {scanned} keys...")
+    counts = {'done': 0}
+
+    async def on_resolved(key, result):
+        counts['done'] += 1
+        if progress:
+            await progress(f"Scanned {scanned} keys • Resolving owners {counts['done']}/{len(unresolved)}")
+
+    await gather_bounded(unresolved, client.key_info, limit=args['concurrency'], on_result=on_resolved)
+    result = {
+        'scanned': scanned,
+        'resolved': len(unresolved),
+        'partial': scanned > client.key_index.capacity or len(unresolved) >= resolve_limit,
+    }
+    if args.get('remote'):
+        # The worker's index isn't the bot's; ship it back so the bot can merge it.
+        result['records'] = client.key_index.export()
+    return result
+
+
+WORKER_TASKS: Dict[str, Callable[[APIClient, Dict[str, Any], Optional[ProgressFn]], Awaitable[Dict[str, Any]]]] = {
+    'bulk_generate': bulk_generate,
+    'key_inventory': key_inventory,
+}
+
+
+# -- bot side ------------------------------------------------------------------
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class WorkerUnavailable(WorkerError):
+    """The worker process could not be started; the job was never sent."""
+
+
+class WorkerClient:
+    """Runs ``WORKER_TASKS`` in a child process with its own event loop and APIClient.
+
+    Jobs and replies are JSON lines over the child's stdin/stdout. The child
+    announces itself with ``{"ready": pid}``; the bot then sends
+    ``{"id", "task", "args"}`` and gets back any number of
+    ``{"id", "progress"}`` lines, then one ``{"id", "result"}`` or
+    ``{"id", "error"}``. The process is started on first use and restarted on
+    the next job if it exits; jobs in flight when it dies fail with
+    ``WorkerError``, and a child that never gets ready raises
+    ``WorkerUnavailable`` before any job is sent. When the bot exits, the child
+    sees EOF and stops too.
+    """
+
+    def __init__(self, env: Dict[str, str], script: str = os.path.abspath(__file__)):
+        self.env = env
+        self.script = script
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[int, Tuple[asyncio.Future, Optional[ProgressFn]]] = {}
+        self._callbacks: set = set()
+        self._reader: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self.metrics = {'submitted': 0, 'completed': 0, 'failed': 0, 'restarts': 0}
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        async with self._lock:
+            if self.running:
+                return
+            if self.process is not None:
+                self.metrics['restarts'] += 1
+            self._ready = asyncio.Event()
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    sys.executable, self.script,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    env={**os.environ, **self.env},
+                    limit=WORKER_MAX_MESSAGE
+                )
+            except Exception as e:
+                raise WorkerUnavailable(f"could not start worker: {e}") from e
+            self._reader = asyncio.create_task(self._read(self.process, self._ready))
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=WORKER_START_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                raise WorkerUnavailable(f"worker did not start within {WORKER_START_TIMEOUT}s")
+            if not self.running:
+                raise WorkerUnavailable(f"worker exited during startup with code {self.process.returncode}")
+            print(f"[WORKER] Started worker process {self.process.pid}")
+
+    async def submit(self, task: str, args: Dict[str, Any], progress: Optional[ProgressFn] = None) -> Dict[str, Any]:
+        await self.start()
+        self._next_id += 1
+        job_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = (future, progress)
+        self.metrics['submitted'] += 1
+        try:
+            try:
+                self.process.stdin.write(json.dumps({'id': job_id, 'task': task, 'args': args}).encode('utf-8') + b"\n")
+                await self.process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as e:
+                raise WorkerUnavailable(f"worker pipe closed: {e}") from e
+            return await future
+        finally:
+            self._pending.pop(job_id, None)
+
+    def _progress(self, progress: ProgressFn, text: str):
+        # Progress callbacks edit Discord messages; don't let them hold up reading replies.
+        task = asyncio.create_task(progress(text))
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def _read(self, process: asyncio.subprocess.Process, ready: asyncio.Event):
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                if 'ready' in msg:
+                    ready.set()
+                    continue
+                entry = self._pending.get(msg.get('id'))
+                if entry is None:
+                    continue
+                future, progress = entry
+                if future.done():
+                    continue
+                if 'progress' in msg:
+                    if progress:
+                        self._progress(progress, msg['progress'])
+                elif 'error' in msg:
+                    self.metrics['failed'] += 1
+                    future.set_exception(WorkerError(msg['error']))
+                else:
+                    self.metrics['completed'] += 1
+                    future.set_result(msg.get('result') or {})
+        except Exception as e:
+            print(f"[WARN] Worker reply stream failed: {e}")
+            process.kill()
+        code = await process.wait()
+        ready.set()
+        print(f"[WORKER] Worker process {process.pid} exited with code {code}")
+        for future, _ in list(self._pending.values()):
+            if not future.done():
+                self.metrics['failed'] += 1
+                future.set_exception(WorkerError(f"worker exited with code {code}"))
+
+    async def close(self):
+        if not self.running:
+            return
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+
+
+# -- worker side ---------------------------------------------------------------
+
+async def serve(base_url: str, secret: str, out_fd: int):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=WORKER_MAX_MESSAGE)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, os.fdopen(out_fd, 'wb'))
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    client = APIClient(base_url, secret)
+    running: set = set()
+
+    async def send(msg: Dict[str, Any]):
+        writer.write(json.dumps(msg, ensure_ascii=False).encode('utf-8') + b"\n")
+        await writer.drain()
+
+    async def run(job_id: int, task: str, args: Dict[str, Any]):
+        last = 0.0
+
+        async def progress(text: str):
+            nonlocal last
+            if time.monotonic() - last >= PROGRESS_INTERVAL:
+                last = time.monotonic()
+                await send({'id': job_id, 'progress': text})
+
+        try:
+            result = await WORKER_TASKS[task](client, {**args, 'remote': True}, progress)
+            await send({'id': job_id, 'result': result})
+        except Exception as e:
+            print(f"[WORKER] {task} failed: {e}")
+            await send({'id': job_id, 'error': str(e)[:500]})
+
+    await send({'ready': os.getpid()})
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        msg = json.loads(line)
+        if msg.get('task') not in WORKER_TASKS:
+            await send({'id': msg.get('id'), 'error': f"unknown task {msg.get('task')!r}"})
+            continue
+        job = asyncio.create_task(run(msg['id'], msg['task'], msg.get('args') or {}))
+        running.add(job)
+        job.add_done_callback(running.discard)
+    for job in running:
+        job.cancel()
+    await client.close()
+
+
+def main():
+    # stdout carries the protocol; point fd 1 at stderr so log prints can't corrupt it.
+    out_fd = os.dup(1)
+    os.dup2(2, 1)
+    asyncio.run(serve(os.environ['API_BASE'], os.environ['BOT_SECRET'], out_fd))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The bot modules import each other as top-level modules (bot/ is the working directory in production).
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot')
+sys.path.insert(0, os.path.abspath(BOT_DIR))
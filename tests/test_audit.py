@@ -0,0 +1,191 @@
+import asyncio
+import json
+import types
+
+import discord
+
+import audit
+from audit import AuditSink
+from outbound import OutboundScheduler
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 1):
+        self.id = channel_id
+        self.sent = []
+        self.fail_with = []
+
+    async def send(self, **kwargs):
+        if self.fail_with:
+            raise self.fail_with.pop(0)
+        self.sent.append(kwargs)
+
+
+def http_error(status: int, cls=discord.HTTPException) -> discord.HTTPException:
+    response = types.SimpleNamespace(status=status, reason='error', headers={})
+    return cls(response, 'error')
+
+
+def event(i: int = 0, **extra) -> dict:
+    return {
+        'timestamp': '2026-01-01T12:00:00', 'command': 'givekey', 'executor_id': 1,
+        'executor_name': 'admin', 'target_user_id': 100 + i, 'details': {'duration': '1d', 'n': i}, **extra,
+    }
+
+
+def sink_for(tmp_path, channels, **kwargs) -> AuditSink:
+    sink = AuditSink(OutboundScheduler(), path=str(tmp_path / 'audit_queue.json'), **kwargs)
+    sink._channel_getter = channels.get
+    return sink
+
+
+def flush(sink: AuditSink):
+    async def main():
+        await sink.flush()
+        await sink.outbox.close()
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
+
+
+def test_events_are_posted_as_multi_embed_messages(tmp_path):
+    channel = FakeChannel()
+    sink = sink_for(tmp_path, {None: channel})
+    for i in range(12):
+        sink.publish(event(i))
+    flush(sink)
+    assert [len(message['embeds']) for message in channel.sent] == [10, 2]
+    first = channel.sent[0]['embeds'][0]
+    assert first.title == 'Key Issued'
+    assert [field.name for field in first.fields] == ['By', 'User', 'duration', 'n']
+    assert sink.pending == []
+    assert sink.metrics['messages'] == 2
+
+
+def test_large_batches_become_a_text_digest(tmp_path):
+    channel = FakeChannel()
+    sink = sink_for(tmp_path, {None: channel}, digest_threshold=5)
+    for i in range(40):
+        sink.publish(event(i))
+    flush(sink)
+    assert sink.pending == []
+    assert sink.metrics['digests'] == len(channel.sent) >= 1
+    assert all(len(message['content']) <= 2000 for message in channel.sent)
+    assert sum(message['content'].count('/givekey') for message in channel.sent) == 40
+
+
+def test_failed_sends_stay_queued(tmp_path):
+    channel = FakeChannel()
+    channel.fail_with = [http_error(500)]
+    sink = sink_for(tmp_path, {None: channel})
+    sink.publish(event())
+    flush(sink)
+    assert len(sink.pending) == 1
+    flush(sink)
+    assert sink.pending == []
+    assert len(channel.sent) == 1
+
+
+def test_queue_is_capped_at_max_pending(tmp_path):
+    sink = sink_for(tmp_path, {}, max_pending=3)
+    for i in range(5):
+        sink.publish(event(i))
+    assert [e['details']['n'] for e in sink.pending] == [2, 3, 4]
+    assert sink.metrics['dropped'] == 2
+
+
+def test_unsent_events_survive_a_restart(tmp_path):
+    sink = sink_for(tmp_path, {})
+    sink.publish(event(1))
+    sink.persist()
+    with open(tmp_path / 'audit_queue.json', encoding='utf-8') as f:
+        assert len(json.load(f)) == 1
+    restored = sink_for(tmp_path, {})
+    assert restored.pending == [event(1)]
+
+
+def test_events_go_to_their_own_guilds_channel(tmp_path):
+    primary, other = FakeChannel(1), FakeChannel(2)
+    sink = sink_for(tmp_path, {None: primary, 10: primary, 20: other})
+    sink.publish(event(1, guild_id=10))
+    sink.publish(event(2, guild_id=20))
+    sink.publish(event(3))
+    flush(sink)
+    assert [len(m['embeds']) for m in primary.sent] == [2]
+    assert [len(m['embeds']) for m in other.sent] == [1]
+
+
+def test_events_for_guilds_without_an_audit_channel_are_dropped(tmp_path):
+    channel = FakeChannel()
+    sink = sink_for(tmp_path, {10: channel})
+    sink.publish(event(1, guild_id=10))
+    sink.publish(event(2, guild_id=20))
+    flush(sink)
+    assert sink.pending == []
+    assert sink.metrics['dropped'] == 1
+    assert len(channel.sent) == 1
+
+
+def test_forbidden_and_missing_channels_are_not_retried(tmp_path):
+    forbidden, missing = FakeChannel(1), FakeChannel(2)
+    forbidden.fail_with = [http_error(403, discord.Forbidden)]
+    missing.fail_with = [http_error(404, discord.NotFound)]
+    sink = sink_for(tmp_path, {10: forbidden, 20: missing})
+    sink.publish(event(1, guild_id=10))
+    sink.publish(event(2, guild_id=20))
+
+    async def main():
+        failed = await sink.flush()
+        await sink.outbox.close()
+        return failed
+
+    assert asyncio.run(main()) is False
+    assert sink.pending == []
+    assert sink.metrics['dropped'] == 2
+
+
+def test_flush_backs_off_after_failed_ticks(tmp_path, monkeypatch):
+    sink = sink_for(tmp_path, {}, flush_interval=3, max_backoff=20)
+    outcomes = [True, True, True, True, False]
+    delays = []
+
+    async def fake_flush():
+        return outcomes.pop(0)
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) > 5:
+            raise asyncio.CancelledError
+
+    sink.flush = fake_flush
+    monkeypatch.setattr(audit.asyncio, 'sleep', fake_sleep)
+
+    async def main():
+        try:
+            await sink._run()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
+    assert delays == [3, 6, 12, 20, 20, 3]
+
+
+def test_a_full_queue_warns_once(tmp_path, capsys):
+    sink = sink_for(tmp_path, {}, max_pending=3)
+    for i in range(10):
+        sink.publish(event(i))
+    assert capsys.readouterr().out.count('Audit queue full') == 1
+    assert sink.metrics['dropped'] == 7
+
+
+def test_events_with_attachments_are_sent_on_their_own(tmp_path):
+    channel = FakeChannel()
+    sink = sink_for(tmp_path, {None: channel}, digest_threshold=2)
+    for i in range(3):
+        sink.publish(event(i))
+    sink.publish(event(9, attachment={'filename': 'grant.csv', 'content': 'user_id,key\n1,abc...xyz\n'}))
+    flush(sink)
+    files = [m for m in channel.sent if 'file' in m]
+    assert len(files) == 1 and files[0]['file'].filename == 'grant.csv'
+    assert files[0]['embed'].title == 'Key Issued'
+    digest = next(m['content'] for m in channel.sent if 'content' in m)
+    assert digest.count('/givekey') == 3
+    assert sink.pending == [] and sink.metrics['digests'] == 1
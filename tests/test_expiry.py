@@ -0,0 +1,147 @@
+import asyncio
+import time
+from datetime import datetime
+
+from expiry import MIN_PRUNE_INTERVAL, PRUNE_GRACE, ExpiryScheduler, parse_expiry
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+class Pruner:
+    def __init__(self, result=0):
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def scheduler(prune=None, remind=None, **kwargs) -> ExpiryScheduler:
+    sched = ExpiryScheduler(prune or Pruner(), remind, **kwargs)
+    sched.last_prune = time.time() - 3600
+    sched.started_at = time.time()
+    return sched
+
+
+def test_parse_expiry():
+    assert parse_expiry('2030-01-01T00:00:00') == datetime(2030, 1, 1).timestamp()
+    assert parse_expiry(None) is None
+    assert parse_expiry('soon') is None
+
+
+def test_schedule_wakes_for_earliest_expiry_plus_grace():
+    now = time.time()
+    sched = scheduler(max_interval=6 * 3600)
+    sched.track('late', iso(now + 7200))
+    sched.track('early', iso(now + 600))
+    assert sched._schedule() == parse_expiry(iso(now + 600)) + PRUNE_GRACE
+    assert sched.next_reason == 'expired keys'
+
+
+def test_schedule_falls_back_to_interval():
+    sched = scheduler(max_interval=100)
+    assert sched._schedule() == sched.last_prune + 100
+    assert sched.next_reason == 'interval'
+
+
+def test_schedule_never_prunes_sooner_than_min_interval():
+    now = time.time()
+    sched = scheduler()
+    sched.last_prune = now
+    sched.track('k', iso(now - 10))
+    assert sched._schedule() == now + MIN_PRUNE_INTERVAL
+
+
+def test_retracked_and_forgotten_keys_are_skipped_lazily():
+    now = time.time()
+    sched = scheduler()
+    sched.track('moved', iso(now + 60))
+    sched.track('moved', iso(now + 5000))
+    sched.track('gone', iso(now + 120))
+    sched.forget('gone')
+    assert sched._peek(sched._heap) == parse_expiry(iso(now + 5000))
+    assert len(sched._heap) == 1
+    assert len(sched) == 1
+
+
+def test_tick_prunes_and_forgets_expired_keys():
+    now = time.time()
+    prune = Pruner(result=2)
+    sched = scheduler(prune)
+    sched.track('a', iso(now - 120))
+    sched.track('b', iso(now - 60))
+    sched.track('future', iso(now + 3600))
+    asyncio.run(sched._tick())
+    assert prune.calls == 1
+    assert sched.metrics == {'prunes': 1, 'pruned_keys': 2, 'reminders': 0}
+    assert 'a' not in sched._expiry and 'b' not in sched._expiry
+    assert len(sched) == 1
+
+
+def test_failed_prune_keeps_keys_queued():
+    now = time.time()
+    sched = scheduler(Pruner(result=None))
+    sched.track('a', iso(now - 60))
+    asyncio.run(sched._tick())
+    assert sched._peek(sched._heap) == parse_expiry(iso(now - 60))
+
+
+def test_tick_too_soon_after_last_prune_waits():
+    now = time.time()
+    prune = Pruner()
+    sched = scheduler(prune)
+    sched.last_prune = now
+    sched.track('a', iso(now - 60))
+    asyncio.run(sched._tick())
+    assert prune.calls == 0
+    assert len(sched._heap) == 1
+
+
+def test_reminders_only_for_keys_tracked_before_their_window():
+    now = time.time()
+    sent = []
+
+    async def remind(key, owner, expires):
+        sent.append((key, owner))
+
+    sched = scheduler(remind=remind, reminder_lead=3600)
+    sched.track('fresh', iso(now + 3600 + 0.5), owner='1')
+    sched.track('inside', iso(now + 1800), owner='2')
+    assert sched.reminders_pending == 1
+    time.sleep(0.6)
+    asyncio.run(sched._send_reminders(time.time()))
+    assert sent == [('fresh', '1')]
+    assert sched.reminders_pending == 0
+
+
+def test_reminders_are_off_without_a_callback():
+    now = time.time()
+    sched = scheduler(reminder_lead=3600)
+    sched.track('k', iso(now + 7200), owner='1')
+    assert sched.reminders_pending == 0
+
+
+def test_keys_crossing_before_start_get_no_reminder():
+    now = time.time()
+    sent = []
+
+    async def remind(key, owner, expires):
+        sent.append(key)
+
+    sched = ExpiryScheduler(Pruner(), remind, reminder_lead=3600)
+    # Tracked during startup, before the scheduler runs; its threshold passes before start().
+    sched.track('startup', iso(now + 3600 + 0.2), owner='1')
+    time.sleep(0.3)
+
+    async def run():
+        sched.start()
+        sched.track('later', iso(time.time() + 3600 + 0.2), owner='2')
+        await asyncio.sleep(0.4)
+        await sched._send_reminders(time.time())
+        sched._task.cancel()
+
+    asyncio.run(run())
+    assert sent == ['later']
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from guilds import GuildConfig, build_states, load_guild_configs, state_file
+
+DEFAULTS = GuildConfig(
+    guild_id=1, admin_role_id=11, developer_role_id=12, owner_role_id=13,
+    audit_channel_id=14, vouch_channel_id=15, trusted_role_id=16, staff_role_ids=[11, 12, 13],
+)
+
+
+def write(tmp_path, data) -> str:
+    path = tmp_path / 'guilds.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_without_a_guilds_file_only_the_defaults_are_served(tmp_path):
+    assert load_guild_configs(str(tmp_path / 'missing.json'), DEFAULTS) == [DEFAULTS]
+
+
+def test_entries_fall_back_to_defaults_per_field(tmp_path):
+    path = write(tmp_path, {'guilds': [
+        {'guild_id': '1'},
+        {'guild_id': 2, 'name': 'Second', 'admin_role_id': 21, 'audit_channel_id': 0, 'staff_role_ids': [21]},
+    ]})
+    primary, second = load_guild_configs(path, DEFAULTS)
+    assert primary.guild_id == 1 and primary.admin_role_id == 11 and primary.name == '1'
+    assert second.name == 'Second'
+    assert second.admin_role_id == 21
+    assert second.owner_role_id == 13
+    assert second.audit_channel_id == 0
+    assert second.staff_role_ids == frozenset({21})
+
+
+def test_a_plain_list_is_accepted(tmp_path):
+    path = write(tmp_path, [{'guild_id': 5}])
+    assert [g.guild_id for g in load_guild_configs(path, DEFAULTS)] == [5]
+
+
+@pytest.mark.parametrize('data', [{'guilds': []}, {'guilds': [{'guild_id': 1}, {'guild_id': 1}]}])
+def test_empty_or_duplicate_guild_lists_are_rejected(tmp_path, data):
+    with pytest.raises(ValueError):
+        load_guild_configs(write(tmp_path, data), DEFAULTS)
+
+
+def test_only_the_primary_guild_keeps_the_original_file_names():
+    assert state_file('vouches.json', 2, primary=True) == 'vouches.json'
+    assert state_file('vouches.json', 2, primary=False) == 'vouches_2.json'
+    states = build_states([DEFAULTS, GuildConfig(2, 21, 22, 23)], 'logs.json', 'vouches.json', 10, 10)
+    assert states[1].logs_file == 'logs.json'
+    assert states[2].vouches_file == 'vouches_2.json'
+
+
+def test_state_round_trips_and_rebuilds_the_vouch_index(tmp_path):
+    config = GuildConfig(2, 21, 22, 23)
+    state = build_states([DEFAULTS, config], str(tmp_path / 'logs.json'), str(tmp_path / 'vouches.json'), 3, 10)[2]
+    state.vouches = {'42': {'count': 2, 'entries': [{'message_id': 900}, {'message_id': 901}]}}
+    state.dirty['vouches'] = True
+    for i in range(5):
+        state.append_log({'n': i})
+    state.flush()
+    assert state.dirty == {'logs': False, 'vouches': False}
+
+    reloaded = build_states([DEFAULTS, config], str(tmp_path / 'logs.json'), str(tmp_path / 'vouches.json'), 3, 10)[2]
+    reloaded.load_logs()
+    reloaded.load_vouches()
+    assert [entry['n'] for entry in reloaded.command_logs] == [2, 3, 4]
+    assert reloaded.vouch_index == {'900': 42, '901': 42}
+    assert reloaded.vouch_count(42) == 2
+    assert reloaded.vouch_count(7) == 0
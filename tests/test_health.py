@@ -0,0 +1,63 @@
+import asyncio
+
+from health import SPARK_BLOCKS, HealthMonitor
+
+
+def monitor(results, **kwargs) -> HealthMonitor:
+    results = list(results)
+
+    async def probe():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return HealthMonitor(probe, **kwargs)
+
+
+def probe_all(mon: HealthMonitor, count: int):
+    async def main():
+        return [await mon.probe() for _ in range(count)]
+    return asyncio.run(main())
+
+
+def test_ring_buffer_keeps_only_the_newest_samples():
+    mon = monitor([{'status': 'ok'}] * 5 + [None] * 2, size=4)
+    probe_all(mon, 7)
+    assert len(mon.samples) == 4
+    assert [ok for _, ok, _ in mon.samples] == [True, True, False, False]
+    assert mon.total_probes == 7
+    assert mon.total_failures == 2
+    assert mon.uptime_pct == 50.0
+
+
+def test_probe_result_and_status():
+    mon = monitor([{'status': 'ok'}, {'status': 'degraded'}, RuntimeError('refused'), None])
+    assert probe_all(mon, 4) == [True, False, False, False]
+    assert mon.last_status == 'unreachable'
+
+
+def test_available_after_threshold_failures_and_recovers():
+    mon = monitor([None, None, None, {'status': 'ok'}], failure_threshold=3)
+    probe_all(mon, 2)
+    assert mon.available
+    probe_all(mon, 1)
+    assert not mon.available
+    probe_all(mon, 1)
+    assert mon.available
+    assert mon.consecutive_failures == 0
+
+
+def test_latency_stats_ignore_failed_probes():
+    mon = monitor([])
+    mon.samples.extend([(0, True, 10.0), (0, False, 900.0), (0, True, 30.0), (0, True, 20.0)])
+    assert mon.latency_stats() == {'last': 20.0, 'p50': 20.0, 'p95': 30.0, 'max': 30.0}
+    assert monitor([]).latency_stats() is None
+    assert monitor([]).uptime_pct is None
+
+
+def test_sparkline_scales_latency_and_marks_failures():
+    mon = monitor([])
+    mon.samples.extend([(0, True, 10.0), (0, False, 0.0), (0, True, 50.0)])
+    assert mon.sparkline() == SPARK_BLOCKS[0] + "✖" + SPARK_BLOCKS[-1]
+    assert mon.sparkline(width=1) == SPARK_BLOCKS[0]
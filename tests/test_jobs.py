@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from jobs import JobScheduler
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+def failing_job():
+    async def func():
+        raise RuntimeError('down')
+    return func
+
+
+def test_backoff_doubles_per_failure_and_is_capped():
+    async def main():
+        jobs = JobScheduler()
+        job = jobs.add('j', failing_job(), interval=10, jitter=0.0, max_backoff=50)
+        delays = []
+        for _ in range(4):
+            await jobs._run(job)
+            delays.append(job._delay())
+        return job, delays
+
+    job, delays = run(main())
+    assert delays == [20, 40, 50, 50]
+    assert job.failures == 4
+    assert job.last_error == 'down'
+
+
+def test_default_backoff_cap_is_eight_intervals():
+    jobs = JobScheduler()
+    job = jobs.add('j', failing_job(), interval=10, jitter=0.0)
+    job.failures = 10
+    assert job._delay() == 80
+
+
+def test_success_resets_backoff():
+    state = {'fail': True}
+
+    async def func():
+        if state['fail']:
+            raise RuntimeError('down')
+
+    async def main():
+        jobs = JobScheduler()
+        job = jobs.add('j', func, interval=10, jitter=0.0)
+        await jobs._run(job)
+        state['fail'] = False
+        await jobs._run(job)
+        return job
+
+    job = run(main())
+    assert job.failures == 0
+    assert job.last_error is None
+    assert job.runs == 2
+    assert job._delay() == 10
+
+
+def test_timeout_counts_as_failure():
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def main():
+        jobs = JobScheduler()
+        job = jobs.add('j', slow, interval=10, jitter=0.0, timeout=0.05)
+        await jobs._run(job)
+        return job
+
+    job = run(main())
+    assert job.failures == 1
+    assert job.last_error.startswith('timed out')
+    assert not job.running
+
+
+def test_jitter_stays_within_bounds():
+    jobs = JobScheduler()
+    job = jobs.add('j', failing_job(), interval=100, jitter=0.1)
+    assert all(90 <= job._delay() <= 110 for _ in range(200))
+
+
+def test_trigger_while_running_is_skipped():
+    async def main():
+        release = asyncio.Event()
+        calls = []
+
+        async def func():
+            calls.append(time.time())
+            await release.wait()
+
+        jobs = JobScheduler()
+        job = jobs.add('j', func, interval=3600, jitter=0.0)
+        jobs.start()
+        assert jobs.trigger('j')
+        while not job.running:
+            await asyncio.sleep(0.01)
+        assert not jobs.trigger('j')
+        release.set()
+        while job.running:
+            await asyncio.sleep(0.01)
+        await jobs.close()
+        return job, calls
+
+    job, calls = run(main())
+    assert len(calls) == 1
+    assert job.skipped == 1
+    assert job.runs == 1
+
+
+def test_start_is_idempotent():
+    async def main():
+        calls = []
+
+        async def func():
+            calls.append(1)
+
+        jobs = JobScheduler()
+        jobs.add('j', func, interval=3600, initial_delay=0.01)
+        jobs.start()
+        jobs.start()
+        await asyncio.sleep(0.1)
+        await jobs.close()
+        return calls
+
+    assert run(main()) == [1]
+
+
+def test_status_orders_by_next_run():
+    jobs = JobScheduler()
+    jobs.add('later', failing_job(), interval=60)
+    jobs.add('sooner', failing_job(), interval=60, initial_delay=1)
+    assert [job.name for job in jobs.status()] == ['sooner', 'later']
@@ -0,0 +1,104 @@
+from keyindex import KeyIndex, storage_key_name
+
+
+def test_storage_key_name_strips_folder_and_extension():
+    assert storage_key_name('keys/ABC-123.json') == 'ABC-123'
+    assert storage_key_name('ABC-123') == 'ABC-123'
+
+
+def test_prefix_search_is_sorted_and_limited():
+    index = KeyIndex()
+    for key in ('KEY-B2', 'KEY-A1', 'OTHER-1', 'KEY-A2', 'KEY-C3'):
+        index.add(key)
+    assert index.search('KEY-A') == ['KEY-A1', 'KEY-A2']
+    assert index.search('KEY-', limit=3) == ['KEY-A1', 'KEY-A2', 'KEY-B2']
+    assert index.search('NOPE') == []
+
+
+def test_search_falls_back_to_upper_case():
+    index = KeyIndex()
+    index.add('KEY-A1')
+    assert index.search('key-a') == ['KEY-A1']
+
+
+def test_empty_prefix_returns_most_recent_first():
+    index = KeyIndex()
+    for key in ('A', 'B', 'C'):
+        index.add(key)
+    index.add('A')
+    assert index.search('') == ['A', 'C', 'B']
+    assert index.search('', limit=2) == ['A', 'C']
+
+
+def test_capacity_evicts_least_recently_seen():
+    index = KeyIndex(capacity=3)
+    for key in ('A', 'B', 'C'):
+        index.add(key, owner=1)
+    index.add('A')
+    index.add('D')
+    assert 'B' not in index
+    assert len(index) == 3
+    assert index.search('B') == []
+    assert index.keys_for(1) == ['A', 'C']
+
+
+def test_owner_grouping_follows_owner_changes():
+    index = KeyIndex()
+    index.add('A', owner=1)
+    index.add('B', owner=1)
+    index.add('A', owner=2)
+    assert index.keys_for(1) == ['B']
+    assert index.keys_for('2') == ['A']
+    index.discard('B')
+    assert index.keys_for(1) == []
+    assert index.owner_count == 1
+
+
+def test_on_change_reports_owner_expiry_and_deletes_but_not_evictions():
+    index = KeyIndex(capacity=2)
+    changes = []
+    index.on_change = lambda key, record: changes.append((key, record and (record.owner, record.expires_at)))
+    index.add('A', owner=1, expires_at='2030-01-01T00:00:00')
+    index.add('A', owner=1, expires_at='2030-01-01T00:00:00', status='active')
+    index.add('A', expires_at='2031-01-01T00:00:00')
+    index.add('B')
+    index.add('C')
+    index.discard('B')
+    assert changes == [
+        ('A', ('1', '2030-01-01T00:00:00')),
+        ('A', ('1', '2031-01-01T00:00:00')),
+        ('B', None),
+    ]
+
+
+def test_add_response_indexes_api_fields_and_ignores_errors():
+    index = KeyIndex()
+    index.add_response('A', {'discord_user_id': 5, 'expiry_timestamp': '2030-01-01T00:00:00', 'status': 'active'})
+    index.add_response('B', {'error': 'not found'})
+    index.add_response('C', None)
+    record = index.get('A')
+    assert (record.owner, record.expires_at, record.status) == ('5', '2030-01-01T00:00:00', 'active')
+    assert len(index) == 1
+
+
+def test_export_round_trips():
+    index = KeyIndex()
+    index.add('A', owner=1, expires_at='x', status='active')
+    index.add('B')
+    index.add_response('C', {'discord_user_id': None, 'status': 'active'})
+    copy = KeyIndex()
+    for row in index.export():
+        copy.add(*row)
+    assert copy.export() == index.export()
+
+
+def test_api_records_mark_keys_resolved_without_an_owner():
+    index = KeyIndex()
+    index.add('LISTED')
+    index.add_response('GENERATED', {'discord_user_id': None, 'expiry_timestamp': 'x'})
+    index.add_response('OWNED', {'discord_user_id': 5})
+    assert not index.get('LISTED').resolved
+    assert index.get('GENERATED').resolved and index.get('OWNED').resolved
+    assert index.unowned() == ['GENERATED']
+    index.add('GENERATED', owner=6)
+    assert index.unowned() == []
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import types
+from datetime import timedelta
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from bench import load_bot  # noqa: E402
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+class FakeOutbox:
+    def __init__(self, dm_error=None):
+        self.dms = []
+        self.posts = []
+        self.dm_error = dm_error
+
+    async def send_dm(self, user, **kwargs):
+        if self.dm_error:
+            raise self.dm_error
+        self.dms.append(kwargs)
+
+    async def send(self, channel, priority, **kwargs):
+        self.posts.append(kwargs)
+
+
+def interaction(age: float) -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        created_at=discord.utils.utcnow() - timedelta(seconds=age),
+        user=types.SimpleNamespace(name='admin', mention='<@1>'),
+        channel=types.SimpleNamespace(id=5),
+        followup=FakeFollowup(),
+    )
+
+
+@pytest.fixture
+def keys(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    from cogs import keys
+    return botmod, keys
+
+
+def forbidden() -> discord.Forbidden:
+    return discord.Forbidden(types.SimpleNamespace(status=403, reason='Forbidden', headers={}), 'Cannot send messages to this user')
+
+
+def test_token_expiry_follows_the_interaction_age(keys):
+    botmod, _ = keys
+    assert not botmod.token_expired(interaction(60))
+    assert botmod.token_expired(interaction(botmod.INTERACTION_TOKEN_LIFETIME + 1))
+
+
+def test_result_is_a_followup_while_the_token_lasts(keys, monkeypatch):
+    _, cog = keys
+    outbox = FakeOutbox()
+    monkeypatch.setattr(cog, 'outbox', outbox)
+    fresh = interaction(60)
+    asyncio.run(cog.send_result(fresh, discord.Embed(title='Keys Granted'), 'a,b\n', 'grant.csv'))
+    assert fresh.followup.sent[0]['file'].filename == 'grant.csv'
+    assert outbox.dms == [] and outbox.posts == []
+
+
+def test_expired_result_is_dmed_to_the_invoker(keys, monkeypatch):
+    botmod, cog = keys
+    outbox = FakeOutbox()
+    monkeypatch.setattr(cog, 'outbox', outbox)
+    stale = interaction(botmod.INTERACTION_TOKEN_LIFETIME + 60)
+    asyncio.run(cog.send_result(stale, discord.Embed(title='Keys Granted'), 'a,b\n', 'grant.csv'))
+    assert stale.followup.sent == []
+    assert outbox.dms[0]['file'].filename == 'grant.csv'
+
+
+def test_expired_result_without_dms_is_posted_without_the_file(keys, monkeypatch):
+    botmod, cog = keys
+    outbox = FakeOutbox(dm_error=forbidden())
+    monkeypatch.setattr(cog, 'outbox', outbox)
+    stale = interaction(botmod.INTERACTION_TOKEN_LIFETIME + 60)
+    asyncio.run(cog.send_result(stale, discord.Embed(title='Keys Granted'), 'a,b\n', 'grant.csv'))
+    assert len(outbox.posts) == 1
+    assert 'file' not in outbox.posts[0]
+    assert outbox.posts[0]['embed'].title == 'Keys Granted'
+
+
+def test_attachments_go_to_the_audit_sink_only(keys):
+    botmod, _ = keys
+    botmod.audit_sink.pending.clear()
+    state = botmod.guild_state(botmod.PRIMARY_GUILD_ID)
+    botmod.log_command('grantkeys', 1, 'admin', details={'created': 2}, attachment={'filename': 'grant.csv', 'content': 'a,b\n'})
+    assert botmod.audit_sink.pending[-1]['attachment']['filename'] == 'grant.csv'
+    assert 'attachment' not in state.command_logs[-1]
+    botmod.audit_sink.pending.clear()
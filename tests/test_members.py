@@ -0,0 +1,181 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+from members import MEMBER_CACHE_FULL, MEMBER_CACHE_RELEVANT, MemberCache
+
+GUILD = 1
+STAFF = 10
+OTHER = 20
+
+
+class FakeRole:
+    def __init__(self, role_id: int, guild=None, members=()):
+        self.id = role_id
+        self.guild = guild
+        self.members = list(members)
+
+
+class FakeMember:
+    def __init__(self, member_id: int, guild, role_ids=()):
+        self.id = member_id
+        self.guild = guild
+        self.roles = [FakeRole(r) for r in role_ids]
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int = GUILD):
+        self.id = guild_id
+        self.members = []
+        self.member_count = 0
+        self.remote = {}
+        self.fetched = []
+
+    def get_member(self, user_id: int):
+        return next((m for m in self.members if m.id == user_id), None)
+
+    async def fetch_member(self, user_id: int):
+        self.fetched.append(user_id)
+        if user_id not in self.remote:
+            raise discord.NotFound(types.SimpleNamespace(status=404, reason='Not Found', headers={}), 'Unknown Member')
+        return self.remote[user_id]
+
+    async def fetch_members(self, limit=None):
+        for member in self.remote.values():
+            yield member
+
+
+@pytest.fixture(autouse=True)
+def fake_members(monkeypatch):
+    # observe() only stores real discord.Member objects.
+    monkeypatch.setattr(discord, 'Member', FakeMember)
+
+
+def relevant_cache(**kwargs) -> MemberCache:
+    cache = MemberCache(MEMBER_CACHE_RELEVANT, **kwargs)
+    cache.set_relevant_roles(GUILD, [STAFF, 0])
+    return cache
+
+
+def test_full_policy_uses_the_discord_cache():
+    guild = FakeGuild()
+    member = FakeMember(5, guild)
+    guild.members.append(member)
+    role = FakeRole(STAFF, guild, [member])
+    cache = MemberCache(MEMBER_CACHE_FULL)
+    cache.observe(member)
+    assert cache.client_options() == {}
+    assert len(cache) == 0
+    assert asyncio.run(cache.get(guild, 5)) is member
+    assert cache.with_role(role) == [member]
+    assert guild.fetched == []
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        MemberCache('everything')
+
+
+def test_relevant_policy_disables_chunking():
+    options = relevant_cache().client_options()
+    assert options['chunk_guilds_at_startup'] is False
+    assert not options['member_cache_flags'].joined
+
+
+def test_staff_are_pinned_and_others_share_the_lru():
+    guild = FakeGuild()
+    cache = relevant_cache(lru_size=2)
+    staff = FakeMember(1, guild, [STAFF])
+    cache.observe(staff)
+    for user_id in (2, 3, 4):
+        cache.observe(FakeMember(user_id, guild, [OTHER]))
+    assert cache.pinned_count == 1
+    assert len(cache) == 3
+    assert cache.cached(guild, 1) is staff
+    assert cache.cached(guild, 4).id == 4
+    # The oldest unpinned member was evicted.
+    assert asyncio.run(cache.get(guild, 2)) is None
+    assert guild.fetched == [2]
+
+
+def test_losing_the_role_unpins():
+    guild = FakeGuild()
+    cache = relevant_cache()
+    cache.observe(FakeMember(1, guild, [STAFF]))
+    cache.observe(FakeMember(1, guild, []))
+    assert cache.pinned_count == 0
+    assert len(cache) == 1
+
+
+def test_misses_are_fetched_once_and_cached():
+    guild = FakeGuild()
+    guild.remote[7] = FakeMember(7, guild, [STAFF])
+    cache = relevant_cache()
+
+    async def run():
+        first = await cache.get(guild, 7)
+        second = await cache.get(guild, 7)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second is guild.remote[7]
+    assert guild.fetched == [7]
+    assert cache.metrics == {'hits': 1, 'fetches': 1, 'not_found': 0}
+    assert cache.pinned_count == 1
+
+
+def test_members_not_in_the_guild_are_remembered():
+    guild = FakeGuild()
+    cache = relevant_cache()
+
+    async def run():
+        return await cache.get(guild, 8), await cache.get(guild, 8)
+
+    assert asyncio.run(run()) == (None, None)
+    assert guild.fetched == [8]
+    assert cache.metrics['not_found'] == 1
+
+
+def test_stale_entries_are_refetched():
+    guild = FakeGuild()
+    guild.remote[7] = FakeMember(7, guild, [OTHER])
+    cache = relevant_cache(ttl=-1)
+    cache.observe(FakeMember(7, guild, [STAFF]))
+    member = asyncio.run(cache.get(guild, 7))
+    assert member is guild.remote[7]
+    assert guild.fetched == [7]
+    assert cache.pinned_count == 0
+
+
+def test_with_role_lists_cached_holders_in_the_roles_guild():
+    guild, elsewhere = FakeGuild(GUILD), FakeGuild(2)
+    cache = relevant_cache()
+    holder = FakeMember(1, guild, [STAFF])
+    cache.observe(holder)
+    cache.observe(FakeMember(2, guild, [OTHER]))
+    cache.observe(FakeMember(3, elsewhere, [STAFF]))
+    assert cache.with_role(FakeRole(STAFF, guild)) == [holder]
+
+
+def test_fetch_with_role_pages_the_member_list():
+    guild = FakeGuild()
+    guild.remote = {1: FakeMember(1, guild, [STAFF]), 2: FakeMember(2, guild, [OTHER])}
+    cache = relevant_cache()
+    holders = asyncio.run(cache.fetch_with_role(guild, FakeRole(STAFF, guild)))
+    assert holders == [guild.remote[1]]
+    assert cache.cached(guild, 1) is guild.remote[1]
+
+
+def test_stats_estimate_saved_memory():
+    guild = FakeGuild()
+    guild.member_count = 1000
+    cache = relevant_cache()
+    cache.observe(FakeMember(1, guild, [STAFF]))
+    stats = cache.stats([guild])
+    assert stats['cached'] == 1 and stats['pinned'] == 1
+    assert stats['saved_bytes'] == 999 * 800
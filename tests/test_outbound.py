@@ -0,0 +1,193 @@
+import asyncio
+import types
+
+import discord
+
+from outbound import (
+    MAX_EMBEDS_PER_MESSAGE,
+    PRIORITY_AUDIT,
+    OutboundScheduler,
+    TokenBucket,
+)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, log: list):
+        self.id = channel_id
+        self.log = log
+        self.fail_with = []
+
+    async def send(self, **kwargs):
+        if self.fail_with:
+            raise self.fail_with.pop(0)
+        self.log.append((self.id, kwargs))
+        return len(self.log)
+
+
+class FakeUser:
+    def __init__(self, log: list):
+        self.log = log
+
+    async def send(self, **kwargs):
+        self.log.append(('dm', kwargs))
+
+
+def rate_limited(retry_after: float = 0.5) -> discord.HTTPException:
+    response = types.SimpleNamespace(status=429, reason='Too Many Requests', headers={'Retry-After': str(retry_after)})
+    return discord.HTTPException(response, 'rate limited')
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+# -- TokenBucket -------------------------------------------------------------
+
+def test_bucket_allows_burst_then_waits_for_refill():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    bucket.updated = 100.0
+    for _ in range(3):
+        assert bucket.delay(100.0) == 0.0
+        bucket.consume()
+    assert bucket.delay(100.0) == 0.5
+    assert bucket.delay(100.25) == 0.25
+    assert bucket.delay(100.5) == 0.0
+
+
+def test_bucket_refill_is_capped_at_capacity():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    bucket.updated = 0.0
+    bucket.delay(60.0)
+    assert bucket.tokens == 2
+
+
+def test_bucket_block_overrides_available_tokens():
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    bucket.updated = 10.0
+    bucket.block(3.0, 10.0)
+    assert bucket.delay(10.0) == 3.0
+    assert not bucket.idle(12.0)
+    # A shorter block never shortens an existing one.
+    bucket.block(1.0, 10.0)
+    assert bucket.delay(11.0) == 2.0
+    assert bucket.delay(13.0) == 0.0
+
+
+def test_bucket_idle_once_full_and_unblocked():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.updated = 0.0
+    bucket.consume()
+    assert not bucket.idle(0.5)
+    assert bucket.idle(1.0)
+
+
+# -- OutboundScheduler -------------------------------------------------------
+
+def test_embed_posts_to_one_channel_are_merged():
+    async def main():
+        log = []
+        channel = FakeChannel(1, log)
+        outbox = OutboundScheduler()
+        futures = [outbox.send(channel, embed=discord.Embed(title=str(i))) for i in range(4)]
+        results = await asyncio.gather(*futures)
+        await outbox.close()
+        return log, results, outbox
+
+    log, results, outbox = run(main())
+    assert len(log) == 1
+    assert [e.title for e in log[0][1]['embeds']] == ['0', '1', '2', '3']
+    assert results == [1, 1, 1, 1]
+    assert outbox.metrics['coalesced'] == 3
+    assert outbox.metrics['sent'] == 1
+
+
+def test_merged_messages_respect_the_embed_limit():
+    async def main():
+        log = []
+        channel = FakeChannel(1, log)
+        outbox = OutboundScheduler()
+        futures = [outbox.send(channel, embed=discord.Embed(title=str(i))) for i in range(MAX_EMBEDS_PER_MESSAGE + 3)]
+        await asyncio.gather(*futures)
+        await outbox.close()
+        return log
+
+    log = run(main())
+    assert [len(kwargs['embeds']) for _, kwargs in log] == [MAX_EMBEDS_PER_MESSAGE, 3]
+
+
+def test_posts_with_other_content_are_not_merged():
+    async def main():
+        log = []
+        channel = FakeChannel(1, log)
+        outbox = OutboundScheduler()
+        await asyncio.gather(
+            outbox.send(channel, embed=discord.Embed(title='a')),
+            outbox.send(channel, content='text'),
+            outbox.send(channel, embed=discord.Embed(title='b')),
+        )
+        await outbox.close()
+        return log
+
+    log = run(main())
+    assert len(log) == 3
+
+
+def test_cancelled_posts_are_skipped_when_merging():
+    async def main():
+        log = []
+        channel = FakeChannel(1, log)
+        outbox = OutboundScheduler()
+        keep = outbox.send(channel, embed=discord.Embed(title='keep'))
+        dropped = outbox.send(channel, embed=discord.Embed(title='drop'))
+        dropped.cancel()
+        await keep
+        await outbox.close()
+        return log
+
+    log = run(main())
+    assert [e.title for e in log[0][1]['embeds']] == ['keep']
+
+
+def test_higher_priority_lanes_go_first():
+    async def main():
+        log = []
+        outbox = OutboundScheduler(max_in_flight=1)
+        audit = [outbox.send(FakeChannel(i, log), content='audit') for i in range(3)]
+        dm = outbox.send_dm(FakeUser(log), content='hi')
+        await asyncio.gather(dm, *audit)
+        await outbox.close()
+        return log
+
+    log = run(main())
+    assert log[0][0] == 'dm'
+
+
+def test_rate_limited_send_is_retried_after_retry_after():
+    async def main():
+        log = []
+        channel = FakeChannel(1, log)
+        channel.fail_with = [rate_limited(0.5)]
+        outbox = OutboundScheduler()
+        result = await outbox.send(channel, content='x')
+        await outbox.close()
+        return log, result, outbox
+
+    log, result, outbox = run(main())
+    assert result == 1
+    assert len(log) == 1
+    assert outbox.metrics['rate_limited'] == 1
+    assert outbox.metrics['failed'] == 0
+
+
+def test_errors_fail_every_merged_future():
+    async def main():
+        channel = FakeChannel(1, [])
+        channel.fail_with = [RuntimeError('boom')]
+        outbox = OutboundScheduler()
+        futures = [outbox.send(channel, PRIORITY_AUDIT, embed=discord.Embed()) for _ in range(2)]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await outbox.close()
+        return results
+
+    results = run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
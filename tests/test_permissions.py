@@ -0,0 +1,47 @@
+import types
+
+from permissions import PermissionResolver
+
+GUILD = 10
+TIERS = {GUILD: {'owner': {1}, 'dev': {2}, 'admin': {3}, 'staff': {1, 2, 3, 4}}}
+
+
+def member(member_id: int, *roles: int, guild_id: int = GUILD):
+    return types.SimpleNamespace(
+        id=member_id, roles=[types.SimpleNamespace(id=r) for r in roles], guild=types.SimpleNamespace(id=guild_id)
+    )
+
+
+def test_tiers_from_roles():
+    resolver = PermissionResolver(TIERS)
+    assert resolver.tiers(member(1, 2)) == {'dev', 'staff'}
+    assert resolver.tiers(member(2, 4)) == {'staff'}
+    assert resolver.tiers(member(3, 99)) == frozenset()
+    assert resolver.has(member(4, 1), 'owner')
+    assert not resolver.has(member(5, 3), 'owner')
+    assert not resolver.has(member(6, 1), 'moderator')
+
+
+def test_unknown_guild_has_no_tiers():
+    resolver = PermissionResolver(TIERS)
+    assert resolver.tiers(member(1, 1, guild_id=99)) == frozenset()
+    assert not resolver.has(member(1, 1, guild_id=99), 'owner')
+    assert resolver.tiers(None, GUILD) == frozenset()
+    assert not resolver.has(None, 'owner', GUILD)
+    assert 99 not in resolver and GUILD in resolver
+
+
+def test_explicit_guild_overrides_the_members_guild():
+    resolver = PermissionResolver({GUILD: TIERS[GUILD], 20: {'owner': {5}}})
+    assert resolver.has(member(1, 5), 'owner', 20)
+    assert not resolver.has(member(1, 5), 'owner')
+
+
+def test_changed_roles_apply_immediately():
+    resolver = PermissionResolver(TIERS)
+    m = member(1, 4)
+    assert resolver.tiers(m) == {'staff'}
+    m.roles.append(types.SimpleNamespace(id=3))
+    assert resolver.tiers(m) == {'admin', 'staff'}
+    m.roles.clear()
+    assert not resolver.has(m, 'staff')
@@ -0,0 +1,206 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+from pipeline import CommandPipeline, EmbedFactory
+from permissions import PermissionResolver
+
+GUILD = 10
+ADMIN_ROLE = 1
+OWNER_ROLE = 2
+
+
+class FakeMember:
+    def __init__(self, member_id: int, *role_ids: int):
+        self.id = member_id
+        self.name = f"user{member_id}"
+        self.roles = [types.SimpleNamespace(id=role_id) for role_id in role_ids]
+        self.guild = types.SimpleNamespace(id=GUILD)
+
+    def get_role(self, role_id: int):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, guild_id: int = GUILD):
+        self.user = user
+        self.guild_id = guild_id
+        self.replies = []
+        self.response = types.SimpleNamespace(defer=self._defer, send_message=self._send_message)
+        self.followup = types.SimpleNamespace(send=self._followup)
+
+    async def _defer(self, ephemeral: bool = False):
+        self.replies.append(('defer', ephemeral))
+
+    async def _send_message(self, embed=None, ephemeral: bool = False):
+        self.replies.append(('response', embed.title))
+
+    async def _followup(self, embed=None, ephemeral: bool = False, **kwargs):
+        self.replies.append(('followup', embed.title))
+
+
+def make_pipeline(logged: list) -> CommandPipeline:
+    tiers = {'admin': {ADMIN_ROLE, OWNER_ROLE}, 'owner': {OWNER_ROLE}}
+    logger = lambda *args, **kwargs: logged.append((args, kwargs))
+    return CommandPipeline(PermissionResolver({GUILD: tiers, 20: {'admin': {3}, 'owner': {OWNER_ROLE}}}), EmbedFactory('footer', discord.Color.blurple()), logger)
+
+
+def call(command, interaction, *args):
+    asyncio.run(command(interaction, *args))
+
+
+def test_allowed_command_defers_logs_and_runs():
+    logged, ran = [], []
+    pipeline = make_pipeline(logged)
+
+    @pipeline.command('admin', log=lambda i, target: {'details': {'target': target}})
+    async def givekey(interaction, target):
+        ran.append(target)
+
+    interaction = FakeInteraction(FakeMember(5, ADMIN_ROLE))
+    call(givekey, interaction, 'abc')
+    assert ran == ['abc']
+    assert interaction.replies == [('defer', True)]
+    assert logged == [(('givekey', 5, 'user5'), {'guild_id': GUILD, 'details': {'target': 'abc'}})]
+    assert pipeline.stats['givekey'].count == 1
+
+
+def test_other_guilds_and_missing_roles_are_denied():
+    ran = []
+    pipeline = make_pipeline([])
+
+    @pipeline.command('owner')
+    async def deletekey(interaction):
+        ran.append(interaction)
+
+    wrong_guild = FakeInteraction(FakeMember(5, OWNER_ROLE), guild_id=99)
+    no_role = FakeInteraction(FakeMember(6, ADMIN_ROLE))
+    call(deletekey, wrong_guild)
+    call(deletekey, no_role)
+    assert ran == []
+    assert wrong_guild.replies == [('response', 'Invalid Guild')]
+    assert no_role.replies == [('response', 'Insufficient Permissions')]
+    assert pipeline.stats['deletekey'].denied == 2
+
+
+def test_errors_become_an_error_embed_and_reach_after_hooks():
+    seen = []
+    pipeline = make_pipeline([])
+    pipeline.after.append(lambda name, interaction, elapsed_ms, error: seen.append((name, type(error))))
+
+    @pipeline.command('admin')
+    async def keyinfo(interaction):
+        raise RuntimeError('api down')
+
+    interaction = FakeInteraction(FakeMember(5, ADMIN_ROLE))
+    call(keyinfo, interaction)
+    assert interaction.replies == [('defer', True), ('followup', 'Error')]
+    assert seen == [('keyinfo', RuntimeError)]
+    assert pipeline.stats['keyinfo'].errors == 1
+
+
+def test_before_hook_can_answer_the_command():
+    ran = []
+    pipeline = make_pipeline([])
+
+    async def cached(name, interaction, kwargs):
+        return name == 'keystats'
+
+    pipeline.before.append(cached)
+
+    @pipeline.command('admin')
+    async def keystats(interaction):
+        ran.append(1)
+
+    call(keystats, FakeInteraction(FakeMember(5, ADMIN_ROLE)))
+    assert ran == []
+
+
+def test_unknown_tier_is_rejected_at_definition():
+    with pytest.raises(ValueError):
+        make_pipeline([]).command('superuser')
+
+
+def test_tiers_are_checked_in_the_interactions_guild():
+    ran = []
+    pipeline = make_pipeline([])
+
+    @pipeline.command('owner')
+    async def deletekey(interaction):
+        ran.append(interaction.guild_id)
+
+    call(deletekey, FakeInteraction(FakeMember(5, OWNER_ROLE), guild_id=20))
+    call(deletekey, FakeInteraction(FakeMember(5, 3), guild_id=20))
+    call(deletekey, FakeInteraction(FakeMember(5, 3)))
+    assert ran == [20]
+
+
+def test_commands_are_logged_by_default_and_can_opt_out():
+    logged = []
+    pipeline = make_pipeline(logged)
+
+    @pipeline.command('admin', audit=False)
+    async def keystats(interaction):
+        pass
+
+    @pipeline.command('admin', log=False)
+    async def ping(interaction):
+        pass
+
+    member = FakeMember(5, ADMIN_ROLE)
+    call(keystats, FakeInteraction(member))
+    call(ping, FakeInteraction(member))
+    assert logged == [(('keystats', 5, 'user5'), {'guild_id': GUILD, 'audit': False})]
+
+
+def test_returned_details_are_merged_into_the_entry():
+    logged = []
+    pipeline = make_pipeline(logged)
+
+    @pipeline.command('admin', log=lambda i, duration: {'details': {'duration': duration}})
+    async def grantkeys(interaction, duration):
+        return {'details': {'created': 2}, 'attachment': {'filename': 'grant.csv', 'content': 'a\n'}}
+
+    call(grantkeys, FakeInteraction(FakeMember(5, ADMIN_ROLE)), '1d')
+    assert logged == [(('grantkeys', 5, 'user5'), {
+        'guild_id': GUILD, 'details': {'duration': '1d', 'created': 2},
+        'attachment': {'filename': 'grant.csv', 'content': 'a\n'},
+    })]
+
+
+def test_failed_and_hook_answered_commands_are_still_logged():
+    logged = []
+    pipeline = make_pipeline(logged)
+
+    async def cached(name, interaction, kwargs):
+        return name == 'keystats'
+
+    pipeline.before.append(cached)
+
+    @pipeline.command('admin')
+    async def keystats(interaction):
+        pass
+
+    @pipeline.command('admin')
+    async def keyinfo(interaction):
+        raise RuntimeError('api down')
+
+    member = FakeMember(5, ADMIN_ROLE)
+    call(keystats, FakeInteraction(member))
+    call(keyinfo, FakeInteraction(member))
+    assert [args[0] for args, _ in logged] == ['keystats', 'keyinfo']
+    assert logged[1][1]['details'] == {'error': 'api down'}
+
+
+def test_denied_commands_are_not_logged():
+    logged = []
+    pipeline = make_pipeline(logged)
+
+    @pipeline.command('owner')
+    async def deletekey(interaction):
+        pass
+
+    call(deletekey, FakeInteraction(FakeMember(6, ADMIN_ROLE)))
+    assert logged == []
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import sys
+import types
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from bench import load_bot  # noqa: E402
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+@pytest.fixture
+def reload(tmp_path, monkeypatch):
+    """Run /reload sync:True against three guilds; the second one refuses the sync."""
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    monkeypatch.setattr(botmod, 'GUILD_OBJECTS', [discord.Object(id=g) for g in (1, 2, 3)])
+
+    async def reload_extension(name):
+        return None
+
+    async def sync(guild=None):
+        if guild.id == 2:
+            raise discord.Forbidden(types.SimpleNamespace(status=403, reason='Forbidden', headers={}), 'Missing Access')
+        return ['cmd'] * guild.id
+
+    monkeypatch.setattr(botmod.bot, 'reload_extension', reload_extension)
+    monkeypatch.setattr(botmod.bot.tree, 'sync', sync)
+
+    def run():
+        interaction = types.SimpleNamespace(user=types.SimpleNamespace(name='owner'), followup=FakeFollowup())
+        asyncio.run(botmod.reload_extensions.callback.__wrapped__(interaction, None, True))
+        return interaction.followup.sent[-1]['embed'].description.splitlines()
+
+    return run
+
+
+def test_sync_counts_every_guild_and_reports_failures(reload):
+    lines = reload()
+    assert lines[-1] == 'Synced 4 command(s) to 2/3 guild(s)'
+    assert lines[-2].startswith('❌ Sync to guild 2: 403 Forbidden')
+    assert all(line.startswith('✅ Reloaded') for line in lines[:-2])
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import os
+import sys
+import types
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from bench import load_bot  # noqa: E402
+from stub_api import start_stub  # noqa: E402
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+def fake_interaction(guild_id: int) -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        guild_id=guild_id, user=types.SimpleNamespace(id=1, name='owner'), followup=FakeFollowup(),
+    )
+
+
+def release_zip(files: dict) -> types.SimpleNamespace:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return types.SimpleNamespace(filename='release.zip', url='https://cdn.test/release.zip', data=buffer.getvalue())
+
+
+@pytest.fixture
+def release(tmp_path, monkeypatch):
+    """Run /releasescripts against the stub API with a.lua already released (and stored locally)."""
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    from cogs import scripts
+    from utils import APIClient
+
+    def run(archive, fail=None):
+        fail = fail or {}
+
+        async def main():
+            stub, runner, base_url = await start_stub(secret='secret')
+            client = APIClient(base_url, 'secret', manifest_path=str(tmp_path / 'manifest.json'), blob_dir=str(tmp_path / 'blobs'))
+            monkeypatch.setattr(botmod, 'api_client', client)
+            upload = client.upload_script_file
+
+            async def content(data: bytes):
+                yield data
+
+            async def download(url):
+                yield archive.data
+
+            async def upload_or_fail(chunks, filename, force=False):
+                # 'rejected' never reaches the API; 'mismatch' is written but reports other content.
+                if fail.get(filename) == 'rejected':
+                    return {'success': False, 'error': 'rejected'}
+                response = await upload(chunks, filename, force=force)
+                if fail.get(filename) == 'mismatch' and response:
+                    response['content_verified'] = False
+                return response
+
+            interaction = fake_interaction(botmod.PRIMARY_GUILD_ID)
+            try:
+                await upload(content(b'print("a1")'), 'a.lua')
+                client.iter_download = download
+                client.upload_script_file = upload_or_fail
+                await scripts.releasescripts.callback.__wrapped__(interaction, archive)
+                return stub, interaction.followup.sent[-1]['embed']
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        return asyncio.run(asyncio.wait_for(main(), timeout=20))
+
+    return run
+
+
+def test_release_updates_every_file(release):
+    archive = release_zip({'a.lua': 'print("a2")', 'b.lua': 'print("b")'})
+    stub, embed = release(archive)
+    assert embed.title == 'Release Complete'
+    assert stub.scripts['a.lua']['content'] == b'print("a2")'
+    assert stub.scripts['b.lua']['content'] == b'print("b")'
+
+
+def test_failed_release_restores_previous_versions_and_deletes_new_files(release):
+    archive = release_zip({'a.lua': 'print("a2")', 'b.lua': 'print("b")', 'c.lua': 'print("c")'})
+    stub, embed = release(archive, fail={'c.lua': 'rejected'})
+    assert embed.title == 'Release Failed'
+    assert [field.name for field in embed.fields] == ['Failed (1)', 'Rolled Back']
+    assert embed.fields[1].value.startswith('2 file(s)')
+    # a.lua existed and is restored from its stored copy; b.lua was new and is deleted.
+    assert stub.scripts['a.lua']['content'] == b'print("a1")'
+    assert sorted(stub.scripts) == ['a.lua']
+
+
+def test_failed_upload_of_an_existing_file_is_restored(release):
+    archive = release_zip({'a.lua': 'print("a2")', 'b.lua': 'print("b")'})
+    stub, embed = release(archive, fail={'a.lua': 'mismatch'})
+    assert embed.title == 'Release Failed'
+    assert stub.scripts['a.lua']['content'] == b'print("a1")'
+    assert 'b.lua' not in stub.scripts
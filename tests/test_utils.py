@@ -0,0 +1,504 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+from utils import APIClient, SCRIPT_BLOCK_SIZE, SCRIPT_SPOOL_MEMORY, SpooledScript
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from stub_api import start_stub  # noqa: E402
+
+
+class FakeClient(APIClient):
+    """APIClient whose HTTP layer is a dict of canned responses, recording every request sent."""
+
+    def __init__(self, routes=None, delay: float = 0.0, **kwargs):
+        super().__init__('http://api.test', 'secret', **kwargs)
+        self.routes = routes or {}
+        self.delay = delay
+        self.sent = []
+
+    async def _send(self, method, endpoint, data, require_auth):
+        self.sent.append((endpoint, dict(data or {})))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        route = self.routes.get(endpoint)
+        return route(data or {}) if callable(route) else route
+
+    async def upload_script_stream(self, spooled, filename):
+        # The streamed body is the JSON upload payload; route it like the other requests.
+        body = b''.join([piece async for piece in self._script_upload_body(spooled, filename)])
+        return await self._send('POST', '/admin/script/upload', json.loads(body), True)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+async def chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def uploaded(data):
+    return {'success': True}
+
+
+def script_client(**kwargs) -> FakeClient:
+    return FakeClient({
+        '/admin/script/upload': uploaded,
+        '/admin/script/delete': {'success': True},
+    }, **kwargs)
+
+
+def upload_bodies(client: FakeClient):
+    return [data['script'] for endpoint, data in client.sent if endpoint == '/admin/script/upload']
+
+
+# -- script spool --------------------------------------------------------------
+
+def test_spool_hashes_and_compresses_the_stream():
+    data = b'print("hello")\n' * 5000
+
+    async def main():
+        with await SpooledScript.build(chunks(data)) as spooled:
+            body = b''.join([chunk async for chunk in spooled.iter_chunks(4096)])
+            return spooled.size, spooled.sha256, spooled.compressed_size, body, spooled.read_text()
+
+    size, sha256, compressed_size, body, text = run(main())
+    assert size == len(data)
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    assert compressed_size == len(body) < len(data)
+    assert gzip.decompress(body) == data
+    assert text == data.decode()
+
+
+def test_spool_rolls_over_to_disk():
+    data = os.urandom(SCRIPT_SPOOL_MEMORY + 256 * 1024)
+
+    async def main():
+        with await SpooledScript.build(chunks(data, 64 * 1024)) as spooled:
+            return spooled.file._rolled
+
+    assert run(main())
+
+
+def test_upload_streams_the_spool():
+    async def main():
+        client = script_client()
+        response = await client.upload_script_file(chunks(b'abc'), 'a.lua')
+        return client, response
+
+    client, response = run(main())
+    assert [endpoint for endpoint, _ in client.sent] == ['/admin/script/upload']
+    assert upload_bodies(client) == ['abc']
+    assert response['size'] == 3
+    assert response['sha256'] == hashlib.sha256(b'abc').hexdigest()
+
+
+def test_uploads_are_verified_against_what_the_api_reports():
+    sha = hashlib.sha256(b'abc').hexdigest()
+
+    async def main():
+        results = []
+        for reply in ({'success': True}, {'success': True, 'size': 2}, {'success': True, 'size': 2, 'sha256': sha},
+                      {'success': True, 'sha256': 'f' * 64}, {'success': True, 'size': 3}):
+            client = script_client()
+            client.routes['/admin/script/upload'] = dict(reply)
+            results.append((await client.upload_script_file(chunks(b'abc'), 'a.lua'))['content_verified'])
+        return results
+
+    # The sha256 decides when present; a size alone is compared; neither means unknown.
+    assert run(main()) == [None, False, True, False, True]
+
+
+def test_streamed_body_matches_the_json_upload():
+    # Multi-byte characters split across chunks, an invalid byte, quotes and control characters.
+    data = ('local s = "caf\u00e9 \u2603 \U0001f600"\n\t-- \\ end\n' * 3000).encode('utf-8') + b'\xff tail'
+
+    async def main():
+        client = script_client()
+        with await SpooledScript.build(chunks(data, 7)) as spooled:
+            pieces = [piece async for piece in client._script_upload_body(spooled, 'b\u00e4d "name".lua')]
+            small = [piece async for piece in spooled.iter_json_string(chunk_size=5)]
+            return pieces, small, spooled.read_text()
+
+    pieces, small, text = run(main())
+    assert len(pieces) > 3
+    assert b''.join(pieces) == json.dumps({'script': text, 'filename': 'b\u00e4d "name".lua'}).encode()
+    assert b''.join(small) == json.dumps(text).encode()
+
+
+def test_streamed_upload_is_signed_like_a_json_request(tmp_path):
+    data = ('print("\u00e9")\n' * 20000).encode('utf-8')
+
+    async def main():
+        stub, runner, base_url = await start_stub(secret='secret')
+        client = APIClient(base_url, 'secret', manifest_path=str(tmp_path / 'manifest.json'))
+        try:
+            response = await client.upload_script_file(chunks(data, 4096), 'big.lua')
+            return stub, response
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    stub, response = run(main())
+    assert response['success']
+    assert stub.rejected == 0
+    assert stub.scripts['big.lua']['content'] == data
+    assert response['sha256'] == hashlib.sha256(data).hexdigest()
+
+
+# -- content manifest ----------------------------------------------------------
+
+def test_unchanged_upload_is_skipped_unless_forced(tmp_path):
+    async def main():
+        client = script_client(manifest_path=str(tmp_path / 'manifest.json'))
+        first = await client.upload_script_file(chunks(b'same'), 'a.lua')
+        second = await client.upload_script_file(chunks(b'same'), 'a.lua')
+        forced = await client.upload_script_file(chunks(b'same'), 'a.lua', force=True)
+        return client, first, second, forced
+
+    client, first, second, forced = run(main())
+    assert first['changed']['new']
+    assert second['unchanged']
+    assert not forced.get('unchanged')
+    assert len(upload_bodies(client)) == 2
+
+
+def test_manifest_is_persisted_and_reloaded(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+
+    async def main():
+        await script_client(manifest_path=path).upload_script_file(chunks(b'v1'), 'a.lua')
+
+    run(main())
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['a.lua']['sha256'] == hashlib.sha256(b'v1').hexdigest()
+    assert FakeClient(manifest_path=path).script_manifest['a.lua']['size'] == 2
+
+
+def test_diff_counts_changed_blocks():
+    old = b'a' * SCRIPT_BLOCK_SIZE * 3
+    new = b'a' * SCRIPT_BLOCK_SIZE + b'b' * SCRIPT_BLOCK_SIZE + b'a' * SCRIPT_BLOCK_SIZE + b'tail'
+
+    async def main():
+        client = script_client()
+        await client.upload_script_file(chunks(old, 4096), 'a.lua')
+        return await client.upload_script_file(chunks(new, 4096), 'a.lua')
+
+    changed = run(main())['changed']
+    assert changed['blocks_changed'] == 2
+    assert changed['bytes_changed'] == SCRIPT_BLOCK_SIZE + 4
+    assert changed['size_delta'] == 4
+
+
+def test_delete_and_listing_reconcile_the_manifest():
+    async def main():
+        client = script_client()
+        for name in ('a.lua', 'b.lua', 'c.lua'):
+            await client.upload_script_file(chunks(name.encode()), name)
+        await client.delete_script('a.lua')
+        client.routes['/admin/script/list'] = {'scripts': [
+            {'name': 'b.lua', 'size': 5},
+            {'name': 'c.lua', 'size': 999},
+            {'name': 'd.lua', 'size': 1},
+        ]}
+        await client.list_scripts()
+        return client.script_manifest
+
+    manifest = run(main())
+    assert sorted(manifest) == ['b.lua', 'c.lua', 'd.lua']
+    assert manifest['b.lua']['sha256'] == hashlib.sha256(b'b.lua').hexdigest()
+    assert 'sha256' not in manifest['c.lua']
+
+
+# -- manifest cache ------------------------------------------------------------
+
+def listing(*names):
+    return {'scripts': [{'name': name, 'size': 1} for name in names]}
+
+
+def test_cached_scripts_lists_once_per_ttl():
+    async def main():
+        client = FakeClient({'/admin/script/list': listing('b.lua', 'a.lua')})
+        first = await client.cached_scripts()
+        second = await client.cached_scripts()
+        client._manifest_synced -= client.manifest_ttl
+        await client.cached_scripts()
+        await client.cached_scripts(refresh=True)
+        return client, first, second
+
+    client, first, second = run(main())
+    assert [s['name'] for s in first] == ['a.lua', 'b.lua']
+    assert second == first
+    assert len(client.sent) == 3
+
+
+def test_concurrent_refreshes_share_one_listing():
+    async def main():
+        client = FakeClient({'/admin/script/list': listing('a.lua')}, delay=0.05)
+        results = await asyncio.gather(*(client.refresh_manifest() for _ in range(5)))
+        return client, results
+
+    client, results = run(main())
+    assert results == [True] * 5
+    assert len(client.sent) == 1
+
+
+def test_failed_listing_keeps_serving_the_manifest():
+    async def main():
+        client = script_client()
+        empty = await client.cached_scripts()
+        await client.upload_script_file(chunks(b'x'), 'a.lua')
+        client._manifest_synced = 0.0
+        return empty, await client.cached_scripts()
+
+    empty, scripts = run(main())
+    assert empty is None
+    assert [s['name'] for s in scripts] == ['a.lua']
+
+
+def test_script_names_are_resorted_after_changes():
+    async def main():
+        client = script_client()
+        await client.upload_script_file(chunks(b'b'), 'b.lua')
+        before = list(client.script_names())
+        await client.upload_script_file(chunks(b'a'), 'a.lua')
+        return before, client.script_names()
+
+    assert run(main()) == (['b.lua'], ['a.lua', 'b.lua'])
+
+
+# -- stored script versions ----------------------------------------------------
+
+def test_uploads_keep_a_copy_that_can_be_restored(tmp_path):
+    async def main():
+        client = script_client(blob_dir=str(tmp_path))
+        await client.upload_script_file(chunks(b'version one'), 'a.lua')
+        previous = dict(client.script_manifest['a.lua'])
+        await client.upload_script_file(chunks(b'version two'), 'a.lua')
+        restored = await client.restore_script('a.lua', previous)
+        return client, previous, restored
+
+    client, previous, restored = run(main())
+    assert client.has_script_blob(previous['sha256'])
+    assert restored['success']
+    assert upload_bodies(client)[-1] == 'version one'
+    assert client.script_manifest['a.lua']['sha256'] == previous['sha256']
+
+
+def test_restore_without_a_stored_copy_fails(tmp_path):
+    async def main():
+        client = script_client(blob_dir=str(tmp_path))
+        return client, await client.restore_script('a.lua', {'sha256': 'f' * 64})
+
+    client, response = run(main())
+    assert not response['success']
+    assert client.sent == []
+
+
+def test_prune_keeps_referenced_and_pinned_copies(tmp_path):
+    async def main():
+        client = script_client(blob_dir=str(tmp_path))
+        await client.upload_script_file(chunks(b'pinned'), 'a.lua')
+        pinned = client.script_manifest['a.lua']['sha256']
+        client.pinned_blobs.add(pinned)
+        await client.upload_script_file(chunks(b'old'), 'a.lua')
+        old = client.script_manifest['a.lua']['sha256']
+        await client.upload_script_file(chunks(b'current'), 'a.lua')
+        client.prune_blobs(keep=0)
+        return client, pinned, old, client.script_manifest['a.lua']['sha256']
+
+    client, pinned, old, current = run(main())
+    assert client.has_script_blob(pinned)
+    assert client.has_script_blob(current)
+    assert not client.has_script_blob(old)
+
+
+# -- settings snapshot ---------------------------------------------------------
+
+class SettingsAPI:
+    """/admin/settings that applies whatever it is sent and returns every setting."""
+
+    def __init__(self, **settings):
+        self.settings = settings
+
+    def __call__(self, data):
+        self.settings.update(data)
+        return {'success': True, 'settings': dict(self.settings)}
+
+
+def settings_client(api: SettingsAPI, tokens_enabled: bool = False) -> FakeClient:
+    return FakeClient({
+        '/admin/settings': api,
+        '/admin/session-tokens': {'session_tokens_enabled': tokens_enabled},
+    })
+
+
+def writes(client: FakeClient):
+    return [data for endpoint, data in client.sent if endpoint == '/admin/settings' and data]
+
+
+def test_get_settings_serves_the_snapshot_until_it_expires():
+    async def main():
+        client = settings_client(SettingsAPI(script_cache_enabled=True))
+        first = await client.get_settings()
+        await client.get_settings()
+        client.settings_fetched_at -= client.settings_ttl
+        await client.get_settings()
+        return client, first
+
+    client, first = run(main())
+    assert first == {'script_cache_enabled': True, 'session_tokens_enabled': False}
+    assert [endpoint for endpoint, _ in client.sent].count('/admin/settings') == 2
+
+
+def test_get_settings_falls_back_to_session_tokens():
+    async def main():
+        client = FakeClient({'/admin/settings': {'success': True}, '/admin/session-tokens': {'session_tokens_enabled': True}})
+        return await client.get_settings()
+
+    assert run(main()) == {'session_tokens_enabled': True}
+
+
+def test_get_settings_unavailable():
+    async def main():
+        return await FakeClient().get_settings()
+
+    assert run(main()) is None
+
+
+def test_update_sends_only_changed_fields():
+    async def main():
+        api = SettingsAPI(script_cache_ttl_seconds=300, max_active_keys_per_account=3)
+        client = settings_client(api)
+        response = await client.update_settings({'script_cache_ttl_seconds': 300, 'max_active_keys_per_account': 5})
+        return client, response
+
+    client, response = run(main())
+    assert writes(client) == [{'max_active_keys_per_account': 5}]
+    assert response['changed'] == {'max_active_keys_per_account': 5}
+    assert client.settings_snapshot['max_active_keys_per_account'] == 5
+
+
+def test_update_rechecks_a_cached_snapshot_before_skipping():
+    async def main():
+        api = SettingsAPI(enforce_roblox_ua=False)
+        client = settings_client(api)
+        await client.get_settings()
+        api.settings['enforce_roblox_ua'] = True
+        response = await client.update_settings({'enforce_roblox_ua': False})
+        return client, api, response
+
+    client, api, response = run(main())
+    assert not response.get('unchanged')
+    assert writes(client) == [{'enforce_roblox_ua': False}]
+    assert api.settings['enforce_roblox_ua'] is False
+
+
+def test_update_skips_write_when_nothing_changed():
+    async def main():
+        client = settings_client(SettingsAPI(enforce_roblox_ua=False))
+        await client.get_settings()
+        return client, await client.update_settings({'enforce_roblox_ua': False})
+
+    client, response = run(main())
+    assert response['unchanged']
+    assert writes(client) == []
+
+
+def test_update_writes_when_settings_cannot_be_reread():
+    async def main():
+        api = SettingsAPI(enforce_roblox_ua=False)
+        client = settings_client(api)
+        await client.get_settings()
+        client.routes = {'/admin/settings': lambda data: api(data) if data else None}
+        return client, await client.update_settings({'enforce_roblox_ua': False})
+
+    client, response = run(main())
+    assert response['success']
+    assert writes(client) == [{'enforce_roblox_ua': False}]
+
+
+# -- single-flight reads ------------------------------------------------------
+
+def test_identical_concurrent_reads_share_one_request():
+    async def main():
+        client = FakeClient({'/admin/key-info': {'key': 'K', 'status': 'active'}}, delay=0.05)
+        results = await asyncio.gather(*(client._request('POST', '/admin/key-info', {'key': 'K'}) for _ in range(5)))
+        return client, results
+
+    client, results = run(main())
+    assert len(client.sent) == 1
+    assert all(r == {'key': 'K', 'status': 'active'} for r in results)
+    assert client.coalesce_stats == {'reads': 5, 'coalesced': 4}
+    assert client.coalesced_by_endpoint == {'/admin/key-info': 4}
+    assert client.inflight_reads == 0
+
+
+def test_coalesced_callers_get_their_own_copy():
+    async def main():
+        client = FakeClient({'/admin/key-info': {'status': 'active'}}, delay=0.05)
+        first, second = await asyncio.gather(
+            client._request('POST', '/admin/key-info', {'key': 'K'}),
+            client._request('POST', '/admin/key-info', {'key': 'K'}),
+        )
+        second['status'] = 'changed'
+        return first
+
+    assert run(main()) == {'status': 'active'}
+
+
+def test_different_payloads_and_writes_are_not_coalesced():
+    async def main():
+        client = FakeClient({'/admin/key-info': {}, '/admin/suspend-key': {'success': True}}, delay=0.05)
+        await asyncio.gather(
+            client._request('POST', '/admin/key-info', {'key': 'A'}),
+            client._request('POST', '/admin/key-info', {'key': 'B'}),
+            client._request('POST', '/admin/suspend-key', {'key': 'A'}),
+            client._request('POST', '/admin/suspend-key', {'key': 'A'}),
+        )
+        return client
+
+    client = run(main())
+    assert len(client.sent) == 4
+    assert client.coalesce_stats['coalesced'] == 0
+
+
+def test_payload_key_order_does_not_matter():
+    async def main():
+        client = FakeClient({'/admin/list-keys': {'keys': []}}, delay=0.05)
+        await asyncio.gather(
+            client._request('POST', '/admin/list-keys', {'page_size': 10, 'continuation_token': None}),
+            client._request('POST', '/admin/list-keys', {'continuation_token': None, 'page_size': 10}),
+        )
+        return client
+
+    assert len(run(main()).sent) == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    async def main():
+        client = FakeClient({'/admin/key-stats': {'total_keys': 3}}, delay=0.05)
+        first = asyncio.ensure_future(client._request('POST', '/admin/key-stats', {}))
+        second = asyncio.ensure_future(client._request('POST', '/admin/key-stats', {}))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return client, await second
+
+    client, result = run(main())
+    assert result == {'total_keys': 3}
+    assert len(client.sent) == 1
+
+
+def test_reads_after_completion_send_a_new_request():
+    async def main():
+        client = FakeClient({'/health': {'status': 'ok'}})
+        await client._request('GET', '/health', None, require_auth=False)
+        await client._request('GET', '/health', None, require_auth=False)
+        return client
+
+    assert len(run(main()).sent) == 2
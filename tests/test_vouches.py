@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from bench import FakeGuild, FakeMember, FakeRole, load_bot, raw_delete  # noqa: E402
+from members import MEMBER_CACHE_RELEVANT, MemberCache  # noqa: E402
+
+TARGET = 2 * 10 ** 17
+VOUCHER = 10 ** 17
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    state = botmod.guild_state(botmod.PRIMARY_GUILD_ID)
+    guild = FakeGuild(state.config.guild_id)
+    trusted = FakeRole(state.config.trusted_role_id)
+    guild.roles[trusted.id] = trusted
+    target = FakeMember(TARGET, guild, [trusted])
+    guild.members[TARGET] = target
+    state.vouches = {str(TARGET): {'count': 0, 'entries': []}}
+    state.vouch_index.clear()
+    for message_id in range(1, 7):
+        state.vouches[str(TARGET)]['entries'].append({
+            'by': VOUCHER, 'target': TARGET, 'reason': 'fast trade',
+            'timestamp': '2025-01-01T00:00:00', 'message_id': message_id,
+        })
+        state.vouch_index[str(message_id)] = TARGET
+    state.vouches[str(TARGET)]['count'] = 6
+    state.dirty['vouches'] = False
+    state.trusted_checked = set()
+    return botmod, state, target, trusted
+
+
+def bulk_delete(guild_id: int, channel_id: int, message_ids) -> discord.RawBulkMessageDeleteEvent:
+    return discord.RawBulkMessageDeleteEvent({
+        'ids': [str(m) for m in message_ids], 'channel_id': str(channel_id), 'guild_id': str(guild_id),
+    })
+
+
+def test_raw_delete_removes_an_uncached_vouch(setup):
+    botmod, state, target, trusted = setup
+    asyncio.run(botmod.on_raw_message_delete(raw_delete(state.config.guild_id, state.config.vouch_channel_id, 3)))
+    entries = state.vouches[str(TARGET)]['entries']
+    assert [e['message_id'] for e in entries] == [1, 2, 4, 5, 6]
+    assert state.vouches[str(TARGET)]['count'] == 5
+    assert '3' not in state.vouch_index
+    assert state.dirty['vouches']
+    assert trusted in target.roles
+
+
+def test_bulk_delete_drops_the_trusted_role_below_threshold(setup):
+    botmod, state, target, trusted = setup
+    payload = bulk_delete(state.config.guild_id, state.config.vouch_channel_id, [1, 2, 99])
+    asyncio.run(botmod.on_raw_bulk_message_delete(payload))
+    assert state.vouches[str(TARGET)]['count'] == 4
+    assert trusted not in target.roles
+
+
+def test_unrelated_deletes_change_nothing(setup):
+    botmod, state, target, trusted = setup
+    config = state.config
+
+    async def run():
+        await botmod.on_raw_message_delete(raw_delete(config.guild_id, config.vouch_channel_id, 99))
+        # A vouch id deleted from another channel isn't a vouch delete.
+        await botmod.on_raw_message_delete(raw_delete(config.guild_id, config.vouch_channel_id + 1, 1))
+
+    asyncio.run(run())
+    assert state.vouches[str(TARGET)]['count'] == 6
+    assert len(state.vouch_index) == 6
+    assert not state.dirty['vouches']
+
+
+@pytest.fixture
+def uncached(setup, monkeypatch):
+    """The relevant-member policy with the target only reachable through fetch_member."""
+    botmod, state, target, trusted = setup
+    monkeypatch.setattr(discord, 'Member', FakeMember)
+    cache = MemberCache(MEMBER_CACHE_RELEVANT, ttl=-1)
+    cache.set_relevant_roles(state.guild_id, [trusted.id])
+    monkeypatch.setattr(botmod, 'members', cache)
+    guild = target.guild
+    trusted.guild = guild
+    del guild.members[TARGET]
+    fetched = []
+
+    async def fetch_member(user_id):
+        fetched.append(user_id)
+        return target
+
+    guild.fetch_member = fetch_member
+    return botmod, state, target, trusted, fetched
+
+
+def test_reconcile_fetches_uncached_holders_once(uncached, capsys):
+    botmod, state, target, trusted, fetched = uncached
+    asyncio.run(botmod.reconcile_trusted_roles())
+    asyncio.run(botmod.reconcile_trusted_roles())
+    assert fetched == [TARGET]
+    assert trusted in target.roles
+    # The holder already had the role: nothing was edited, so nothing is reported.
+    assert 'reconciled' not in capsys.readouterr().out
+
+
+def test_reconcile_rechecks_holders_that_dropped_below_threshold(uncached, capsys):
+    botmod, state, target, trusted, fetched = uncached
+    asyncio.run(botmod.reconcile_trusted_roles())
+    state.vouches[str(TARGET)]['entries'] = state.vouches[str(TARGET)]['entries'][:4]
+    state.vouches[str(TARGET)]['count'] = 4
+    asyncio.run(botmod.reconcile_trusted_roles())
+    assert fetched == [TARGET, TARGET]
+    assert trusted not in target.roles
+    assert 'Trusted role reconciled for 1 member(s)' in capsys.readouterr().out
+    assert state.trusted_checked == set()
+
+
+def test_sigterm_closes_the_bot(setup, monkeypatch):
+    botmod = setup[0]
+    closed = []
+
+    async def close():
+        closed.append(True)
+
+    monkeypatch.setattr(botmod.bot, 'close', close)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        botmod.install_signal_handlers()
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(0.1)
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+
+    asyncio.run(run())
+    assert closed == [True]
+
+
+def test_vouches_are_written_when_the_bot_stops(setup, monkeypatch):
+    botmod, state, target, trusted = setup
+    monkeypatch.setattr(botmod.config, 'BOT_TOKEN', 'token')
+    monkeypatch.setattr(botmod.bot, 'run', lambda token: None)
+    asyncio.run(botmod.on_raw_message_delete(raw_delete(state.config.guild_id, state.config.vouch_channel_id, 3)))
+    botmod.main()
+    assert not state.dirty['vouches']
+    with open(state.vouches_file, encoding='utf-8') as f:
+        assert json.load(f)[str(TARGET)]['count'] == 5
@@ -0,0 +1,220 @@
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+import worker
+from keyindex import KeyIndex
+from worker import WorkerClient, WorkerError, WorkerUnavailable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from bench import load_bot  # noqa: E402
+
+# Speaks the worker protocol without an API: 'echo' reports progress and returns
+# its args, 'fail' replies with an error, 'die' exits with the job in flight and
+# 'hang' never replies.
+FAKE_WORKER = textwrap.dedent('''
+    import json, os, sys
+
+    def send(msg):
+        sys.stdout.write(json.dumps(msg) + "\\n")
+        sys.stdout.flush()
+
+    send({'ready': os.getpid()})
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if msg['task'] == 'echo':
+            send({'id': msg['id'], 'progress': 'halfway'})
+            send({'id': msg['id'], 'result': msg['args']})
+        elif msg['task'] == 'fail':
+            send({'id': msg['id'], 'error': 'boom'})
+        elif msg['task'] == 'die':
+            os._exit(3)
+        elif msg['task'] == 'hang':
+            pass
+''')
+
+
+def fake_worker(tmp_path, source: str = FAKE_WORKER) -> WorkerClient:
+    script = tmp_path / 'fake_worker.py'
+    script.write_text(source)
+    return WorkerClient({}, script=str(script))
+
+
+def test_round_trip_forwards_progress_and_returns_result(tmp_path):
+    async def run():
+        client = fake_worker(tmp_path)
+        updates = []
+
+        async def progress(text):
+            updates.append(text)
+
+        try:
+            result = await client.submit('echo', {'count': 3}, progress)
+            await asyncio.sleep(0)
+            return client, result, updates
+        finally:
+            await client.close()
+
+    client, result, updates = asyncio.run(run())
+    assert result == {'count': 3}
+    assert updates == ['halfway']
+    assert client.metrics['submitted'] == 1 and client.metrics['completed'] == 1
+    assert client.in_flight == 0
+
+
+def test_error_reply_raises_worker_error(tmp_path):
+    async def run():
+        client = fake_worker(tmp_path)
+        try:
+            with pytest.raises(WorkerError, match='boom'):
+                await client.submit('fail', {})
+            # The worker is still up for the next job.
+            return await client.submit('echo', {'ok': True}), client
+        finally:
+            await client.close()
+
+    result, client = asyncio.run(run())
+    assert result == {'ok': True}
+    assert client.metrics['failed'] == 1 and client.metrics['restarts'] == 0
+
+
+def test_worker_exiting_mid_job_fails_the_job_and_restarts(tmp_path):
+    async def run():
+        client = fake_worker(tmp_path)
+        try:
+            with pytest.raises(WorkerError, match='exited with code 3'):
+                await client.submit('die', {})
+            return await client.submit('echo', {'ok': True}), client
+        finally:
+            await client.close()
+
+    result, client = asyncio.run(run())
+    assert result == {'ok': True}
+    assert client.metrics['failed'] == 1 and client.metrics['restarts'] == 1
+
+
+def test_killed_worker_fails_the_job_in_flight(tmp_path):
+    async def run():
+        client = fake_worker(tmp_path)
+        job = asyncio.create_task(client.submit('hang', {}))
+        while client.in_flight == 0:
+            await asyncio.sleep(0.01)
+        client.process.kill()
+        with pytest.raises(WorkerError) as raised:
+            await job
+        await client._reader
+        return client, raised.value
+
+    client, error = asyncio.run(run())
+    assert not isinstance(error, WorkerUnavailable)
+    assert not client.running
+    assert client.in_flight == 0
+
+
+def test_worker_that_exits_before_ready_is_unavailable(tmp_path):
+    async def run():
+        client = fake_worker(tmp_path, "import sys\nsys.exit(2)\n")
+        with pytest.raises(WorkerUnavailable):
+            await client.submit('echo', {})
+        return client
+
+    client = asyncio.run(run())
+    assert not client.running
+
+
+def test_worker_that_never_gets_ready_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, 'WORKER_START_TIMEOUT', 0.5)
+
+    async def run():
+        client = fake_worker(tmp_path, "import time\ntime.sleep(30)\n")
+        with pytest.raises(WorkerUnavailable, match='did not start'):
+            await client.submit('echo', {})
+        await client.process.wait()
+        return client
+
+    client = asyncio.run(run())
+    assert not client.running
+
+
+class InventoryClient:
+    """The parts of APIClient key_inventory uses: a listing without owners and key_info lookups."""
+
+    def __init__(self, keys):
+        self.key_index = KeyIndex()
+        self.keys = keys
+        self.looked_up = []
+
+    async def iter_keys(self, page_size=100):
+        for key in self.keys:
+            self.key_index.add(key)
+            yield {'key': f"keys/{key}.json"}
+
+    async def key_info(self, key):
+        self.looked_up.append(key)
+        self.key_index.add_response(key, {'discord_user_id': None})
+
+
+def test_inventory_resolves_each_unowned_key_once():
+    client = InventoryClient(['A', 'B', 'C'])
+    args = {'resolve_limit': 100, 'concurrency': 2}
+
+    async def run():
+        first = await worker.key_inventory(client, args, None)
+        second = await worker.key_inventory(client, args, None)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert sorted(client.looked_up) == ['A', 'B', 'C']
+    assert (first['resolved'], second['resolved']) == (3, 0)
+
+
+def test_inventory_skips_keys_the_bot_already_resolved():
+    # A worker process has its own index; the bot passes the keys it knows have no owner.
+    client = InventoryClient(['A', 'B'])
+    args = {'resolve_limit': 100, 'concurrency': 2, 'unowned': ['A'], 'remote': True}
+    result = asyncio.run(worker.key_inventory(client, args, None))
+    assert client.looked_up == ['B']
+    assert ['B', None, None, None, True] in result['records']
+
+
+class GenerateClient:
+    def __init__(self):
+        self.created = 0
+
+    async def create_key(self, duration_seconds, discord_user_id):
+        self.created += 1
+        return {'key': f'key-{self.created}', 'duration_seconds': duration_seconds}
+
+
+def test_run_heavy_falls_back_in_process_when_the_worker_is_unavailable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    api = GenerateClient()
+    monkeypatch.setattr(botmod, 'api_client', api)
+    monkeypatch.setattr(botmod, 'worker', fake_worker(tmp_path, "import sys\nsys.exit(2)\n"))
+    result = asyncio.run(botmod.run_heavy('bulk_generate', {'count': 2, 'duration_seconds': 60}))
+    assert [r['key'] for r in result['created']] == ['key-1', 'key-2']
+    assert result['failures'] == 0
+    assert api.created == 2
+
+
+def test_run_heavy_does_not_rerun_a_job_the_worker_failed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    botmod = load_bot(str(tmp_path))
+    api = GenerateClient()
+    monkeypatch.setattr(botmod, 'api_client', api)
+    client = fake_worker(tmp_path)
+    monkeypatch.setattr(botmod, 'worker', client)
+
+    async def run():
+        try:
+            await botmod.run_heavy('die', {})
+        finally:
+            await client.close()
+
+    with pytest.raises(WorkerError):
+        asyncio.run(run())
+    assert api.created == 0
@@ -0,0 +1,357 @@
+"""Benchmarks for the vouch and command-log hot paths in bot/bot.py.
+
+Builds synthetic vouch and command-log datasets at several sizes, runs the
+real handlers against lightweight fake Discord objects (no gateway, no API),
+and records per-call timing and peak allocation. Results can be saved as a
+JSON baseline and later runs fail when a path regresses past a threshold.
+
+    python tools/bench.py --sizes 1000,10000,100000
+    python tools/bench.py --save-baseline tools/bench_baseline.json
+    python tools/bench.py --baseline tools/bench_baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+import discord
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot')
+VOUCHES_PER_TARGET = 900          # stays under MAX_VOUCHES_PER_USER so vouches are accepted
+MIN_ITERATIONS = 3
+MAX_ITERATIONS = 200
+TIME_BUDGET = 0.5                 # seconds of timed calls per benchmark and size
+MIN_DELTA_US = 50.0               # ignore regressions smaller than this, to keep noise out
+MIN_DELTA_KIB = 64.0
+
+
+# -- fake Discord objects ------------------------------------------------------
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+
+class FakeMember:
+    def __init__(self, member_id: int, guild: 'FakeGuild', roles: List[FakeRole]):
+        self.id = member_id
+        self.name = f"user{member_id}"
+        self.mention = f"<@{member_id}>"
+        self.guild = guild
+        self.roles = roles
+        self.bot = False
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    async def add_roles(self, role, reason=None):
+        if role not in self.roles:
+            self.roles.append(role)
+
+    async def remove_roles(self, role, reason=None):
+        if role in self.roles:
+            self.roles.remove(role)
+
+
+class FakeGuild:
+    # Every fake guild by id; load_bot points bot.get_guild here.
+    registry: Dict[int, 'FakeGuild'] = {}
+
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.members: Dict[int, FakeMember] = {}
+        self.roles: Dict[int, FakeRole] = {}
+        FakeGuild.registry[guild_id] = self
+
+    def get_member(self, member_id: int):
+        return self.members.get(member_id)
+
+    def get_role(self, role_id: int):
+        return self.roles.setdefault(role_id, FakeRole(role_id))
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+    async def send(self, *args, **kwargs):
+        return None
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, author: FakeMember, guild: FakeGuild, channel: FakeChannel, content: str = ""):
+        self.id = message_id
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.content = content
+
+    async def add_reaction(self, emoji):
+        return None
+
+    async def reply(self, *args, **kwargs):
+        return None
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def defer(self, *args, **kwargs):
+        self.done = True
+
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, channel: FakeChannel = None):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+# -- harness -------------------------------------------------------------------
+
+def raw_delete(guild_id: int, channel_id: int, message_id: int) -> discord.RawMessageDeleteEvent:
+    return discord.RawMessageDeleteEvent({'id': str(message_id), 'channel_id': str(channel_id), 'guild_id': str(guild_id)})
+
+
+def load_bot(workdir: str):
+    """Import bot.py from a scratch directory so its JSON files never touch the real ones."""
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.abspath(BOT_DIR))
+    import bot as botmod
+
+    async def process_commands(message):
+        return None
+
+    # No gateway connection: prefix-command dispatch needs bot.user, which only exists once logged in,
+    # and raw events carry guild ids that resolve against the fake guilds.
+    botmod.bot.process_commands = process_commands
+    botmod.bot.get_guild = FakeGuild.registry.get
+    # setup_hook only runs on login; load the command extensions directly.
+    asyncio.run(botmod.load_extensions())
+    return botmod
+
+
+class Dataset:
+    def __init__(self, botmod, size: int, seed: int = 7):
+        rng = random.Random(seed)
+        self.botmod = botmod
+        self.state = botmod.guild_state(botmod.PRIMARY_GUILD_ID)
+        guild_config = self.state.config
+        self.guild = FakeGuild(guild_config.guild_id)
+        self.channel = FakeChannel(guild_config.vouch_channel_id)
+        staff_role = FakeRole(next(iter(guild_config.staff_role_ids)))
+        owner_role = FakeRole(guild_config.owner_role_id)
+        self.author = FakeMember(10 ** 17, self.guild, [owner_role])
+        self.guild.members[self.author.id] = self.author
+
+        targets = max(1, (size + VOUCHES_PER_TARGET - 1) // VOUCHES_PER_TARGET)
+        self.target_ids = [2 * 10 ** 17 + i for i in range(targets)]
+        for target_id in self.target_ids:
+            self.guild.members[target_id] = FakeMember(target_id, self.guild, [staff_role])
+
+        started = datetime.now() - timedelta(days=365)
+        vouches: Dict[str, Dict[str, Any]] = {}
+        index: Dict[str, int] = {}
+        self.message_ids: List[int] = []
+        for i in range(size):
+            target_id = self.target_ids[i % targets]
+            message_id = 3 * 10 ** 17 + i
+            record = vouches.setdefault(str(target_id), {"count": 0, "entries": []})
+            record["entries"].append({
+                "by": 10 ** 17 + rng.randrange(10 ** 6),
+                "target": target_id,
+                "reason": "smooth trade, fast and friendly",
+                "timestamp": (started + timedelta(seconds=i)).isoformat(),
+                "message_id": message_id,
+            })
+            record["count"] += 1
+            index[str(message_id)] = target_id
+            self.message_ids.append(message_id)
+        self.vouches = vouches
+        self.index = index
+
+        commands = ['givekey', 'keyinfo', 'suspendkey', 'modifykey', 'bulkkeys', 'grantkeys']
+        self.logs = [
+            botmod.build_log_entry(
+                rng.choice(commands), 10 ** 17 + rng.randrange(100), f"staff{rng.randrange(100)}",
+                2 * 10 ** 17 + rng.randrange(10 ** 4), f"user{i}", {'key': f"K{i:08d}", 'duration': '30d'}
+            )
+            for i in range(size)
+        ]
+        self.next_message_id = 4 * 10 ** 17
+
+    def install(self):
+        self.state.vouches = self.vouches
+        self.state.vouch_index.clear()
+        self.state.vouch_index.update(self.index)
+        self.state.command_logs[:] = self.logs
+
+    def new_message_id(self) -> int:
+        self.next_message_id += 1
+        return self.next_message_id
+
+
+def build_benchmarks(botmod, data: Dataset) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    interaction = FakeInteraction(data.guild, data.author)
+    topvouches = sys.modules['cogs.vouches'].topvouches.callback.__wrapped__
+    modlogs = sys.modules['cogs.logs'].modlogs.callback.__wrapped__
+    deletable = list(reversed(data.message_ids))
+
+    async def on_message_vouch():
+        target_id = random.choice(data.target_ids)
+        message = FakeMessage(
+            data.new_message_id(), data.author, data.guild, data.channel,
+            f"+vouch <@{target_id}> great service, would trade again"
+        )
+        await botmod.on_message(message)
+
+    async def vouch_delete():
+        message_id = deletable.pop() if deletable else data.new_message_id()
+        await botmod.on_raw_message_delete(raw_delete(data.guild.id, data.channel.id, message_id))
+
+    async def vouch_delete_unrelated():
+        # Raw events arrive for every delete in the vouch channel, vouch or not.
+        await botmod.on_raw_message_delete(raw_delete(data.guild.id, data.channel.id, data.new_message_id()))
+
+    async def log_command():
+        botmod.log_command('keyinfo', data.author.id, data.author.name, details={'key': 'ABCDEFGH'}, guild_id=data.guild.id)
+
+    async def save_logs():
+        botmod.save_logs()
+
+    async def save_vouches():
+        botmod.save_vouches()
+
+    async def topvouches_command():
+        await topvouches(interaction)
+
+    async def modlogs_page():
+        pages = max(1, (len(data.state.command_logs) + 4) // 5)
+        await modlogs(interaction, page=random.randint(1, pages))
+
+    return {
+        'on_message_vouch': on_message_vouch,
+        'vouch_delete': vouch_delete,
+        'vouch_delete_unrelated': vouch_delete_unrelated,
+        'log_command': log_command,
+        'save_logs': save_logs,
+        'save_vouches': save_vouches,
+        'topvouches': topvouches_command,
+        'modlogs_page': modlogs_page,
+    }
+
+
+async def measure(call: Callable[[], Awaitable[Any]]) -> Dict[str, float]:
+    timings: List[float] = []
+    budget_end = time.perf_counter() + TIME_BUDGET
+    while len(timings) < MIN_ITERATIONS or (len(timings) < MAX_ITERATIONS and time.perf_counter() < budget_end):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    tracemalloc.start()
+    await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        'iterations': len(timings),
+        'median_us': round(statistics.median(timings), 1),
+        'p95_us': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+async def run(botmod, sizes: List[int], only: List[str]) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        data = Dataset(botmod, size)
+        benchmarks = build_benchmarks(botmod, data)
+        for name, call in benchmarks.items():
+            if only and name not in only:
+                continue
+            data.install()
+            # The handlers print a [OK]/[TASK] line per call; keep those out of the report.
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = await measure(call)
+            results[f"{name}@{size}"] = result
+            print(f"{name:<28}{size:>9}{result['median_us']:>12.1f}{result['p95_us']:>12.1f}{result['peak_kib']:>12.1f}{result['iterations']:>7}")
+        del data
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    failures = []
+    for name, now in results.items():
+        then = baseline.get(name)
+        if not then:
+            continue
+        if now['median_us'] > then['median_us'] * (1 + threshold) and now['median_us'] - then['median_us'] > MIN_DELTA_US:
+            failures.append(f"{name}: median {now['median_us']}us vs baseline {then['median_us']}us")
+        if now['peak_kib'] > then['peak_kib'] * (1 + threshold) and now['peak_kib'] - then['peak_kib'] > MIN_DELTA_KIB:
+            failures.append(f"{name}: peak {now['peak_kib']}KiB vs baseline {then['peak_kib']}KiB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vouch and command-log hot paths")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="comma-separated dataset sizes, e.g. 1000,10000,100000,1000000")
+    parser.add_argument('--only', default='', help="comma-separated benchmark names to run")
+    parser.add_argument('--baseline', help="fail if results regress past --threshold against this file")
+    parser.add_argument('--save-baseline', help="write results to this file")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed fractional regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    only = [s for s in args.only.split(',') if s]
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_path = os.path.abspath(args.save_baseline) if args.save_baseline else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        botmod = load_bot(workdir)
+        print(f"{'benchmark':<28}{'size':>9}{'median us':>12}{'p95 us':>12}{'peak KiB':>12}{'iters':>7}")
+        results = asyncio.run(run(botmod, sizes, only))
+
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"[BENCH] Baseline written to {save_path}")
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            failures = compare(results, json.load(f)['results'], args.threshold)
+        for failure in failures:
+            print(f"[REGRESSION] {failure}")
+        if failures:
+            sys.exit(1)
+        print("[BENCH] No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Drive APIClient with N concurrent workers and report throughput and latency percentiles.
+
+Runs against --base if given, otherwise against an in-process stub_api server:
+
+    python tools/loadtest.py --clients 32 --duration 20 --latency-ms 30
+    python tools/loadtest.py --base http://127.0.0.1:8787 --secret dev-secret --mix key_info=8,list_keys=1
+    python tools/loadtest.py --json results.json --baseline baseline.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot'))
+
+from utils import APIClient  # noqa: E402
+from stub_api import start_stub  # noqa: E402
+
+DEFAULT_MIX = "key_info=6,list_keys=1,create_key=1,health=1,list_scripts=1,key_stats=1"
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def build_operations(client: APIClient, known_keys: List[str]) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    async def create_key():
+        response = await client.create_key(86400, str(random.randint(10 ** 17, 10 ** 18)))
+        if response and response.get('key'):
+            known_keys.append(response['key'])
+        return response
+
+    async def key_info():
+        if not known_keys:
+            return await create_key()
+        return await client.key_info(random.choice(known_keys))
+
+    return {
+        'create_key': create_key,
+        'key_info': key_info,
+        'list_keys': lambda: client.list_keys(page_size=100),
+        'health': client.health,
+        'list_scripts': client.list_scripts,
+        'key_stats': client.key_stats,
+        'get_settings': lambda: client.get_settings(refresh=True),
+    }
+
+
+async def run_load(client: APIClient, mix: Dict[str, int], clients: int, duration: float, requests: int, known_keys: List[str] = None) -> Dict[str, Any]:
+    known_keys = list(known_keys or [])
+    operations = build_operations(client, known_keys)
+    unknown = [name for name in mix if name not in operations]
+    if unknown:
+        raise SystemExit(f"Unknown operation(s) in --mix: {', '.join(unknown)} (known: {', '.join(sorted(operations))})")
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal issued
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if requests and issued >= requests:
+                return
+            issued += 1
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await operations[name]()
+            except Exception:
+                response = None
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            if response is None or (isinstance(response, dict) and response.get('error')):
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    report: Dict[str, Any] = {'clients': clients, 'elapsed_s': round(elapsed, 3), 'operations': {}}
+    every = sorted(ms for values in latencies.values() for ms in values)
+    for name in names:
+        values = sorted(latencies[name])
+        report['operations'][name] = {
+            'count': len(values),
+            'errors': errors[name],
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+            'max_ms': round(values[-1], 2) if values else 0.0,
+        }
+    report['total'] = {
+        'count': len(every),
+        'errors': sum(errors.values()),
+        'throughput_rps': round(len(every) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(every, 50), 2),
+        'p95_ms': round(percentile(every, 95), 2),
+        'p99_ms': round(percentile(every, 99), 2),
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'operation':<14}{'count':>8}{'errors':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, op in report['operations'].items():
+        print(f"{name:<14}{op['count']:>8}{op['errors']:>8}{op['p50_ms']:>10.1f}{op['p95_ms']:>10.1f}{op['p99_ms']:>10.1f}{op['max_ms']:>10.1f}")
+    total = report['total']
+    print(f"\n{total['count']} requests in {report['elapsed_s']}s with {report['clients']} clients: "
+          f"{total['throughput_rps']} req/s, p50 {total['p50_ms']}ms, p95 {total['p95_ms']}ms, p99 {total['p99_ms']}ms, {total['errors']} errors")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    failures = []
+    now, then = report['total'], baseline['total']
+    if then.get('throughput_rps') and now['throughput_rps'] < then['throughput_rps'] * (1 - max_regression):
+        failures.append(f"throughput {now['throughput_rps']} req/s < baseline {then['throughput_rps']} req/s")
+    for field in ('p95_ms', 'p99_ms'):
+        if then.get(field) and now[field] > then[field] * (1 + max_regression):
+            failures.append(f"{field} {now[field]} > baseline {then[field]}")
+    return failures
+
+
+async def main_async(args) -> int:
+    runner = None
+    known_keys: List[str] = []
+    base, secret = args.base, args.secret
+    if not base:
+        stub, runner, base = await start_stub(
+            secret=secret,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            seed_keys=args.seed_keys
+        )
+        known_keys = list(stub.keys)
+        print(f"[LOAD] Started stub API at {base} with {len(stub.keys)} key(s)")
+    client = APIClient(base, secret, timeout=args.timeout)
+    try:
+        report = await run_load(client, parse_mix(args.mix), args.clients, args.duration, args.requests, known_keys)
+    finally:
+        await client.close()
+        if runner:
+            await runner.cleanup()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"[REGRESSION] {failure}")
+        if failures:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test APIClient against the stub or a real API")
+    parser.add_argument('--base', help="API base URL; an in-process stub is started when omitted")
+    parser.add_argument('--secret', default='dev-secret')
+    parser.add_argument('--clients', type=int, default=16, help="concurrent workers sharing one APIClient")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to run (0 = until --requests)")
+    parser.add_argument('--requests', type=int, default=0, help="stop after this many requests")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="weighted operations, e.g. key_info=6,list_keys=1")
+    parser.add_argument('--timeout', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="stub only")
+    parser.add_argument('--jitter-ms', type=float, default=5.0, help="stub only")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="stub only")
+    parser.add_argument('--seed-keys', type=int, default=1000, help="stub only")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--baseline', help="compare against a previous --json report")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="allowed fractional regression vs baseline")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == '__main__':
+    main()
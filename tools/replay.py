@@ -0,0 +1,279 @@
+"""Replay a gateway recording (see bot/recorder.py) through the bot's handlers offline.
+
+Events are fed to on_message / on_raw_message_delete and slash-command callbacks
+against fake Discord objects and an in-process stub API, at the recorded pace
+scaled by --speed (0 = as fast as possible). Reports events/sec, per-type
+handler latency and event-loop lag:
+
+    python tools/replay.py events.ndjson --speed 10
+    python tools/replay.py events.ndjson --speed 0 --vouches vouches.json --json replay.json
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import typing
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot'))
+
+from recorder import read_events  # noqa: E402
+from bench import FakeChannel, FakeGuild, FakeInteraction, FakeMember, FakeMessage, load_bot, raw_delete  # noqa: E402
+from loadtest import percentile  # noqa: E402
+from stub_api import start_stub  # noqa: E402
+
+LAG_INTERVAL = 0.01
+OPTION_SUBCOMMAND = 1
+OPTION_SUBCOMMAND_GROUP = 2
+OPTION_ATTACHMENT = 11
+
+
+class ReplayState:
+    """The fake guilds the recording is replayed into, built up from the members it mentions.
+
+    With ``keep_guilds`` events stay in their recorded guild (replaying with the
+    deployment's guilds.json); otherwise everything lands in the primary guild.
+    """
+
+    def __init__(self, botmod, keep_guilds: bool = False):
+        self.botmod = botmod
+        self.keep_guilds = keep_guilds
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.channels: Dict[int, FakeChannel] = {}
+
+    def guild(self, guild_id: Optional[int]) -> FakeGuild:
+        if not self.keep_guilds or guild_id is None:
+            guild_id = self.botmod.PRIMARY_GUILD_ID
+        if guild_id not in self.guilds:
+            self.guilds[guild_id] = FakeGuild(guild_id)
+        return self.guilds[guild_id]
+
+    def channel(self, channel_id: Optional[int]) -> FakeChannel:
+        channel_id = channel_id or 0
+        if channel_id not in self.channels:
+            self.channels[channel_id] = FakeChannel(channel_id)
+        return self.channels[channel_id]
+
+    def member(self, guild: FakeGuild, record: Dict[str, Any]) -> FakeMember:
+        member = guild.members.get(record['id'])
+        roles = [guild.get_role(role_id) for role_id in record.get('roles', [])]
+        if member is None:
+            member = FakeMember(record['id'], guild, roles)
+            guild.members[member.id] = member
+        else:
+            member.roles = roles
+        member.name = record.get('name') or member.name
+        member.bot = record.get('bot', False)
+        return member
+
+
+def resolve_command(botmod, guild_id: int, name: str, options: List[Dict[str, Any]]):
+    command = botmod.bot.tree.get_command(name, guild=discord.Object(id=guild_id))
+    while isinstance(command, app_commands.Group) and options and options[0].get('type') in (OPTION_SUBCOMMAND, OPTION_SUBCOMMAND_GROUP):
+        command = command.get_command(options[0]['name'])
+        options = options[0].get('options', [])
+    return command, options
+
+
+def convert_options(command: app_commands.Command, options: List[Dict[str, Any]], state: ReplayState, guild: FakeGuild) -> Optional[Dict[str, Any]]:
+    """Map recorded option values to callback kwargs; None when the command can't be replayed offline."""
+    params = {param.display_name: param for param in command.parameters}
+    annotations = inspect.signature(command.callback).parameters
+    kwargs = {}
+    for option in options:
+        param = params.get(option['name'])
+        if param is None or option.get('type') == OPTION_ATTACHMENT:
+            return None
+        value = option.get('value')
+        if param.type == discord.AppCommandOptionType.user:
+            value = guild.get_member(int(value)) or state.member(guild, {'id': int(value)})
+        elif param.type == discord.AppCommandOptionType.role:
+            value = guild.get_role(int(value))
+        elif param.type == discord.AppCommandOptionType.channel:
+            value = state.channel(int(value))
+        elif param.choices:
+            annotation = annotations[param.name].annotation
+            if annotation is app_commands.Choice or typing.get_origin(annotation) is app_commands.Choice:
+                value = next((choice for choice in param.choices if choice.value == value), app_commands.Choice(name=str(value), value=value))
+        kwargs[param.name] = value
+    return kwargs
+
+
+class Replayer:
+    def __init__(self, botmod, state: ReplayState):
+        self.botmod = botmod
+        self.state = state
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+        self.lag: List[float] = []
+        self.pending: set = set()
+
+    def _count(self, counter: Dict[str, int], kind: str):
+        counter[kind] = counter.get(kind, 0) + 1
+
+    def _prepare(self, event: Dict[str, Any]):
+        """Build the handler call for an event, or None if there's nothing to run."""
+        kind = event['type']
+        state = self.state
+        guild = state.guild(event.get('guild_id'))
+        if kind == 'message_create':
+            for mention in event.get('mentions', []):
+                state.member(guild, mention)
+            message = FakeMessage(
+                event['id'], state.member(guild, event['author']), guild,
+                state.channel(event.get('channel_id')), event.get('content') or ""
+            )
+            return self.botmod.on_message(message)
+        if kind == 'message_delete':
+            return self.botmod.on_raw_message_delete(raw_delete(guild.id, event.get('channel_id') or 0, event['id']))
+        if kind == 'member_update':
+            state.member(guild, event['member'])
+            return None
+        if kind == 'interaction':
+            command, options = resolve_command(self.botmod, guild.id, event.get('command') or '', event.get('options', []))
+            kwargs = convert_options(command, options, state, guild) if isinstance(command, app_commands.Command) else None
+            if kwargs is None:
+                self._count(self.skipped, kind)
+                return None
+            interaction = FakeInteraction(guild, state.member(guild, event['user']), state.channel(event.get('channel_id')))
+            return command.callback(interaction, **kwargs)
+        self._count(self.skipped, kind)
+        return None
+
+    async def _run(self, kind: str, coro):
+        started = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            self._count(self.errors, kind)
+            print(f"[REPLAY] {kind} handler failed: {e}", file=sys.stderr)
+        self.latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    async def _sample_lag(self):
+        while True:
+            expected = time.perf_counter() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lag.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    async def replay(self, events: List[Dict[str, Any]], speed: float) -> float:
+        sampler = asyncio.create_task(self._sample_lag())
+        started = time.perf_counter()
+        origin = events[0]['t'] if events else 0.0
+        for event in events:
+            delay = (event['t'] - origin) / speed - (time.perf_counter() - started) if speed else 0
+            # Always yield, so handlers and the lag sampler run between events as they would live.
+            await asyncio.sleep(max(0.0, delay))
+            coro = self._prepare(event)
+            if coro is None:
+                continue
+            # Like the gateway dispatcher, each event's handler runs as its own task.
+            task = asyncio.create_task(self._run(event['type'], coro))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+        if self.pending:
+            await asyncio.gather(*self.pending)
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        return elapsed
+
+    def report(self, elapsed: float, total: int) -> Dict[str, Any]:
+        handled = sum(len(values) for values in self.latencies.values())
+        lag = sorted(self.lag)
+        report: Dict[str, Any] = {
+            'events': total,
+            'handled': handled,
+            'elapsed_s': round(elapsed, 3),
+            'events_per_s': round(handled / elapsed, 1) if elapsed else 0.0,
+            'handlers': {},
+            'skipped': self.skipped,
+            'loop_lag_ms': {
+                'p50': round(percentile(lag, 50), 2),
+                'p95': round(percentile(lag, 95), 2),
+                'p99': round(percentile(lag, 99), 2),
+                'max': round(lag[-1], 2) if lag else 0.0,
+            },
+        }
+        for kind, values in self.latencies.items():
+            values = sorted(values)
+            report['handlers'][kind] = {
+                'count': len(values),
+                'errors': self.errors.get(kind, 0),
+                'p50_ms': round(percentile(values, 50), 3),
+                'p95_ms': round(percentile(values, 95), 3),
+                'p99_ms': round(percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3),
+            }
+        return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'handler':<18}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, stats in report['handlers'].items():
+        print(f"{kind:<18}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    lag = report['loop_lag_ms']
+    print(f"\n{report['handled']}/{report['events']} events in {report['elapsed_s']}s: {report['events_per_s']} events/s, "
+          f"loop lag p50 {lag['p50']}ms, p95 {lag['p95']}ms, max {lag['max']}ms")
+    if report['skipped']:
+        print("Skipped: " + ", ".join(f"{kind}={count}" for kind, count in report['skipped'].items()))
+
+
+async def main_async(args, botmod, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stub, runner, base = await start_stub(secret=args.secret, latency_ms=args.latency_ms, seed_keys=args.seed_keys)
+    botmod.api_client = botmod.APIClient(base, args.secret)
+    replayer = Replayer(botmod, ReplayState(botmod, keep_guilds=bool(args.guilds)))
+    try:
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+            elapsed = await replayer.replay(events, args.speed)
+    finally:
+        await botmod.api_client.close()
+        await runner.cleanup()
+    return replayer.report(elapsed, len(events))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded gateway event stream through the bot's handlers")
+    parser.add_argument('recording', help="NDJSON file written with GATEWAY_RECORD_FILE")
+    parser.add_argument('--speed', type=float, default=1.0, help="pace multiplier; 0 replays as fast as possible")
+    parser.add_argument('--vouches', help="vouches.json snapshot to start from (primary guild)")
+    parser.add_argument('--guilds', help="guilds.json to replay with; events then keep their recorded guild")
+    parser.add_argument('--secret', default='dev-secret')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="stub API latency")
+    parser.add_argument('--seed-keys', type=int, default=100, help="keys to create in the stub API")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the bot's own log output")
+    args = parser.parse_args()
+
+    events = sorted(read_events(args.recording), key=lambda event: event['t'])
+    vouches = os.path.abspath(args.vouches) if args.vouches else None
+    guilds = os.path.abspath(args.guilds) if args.guilds else None
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if guilds:
+            os.environ['GUILDS_FILE'] = guilds
+        botmod = load_bot(workdir)
+        if vouches:
+            shutil.copy(vouches, os.path.join(workdir, botmod.guild_state(botmod.PRIMARY_GUILD_ID).vouches_file))
+            botmod.load_vouches()
+        report = asyncio.run(main_async(args, botmod, events))
+
+    print_report(report)
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
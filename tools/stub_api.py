@@ -0,0 +1,353 @@
+"""Local stand-in for the licensing API, for exercising APIClient without API_BASE.
+
+Implements every route bot/utils.py calls, checks X-Signature the same way the
+real API does, and can add latency, inject errors and shrink list pages.
+
+    python tools/stub_api.py --port 8787 --secret dev --latency-ms 40 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import string
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+
+def _now() -> datetime:
+    return datetime.now()
+
+
+def _new_key() -> str:
+    return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(32))
+
+
+class StubAPI:
+    def __init__(
+        self,
+        secret: str,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        max_page: int = 100,
+        seed_keys: int = 0,
+        owners: int = 50
+    ):
+        self.secret = secret.encode()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.max_page = max_page
+        self.keys: Dict[str, Dict[str, Any]] = {}
+        self.scripts: Dict[str, Dict[str, Any]] = {}
+        self.blacklist: Dict[str, Optional[float]] = {}
+        self.settings: Dict[str, Any] = {
+            'session_tokens_enabled': False,
+            'script_cache_enabled': True,
+            'script_cache_ttl_seconds': 300,
+            'max_active_keys_per_account': 3,
+            'hwid_reset_cooldown_hours': 24,
+            'enforce_roblox_ua': False,
+            'allow_shitty_unchwid': False,
+        }
+        self.requests = 0
+        self.rejected = 0
+        for i in range(seed_keys):
+            self._create(str(100000000000000000 + i % max(owners, 1)), random.choice((3600, 86400, 604800, 2592000)))
+
+    # -- plumbing ---------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._chaos], client_max_size=64 * 1024 * 1024)
+        routes = {
+            '/admin/create-key': self.create_key,
+            '/admin/suspend-key': self.suspend_key,
+            '/admin/unsuspend-key': self.unsuspend_key,
+            '/admin/delete-key': self.delete_key,
+            '/admin/clear-key': self.clear_key,
+            '/admin/key-info': self.key_info,
+            '/admin/modify-key': self.modify_key,
+            '/admin/merge-keys': self.merge_keys,
+            '/admin/blacklist': self.manage_blacklist,
+            '/admin/key-stats': self.key_stats,
+            '/admin/list-keys': self.list_keys,
+            '/admin/session-tokens': self.session_tokens,
+            '/admin/prune-expired-keys': self.prune_expired,
+            '/admin/settings': self.update_settings,
+            '/admin/script/upload': self.upload_script,
+            '/admin/script/delete': self.delete_script,
+            '/admin/script/list': self.list_scripts,
+        }
+        for path, handler in routes.items():
+            app.router.add_post(path, handler)
+        app.router.add_get('/health', self.health)
+        return app
+
+    @web.middleware
+    async def _chaos(self, request: web.Request, handler):
+        self.requests += 1
+        if self.latency_ms or self.jitter_ms:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            return web.json_response({'error': 'Injected failure'}, status=500)
+        return await handler(request)
+
+    def _verify(self, payload: bytes, signature: str) -> bool:
+        expected = hmac.new(self.secret, payload, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature or '')
+
+    async def _body(self, request: web.Request) -> Dict[str, Any]:
+        raw = await request.read()
+        text = raw.decode() if raw else json.dumps({})
+        # APIClient signs json.dumps(data) and aiohttp sends json.dumps(data), so the raw body is what was signed.
+        if not self._verify(text.encode(), request.headers.get('X-Signature', '')):
+            self.rejected += 1
+            raise web.HTTPUnauthorized(text=json.dumps({'error': 'Invalid signature'}), content_type='application/json')
+        data = json.loads(text) if text else {}
+        return data if isinstance(data, dict) else {}
+
+    def _create(self, owner: Optional[str], duration_seconds: int) -> Dict[str, Any]:
+        key = _new_key()
+        record = {
+            'discord_user_id': owner,
+            'status': 'active',
+            'created_at': _now().isoformat(),
+            'expiry_timestamp': (_now() + timedelta(seconds=duration_seconds)).isoformat(),
+            'duration_seconds': duration_seconds,
+            'hwid_set': False,
+            'reset_count': 0,
+            'signature_history_count': 0,
+        }
+        self.keys[key] = record
+        return {'key': key, **record}
+
+    def _missing(self, key: str):
+        return web.json_response({'error': 'Key not found'}, status=404)
+
+    # -- keys -------------------------------------------------------------
+
+    async def create_key(self, request: web.Request):
+        data = await self._body(request)
+        created = self._create(data.get('discord_user_id'), int(data.get('duration_seconds', 86400)))
+        return web.json_response({'success': True, **created})
+
+    async def _set_status(self, request: web.Request, status: str):
+        data = await self._body(request)
+        record = self.keys.get(data.get('key'))
+        if record is None:
+            return self._missing(data.get('key'))
+        record['status'] = status
+        return web.json_response({'success': True, 'status': status})
+
+    async def suspend_key(self, request: web.Request):
+        return await self._set_status(request, 'suspended')
+
+    async def unsuspend_key(self, request: web.Request):
+        return await self._set_status(request, 'active')
+
+    async def delete_key(self, request: web.Request):
+        data = await self._body(request)
+        if self.keys.pop(data.get('key'), None) is None:
+            return self._missing(data.get('key'))
+        return web.json_response({'success': True})
+
+    async def clear_key(self, request: web.Request):
+        data = await self._body(request)
+        record = self.keys.get(data.get('key'))
+        if record is None:
+            return self._missing(data.get('key'))
+        record['hwid_set'] = False
+        record['reset_count'] += 1
+        return web.json_response({'success': True})
+
+    async def key_info(self, request: web.Request):
+        data = await self._body(request)
+        record = self.keys.get(data.get('key'))
+        if record is None:
+            return self._missing(data.get('key'))
+        return web.json_response({'key': data['key'], **record})
+
+    async def modify_key(self, request: web.Request):
+        data = await self._body(request)
+        record = self.keys.get(data.get('key'))
+        if record is None:
+            return self._missing(data.get('key'))
+        if data.get('discord_user_id'):
+            record['discord_user_id'] = data['discord_user_id']
+        if data.get('status'):
+            record['status'] = data['status']
+        if data.get('duration_seconds'):
+            record['duration_seconds'] = int(data['duration_seconds'])
+            record['expiry_timestamp'] = (_now() + timedelta(seconds=record['duration_seconds'])).isoformat()
+        return web.json_response({'success': True, **record})
+
+    async def merge_keys(self, request: web.Request):
+        data = await self._body(request)
+        source = self.keys.get(data.get('source_key'))
+        target = self.keys.get(data.get('target_key'))
+        if source is None or target is None:
+            return self._missing(data.get('source_key'))
+        remaining = max(0.0, datetime.fromisoformat(source['expiry_timestamp']).timestamp() - time.time())
+        expiry = datetime.fromisoformat(target['expiry_timestamp']) + timedelta(seconds=remaining)
+        target['expiry_timestamp'] = expiry.isoformat()
+        target['duration_seconds'] += int(remaining)
+        del self.keys[data['source_key']]
+        return web.json_response({
+            'success': True,
+            'target_duration_seconds': target['duration_seconds'],
+            'target_expiry_timestamp': target['expiry_timestamp'],
+        })
+
+    async def manage_blacklist(self, request: web.Request):
+        data = await self._body(request)
+        action = data.get('action')
+        user_id = data.get('discord_user_id')
+        now = time.time()
+        for uid in [uid for uid, until in self.blacklist.items() if until is not None and until <= now]:
+            del self.blacklist[uid]
+        response: Dict[str, Any] = {'success': True}
+        if action == 'add' and user_id:
+            seconds = data.get('duration_seconds')
+            self.blacklist[user_id] = now + seconds if seconds else None
+            response['expires_at'] = int(self.blacklist[user_id]) if seconds else None
+        elif action == 'remove' and user_id:
+            self.blacklist.pop(user_id, None)
+        # Same shape the bot reads: unix expiry and seconds left (0 for permanent entries).
+        response['blacklist'] = [
+            {
+                'discord_user_id': uid,
+                'expires_at': int(until) if until is not None else None,
+                'seconds_remaining': max(0, int(until - now)) if until is not None else 0,
+            }
+            for uid, until in self.blacklist.items()
+        ]
+        return web.json_response(response)
+
+    async def key_stats(self, request: web.Request):
+        await self._body(request)
+        now = time.time()
+        expired = sum(1 for r in self.keys.values() if datetime.fromisoformat(r['expiry_timestamp']).timestamp() <= now)
+        suspended = sum(1 for r in self.keys.values() if r['status'] == 'suspended')
+        return web.json_response({
+            'total_keys': len(self.keys),
+            'active_keys': len(self.keys) - expired - suspended,
+            'expired_keys': expired,
+            'suspended_keys': suspended,
+        })
+
+    async def list_keys(self, request: web.Request):
+        data = await self._body(request)
+        page_size = max(1, min(int(data.get('page_size', 100)), self.max_page))
+        offset = int(data.get('continuation_token') or 0)
+        names = list(self.keys)[offset:offset + page_size]
+        items = [
+            {'key': f"keys/{name}.json", 'size': 256, 'last_modified': self.keys[name]['created_at']}
+            for name in names
+        ]
+        token = str(offset + page_size) if offset + page_size < len(self.keys) else None
+        return web.json_response({'keys': items, 'next_continuation_token': token})
+
+    async def prune_expired(self, request: web.Request):
+        await self._body(request)
+        now = time.time()
+        expired = [k for k, r in self.keys.items() if datetime.fromisoformat(r['expiry_timestamp']).timestamp() <= now]
+        for key in expired:
+            del self.keys[key]
+        return web.json_response({'success': True, 'keys_deleted': len(expired)})
+
+    # -- settings ---------------------------------------------------------
+
+    async def session_tokens(self, request: web.Request):
+        data = await self._body(request)
+        if 'enabled' in data:
+            self.settings['session_tokens_enabled'] = bool(data['enabled'])
+            return web.json_response({'success': True, 'session_tokens_enabled': self.settings['session_tokens_enabled']})
+        return web.json_response({'session_tokens_enabled': self.settings['session_tokens_enabled']})
+
+    async def update_settings(self, request: web.Request):
+        data = await self._body(request)
+        unknown = [k for k in data if k not in self.settings]
+        if unknown:
+            return web.json_response({'error': f"Unknown setting(s): {', '.join(unknown)}"}, status=400)
+        self.settings.update(data)
+        return web.json_response({'success': True, 'settings': self.settings})
+
+    # -- scripts ----------------------------------------------------------
+
+    def _store_script(self, filename: str, content: bytes) -> Dict[str, Any]:
+        record = {
+            'content': content,
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'etag': hashlib.md5(content).hexdigest(),
+            'last_modified': _now().isoformat(),
+        }
+        self.scripts[filename] = record
+        return {'success': True, 'filename': filename, **{k: v for k, v in record.items() if k != 'content'}}
+
+    async def upload_script(self, request: web.Request):
+        data = await self._body(request)
+        if not data.get('filename'):
+            return web.json_response({'error': 'filename required'}, status=400)
+        return web.json_response(self._store_script(data['filename'], (data.get('script') or '').encode()))
+
+    async def delete_script(self, request: web.Request):
+        data = await self._body(request)
+        if self.scripts.pop(data.get('filename'), None) is None:
+            return web.json_response({'error': 'Script not found'}, status=404)
+        return web.json_response({'success': True})
+
+    async def list_scripts(self, request: web.Request):
+        await self._body(request)
+        return web.json_response({'scripts': [
+            {'name': name, **{k: v for k, v in record.items() if k != 'content'}}
+            for name, record in self.scripts.items()
+        ]})
+
+    async def health(self, request: web.Request):
+        return web.json_response({'status': 'ok', 'keys': len(self.keys), 'requests': self.requests})
+
+
+async def start_stub(host: str = '127.0.0.1', port: int = 0, **kwargs) -> tuple:
+    """Start a stub server in the running loop; returns (stub, runner, base_url)."""
+    stub = StubAPI(**kwargs)
+    runner = web.AppRunner(stub.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = runner.addresses[0][1] if runner.addresses else port
+    return stub, runner, f"http://{host}:{bound}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub licensing API for local testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--secret', default='dev-secret', help="must match BOT_SECRET")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="mean added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="standard deviation of added latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument('--max-page', type=int, default=100, help="largest list-keys page the stub returns")
+    parser.add_argument('--seed-keys', type=int, default=0, help="keys to create at startup")
+    args = parser.parse_args()
+
+    stub = StubAPI(
+        args.secret,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        max_page=args.max_page,
+        seed_keys=args.seed_keys
+    )
+    print(f"[STUB] Serving on http://{args.host}:{args.port} with {len(stub.keys)} key(s)")
+    web.run_app(stub.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()